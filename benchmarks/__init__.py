@@ -0,0 +1,17 @@
+"""
+Benchmark suite for PEEKer
+
+    python -m benchmarks --profile quick --output results.json
+
+synthetic generates chromatograms with known peak areas and writes them in
+every supported file format, suite defines the benchmarks and runner times
+them and writes JSON results that can be compared between runs.
+"""
+import os
+import sys
+
+# The application modules import each other as top-level packages (core,
+# utils, config), so src/ has to be on the path like it is for run_app.py
+_SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if _SRC not in sys.path:
+    sys.path.insert(0, _SRC)
@@ -0,0 +1,8 @@
+import sys
+
+from benchmarks.history import compare_main
+from benchmarks.runner import main
+
+if len(sys.argv) > 1 and sys.argv[1] == 'compare':
+    sys.exit(compare_main(sys.argv[2:]))
+sys.exit(main())
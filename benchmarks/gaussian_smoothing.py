@@ -0,0 +1,59 @@
+"""
+Benchmark the Gaussian smoothing implementations
+
+Usage:
+    python benchmarks/gaussian_smoothing.py [--repeat N]
+
+Prints a Markdown table of mean time per call (ms) and the maximum error of
+each method relative to gaussian_filter1d, for a range of sigmas and trace
+lengths. The table in benchmarks/README.md was produced with this script.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.noise_correction import NoiseCorrector  # noqa: E402
+
+METHODS = ('direct', 'fft', 'recursive')
+SIGMAS = (2, 8, 16, 32, 64, 256, 1024)
+LENGTHS = (10_000, 100_000, 1_000_000)
+
+
+def time_call(func, repeat):
+    func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print("| points | sigma | direct (ms) | fft (ms) | recursive (ms) | recursive max rel. error | auto |")
+    print("|---:|---:|---:|---:|---:|---:|:---|")
+    for length in LENGTHS:
+        signal = np.cumsum(rng.normal(size=length))
+        for sigma in SIGMAS:
+            times = {
+                method: time_call(lambda m=method: NoiseCorrector.gaussian_smooth(signal, sigma, m), args.repeat)
+                for method in METHODS
+            }
+            reference = NoiseCorrector.gaussian_smooth(signal, sigma, 'direct')
+            recursive = NoiseCorrector.gaussian_smooth(signal, sigma, 'recursive')
+            error = np.abs(recursive - reference).max() / np.abs(reference).max()
+            auto = NoiseCorrector.choose_gaussian_method(sigma, length)
+            print(f"| {length:,} | {sigma} | {times['direct']:.2f} | {times['fft']:.2f} | "
+                  f"{times['recursive']:.2f} | {error:.1e} | {auto} |")
+
+
+if __name__ == '__main__':
+    main()
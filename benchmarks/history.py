@@ -0,0 +1,340 @@
+"""
+Benchmark history and regression comparison
+
+Usage:
+    python -m benchmarks --store                   # run and record
+    python -m benchmarks compare BASE [TARGET]     # flag regressions
+
+BASE and TARGET are a commit (or prefix) recorded in the history database,
+'<commit>+dirty', 'run:<id>', or a JSON file written by the runner. TARGET
+defaults to the latest recorded run. All runs stored for a commit on this
+machine are pooled, so repeating 'python -m benchmarks --store' before
+comparing narrows the confidence intervals. Runs taken with uncommitted
+changes are only pooled with each other, under '<commit>+dirty'.
+
+A benchmark regresses when the whole confidence interval of its
+target/base time ratio lies above 1 + threshold, and is unchanged when the
+interval lies within [1 / (1 + threshold), 1 + threshold]; anything else is
+inconclusive. The command exits with status 1 if any benchmark regressed.
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import subprocess
+from datetime import datetime
+
+import numpy as np
+from scipy import stats
+
+DEFAULT_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'history.sqlite')
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_CONFIDENCE = 0.95
+DIRTY_SUFFIX = '+dirty'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created TEXT NOT NULL,
+    commit_hash TEXT,
+    dirty INTEGER NOT NULL DEFAULT 0,
+    fingerprint TEXT NOT NULL,
+    profile TEXT,
+    machine TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    times TEXT,
+    median REAL,
+    error TEXT,
+    PRIMARY KEY (run_id, key)
+);
+CREATE INDEX IF NOT EXISTS runs_commit ON runs(commit_hash, fingerprint);
+"""
+
+
+def machine_fingerprint(machine):
+    """
+    Short hash identifying the host and hardware timings were taken on
+
+    Library versions are stored with each run but are not part of the
+    fingerprint, so upgrading NumPy shows up as a regression (or a win)
+    instead of starting a new history.
+
+    Args:
+        machine: Dictionary from runner.machine_info
+    """
+    parts = [str(machine.get(k, '')) for k in ('node', 'platform', 'machine', 'processor', 'cpu_count')]
+    return hashlib.blake2b('|'.join(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def git_commit(cwd=None):
+    """
+    Current commit and whether the work tree has uncommitted changes
+
+    Returns:
+        Tuple of (commit hash or None outside a git checkout, dirty flag)
+    """
+    cwd = cwd or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=cwd, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=cwd,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, False
+    return commit or None, bool(status.strip())
+
+
+def connect(db_path=DEFAULT_DB):
+    """Open (creating if needed) the history database"""
+    connection = sqlite3.connect(db_path)
+    connection.execute('PRAGMA foreign_keys = ON')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def record(report, db_path=DEFAULT_DB):
+    """
+    Store a runner report
+
+    Args:
+        report: Dictionary written by runner.main (needs machine and results;
+                commit, dirty and fingerprint are filled in when missing)
+        db_path: History database
+
+    Returns:
+        Id of the stored run
+    """
+    machine = report['machine']
+    fingerprint = report.get('fingerprint') or machine_fingerprint(machine)
+    with connect(db_path) as connection:
+        cursor = connection.execute(
+            'INSERT INTO runs (created, commit_hash, dirty, fingerprint, profile, machine) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (report.get('created') or datetime.now().isoformat(timespec='seconds'), report.get('commit'),
+             int(bool(report.get('dirty'))), fingerprint, report.get('profile'), json.dumps(machine))
+        )
+        run_id = cursor.lastrowid
+        connection.executemany(
+            'INSERT OR REPLACE INTO results (run_id, key, times, median, error) VALUES (?, ?, ?, ?, ?)',
+            [(run_id, entry['key'], json.dumps(entry.get('times')), entry.get('median'), entry.get('error'))
+             for entry in report['results']]
+        )
+    connection.close()
+    return run_id
+
+
+def load_times(source, db_path=DEFAULT_DB, fingerprint=None):
+    """
+    Run times per benchmark key for a comparison side
+
+    A commit selects the runs recorded from a clean work tree; append
+    '+dirty' to select the runs recorded with uncommitted changes instead.
+
+    Args:
+        source: JSON report path, 'run:<id>', or a commit hash/prefix,
+                optionally followed by '+dirty'
+        db_path: History database
+        fingerprint: Only pool runs from this machine (commit lookups only)
+
+    Returns:
+        Tuple of (description, {key: list of per-run lists of times})
+    """
+    if os.path.isfile(source):
+        with open(source) as f:
+            report = json.load(f)
+        times = {e['key']: [e['times']] for e in report['results'] if e.get('times')}
+        return source, times
+
+    connection = connect(db_path)
+    try:
+        if source.startswith('run:'):
+            run_ids = [int(source[4:])]
+        else:
+            dirty = source.endswith(DIRTY_SUFFIX)
+            commit = source[:-len(DIRTY_SUFFIX)] if dirty else source
+            query = 'SELECT id, commit_hash FROM runs WHERE commit_hash LIKE ? AND dirty = ?'
+            args = [commit + '%', int(dirty)]
+            if fingerprint:
+                query += ' AND fingerprint = ?'
+                args.append(fingerprint)
+            rows = connection.execute(query, args).fetchall()
+            if len({commit for _, commit in rows}) > 1:
+                raise ValueError(f"Commit prefix '{commit}' is ambiguous")
+            run_ids = [run_id for run_id, _ in rows]
+        if not run_ids:
+            raise ValueError(f"No recorded runs for '{source}'")
+
+        times = {}
+        placeholders = ','.join('?' * len(run_ids))
+        for key, run_times in connection.execute(
+                f'SELECT key, times FROM results WHERE run_id IN ({placeholders}) AND error IS NULL '
+                f'ORDER BY run_id', run_ids):
+            times.setdefault(key, []).append(json.loads(run_times))
+    finally:
+        connection.close()
+
+    runs = f"{len(run_ids)} run(s)"
+    return f"{source} ({runs})", times
+
+
+def latest_run(db_path=DEFAULT_DB, fingerprint=None):
+    """
+    'run:<id>' of the most recent stored run (optionally on one machine)
+
+    The run is addressed by id, so a run recorded with uncommitted changes
+    is never pooled with the clean runs of its commit.
+    """
+    connection = connect(db_path)
+    try:
+        query = 'SELECT id FROM runs'
+        args = []
+        if fingerprint:
+            query += ' WHERE fingerprint = ?'
+            args.append(fingerprint)
+        row = connection.execute(query + ' ORDER BY id DESC LIMIT 1', args).fetchone()
+    finally:
+        connection.close()
+    if row is None:
+        raise ValueError("The benchmark history is empty")
+    return f'run:{row[0]}'
+
+
+def log_samples(base_runs, target_runs):
+    """
+    Log-time samples for both sides of a comparison
+
+    Repeats within one invocation share the machine's state (clock speed,
+    other load), so their spread understates the difference between two
+    invocations of the same code. When both sides have at least two stored
+    runs, each run contributes its mean log time as one sample; otherwise
+    the individual repeats are used.
+
+    Returns:
+        Tuple of (base samples, target samples, unit: 'runs' or 'repeats')
+    """
+    if len(base_runs) >= 2 and len(target_runs) >= 2:
+        return (np.array([np.log(run).mean() for run in base_runs]),
+                np.array([np.log(run).mean() for run in target_runs]), 'runs')
+    return (np.log(np.concatenate(base_runs)), np.log(np.concatenate(target_runs)), 'repeats')
+
+
+def ratio_interval(log_base, log_target, confidence=DEFAULT_CONFIDENCE):
+    """
+    Target/base time ratio with a confidence interval
+
+    Welch's t-interval on the difference of mean log times: timings are
+    right-skewed and multiplicative, and the log makes the interval a ratio.
+
+    Args:
+        log_base: Log times (or per-run mean log times) of the base
+        log_target: Same for the target
+
+    Returns:
+        Tuple of (ratio, low, high); low/high are NaN with fewer than two
+        samples on either side
+    """
+    diff = log_target.mean() - log_base.mean()
+    if len(log_base) < 2 or len(log_target) < 2:
+        return math.exp(diff), math.nan, math.nan
+
+    var_base = log_base.var(ddof=1) / len(log_base)
+    var_target = log_target.var(ddof=1) / len(log_target)
+    se = math.sqrt(var_base + var_target)
+    if se == 0:
+        return math.exp(diff), math.exp(diff), math.exp(diff)
+    df = (var_base + var_target) ** 2 / (
+        var_base ** 2 / (len(log_base) - 1) + var_target ** 2 / (len(log_target) - 1))
+    half = stats.t.ppf(0.5 + confidence / 2, df) * se
+    return math.exp(diff), math.exp(diff - half), math.exp(diff + half)
+
+
+def compare(base_times, target_times, threshold=DEFAULT_THRESHOLD, confidence=DEFAULT_CONFIDENCE):
+    """
+    Compare two sets of benchmark timings
+
+    Args:
+        base_times: {key: list of per-run lists of times}, from load_times
+        target_times: Same for the target
+
+    Returns:
+        List of dictionaries (key, ratio, low, high, verdict, unit) for the
+        keys present on both sides; verdict is 'regression',
+        'improvement', 'unchanged' or 'inconclusive'
+    """
+    rows = []
+    for key in sorted(set(base_times) & set(target_times)):
+        log_base, log_target, unit = log_samples(base_times[key], target_times[key])
+        ratio, low, high = ratio_interval(log_base, log_target, confidence)
+        if math.isnan(low):
+            verdict = 'inconclusive'
+        elif low > 1 + threshold:
+            verdict = 'regression'
+        elif high < 1 / (1 + threshold):
+            verdict = 'improvement'
+        elif low >= 1 / (1 + threshold) and high <= 1 + threshold:
+            verdict = 'unchanged'
+        else:
+            # Neither ruled in nor out: more runs are needed
+            verdict = 'inconclusive'
+        rows.append({'key': key, 'ratio': ratio, 'low': low, 'high': high, 'verdict': verdict,
+                     'unit': unit, 'base_samples': len(log_base), 'target_samples': len(log_target)})
+    return rows
+
+
+def format_comparison(rows, base_name, target_name, confidence=DEFAULT_CONFIDENCE):
+    lines = [f"Base:   {base_name}", f"Target: {target_name}",
+             f"{'benchmark':<55}{'ratio':>8}  {int(confidence * 100)}% interval      verdict"]
+    for row in rows:
+        interval = (f"[{row['low']:.3f}, {row['high']:.3f}]" if not math.isnan(row['low'])
+                    else 'n/a')
+        marker = {'regression': '  <-- REGRESSION', 'improvement': '  (faster)'}.get(row['verdict'], '')
+        lines.append(f"{row['key']:<55}{row['ratio']:>8.3f}  {interval:<18} {row['verdict']}{marker}")
+    counts = {verdict: sum(r['verdict'] == verdict for r in rows)
+              for verdict in ('regression', 'improvement', 'unchanged', 'inconclusive')}
+    lines.append(', '.join(f"{count} {verdict}" for verdict, count in counts.items()))
+    if any(row['unit'] == 'repeats' for row in rows):
+        lines.append("Note: intervals from the repeats of single runs ignore run-to-run variation; "
+                     "store two or more runs per side for reliable verdicts")
+    return '\n'.join(lines)
+
+
+def compare_main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks compare',
+                                     description='Flag benchmark regressions between two runs')
+    parser.add_argument('base', help="Commit (prefix), '<commit>+dirty', 'run:<id>' or JSON results file")
+    parser.add_argument('target', nargs='?', default=None,
+                        help='Same forms as base (default: latest recorded run)')
+    parser.add_argument('--db', default=DEFAULT_DB, help='History database')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Smallest slowdown that counts as a regression (0.1 = 10%%)')
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument('--any-machine', action='store_true',
+                        help='Pool runs from every machine instead of only this one')
+    parser.add_argument('--filter', default=None, help='Only compare keys containing this text')
+    args = parser.parse_args(argv)
+
+    from benchmarks.runner import machine_info
+
+    fingerprint = None if args.any_machine else machine_fingerprint(machine_info())
+    try:
+        target = args.target or latest_run(args.db, fingerprint)
+        base_name, base_times = load_times(args.base, args.db, fingerprint)
+        target_name, target_times = load_times(target, args.db, fingerprint)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return 2
+
+    if args.filter:
+        base_times = {k: v for k, v in base_times.items() if args.filter in k}
+    rows = compare(base_times, target_times, args.threshold, args.confidence)
+    if not rows:
+        print("No benchmarks in common")
+        return 2
+
+    print(format_comparison(rows, base_name, target_name, args.confidence))
+    return 1 if any(row['verdict'] == 'regression' for row in rows) else 0
@@ -0,0 +1,63 @@
+"""
+Benchmark multi-resolution against full-resolution penalized least squares
+
+Usage:
+    python benchmarks/multires_baseline.py
+
+For synthetic chromatograms of increasing length, prints a Markdown table of
+the time taken by each method at full resolution and with multires=True,
+the largest baseline difference between the two (as a fraction of the
+tallest peak) and the total peak area each recovers relative to the true
+area. The table in benchmarks/README.md was produced with this script.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.auc_calculator import trapezoid  # noqa: E402
+from core.baseline_correction import BaselineCorrector  # noqa: E402
+
+LENGTHS = (100_000, 300_000, 1_000_000)
+PEAKS = ((2.0, 5.0, 0.1), (1.0, 10.0, 0.2), (3.0, 15.0, 0.05), (0.5, 20.0, 0.3), (1.5, 25.0, 0.1))
+
+
+def chromatogram(length, rng):
+    time_axis = np.linspace(0, 30, length)
+    baseline = 0.5 + 0.04 * time_axis + 0.3 * np.sin(time_axis / 4)
+    peaks = sum(h * np.exp(-((time_axis - c) / w) ** 2) for h, c, w in PEAKS)
+    return time_axis, baseline + peaks + rng.normal(0, 0.01, length), peaks
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print("| points | method | lambda | full (s) | multires (s) | max baseline diff / peak height | "
+          "area full | area multires |")
+    print("|---:|:---|---:|---:|---:|---:|---:|---:|")
+    for length in LENGTHS:
+        time_axis, signal, peaks = chromatogram(length, rng)
+        true_area = trapezoid(peaks, time_axis)
+        for method, (default_lam, order) in BaselineCorrector.PLS_METHODS.items():
+            # Same stiffness in time units as the default lambda on a 3000-point trace
+            lam = default_lam * (length / 3000) ** (2 * order)
+            full, full_time = timed(lambda: BaselineCorrector.apply_correction(
+                time_axis, signal, method, lam=lam))
+            multires, multires_time = timed(lambda: BaselineCorrector.apply_correction(
+                time_axis, signal, method, lam=lam, multires=True))
+            deviation = np.abs(full - multires).max() / peaks.max()
+            print(f"| {length:,} | {method.split(' ')[0]} | {lam:.0e} | {full_time:.2f} | {multires_time:.3f} | "
+                  f"{deviation:.2%} | {trapezoid(full, time_axis) / true_area:.3f} | "
+                  f"{trapezoid(multires, time_axis) / true_area:.3f} |")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""
+Run the benchmark suite and write JSON results
+
+Usage:
+    python -m benchmarks [--profile quick|default|full] [--group GROUP ...]
+                         [--filter TEXT] [--repeat N] [--max-seconds S]
+                         [--output results.json] [--store [DB]]
+    python -m benchmarks compare BASE [TARGET]   (see benchmarks.history)
+
+Every benchmark is called once to warm up, then timed --repeat times (fewer
+if the runs exceed --max-seconds). Results are keyed by Benchmark.key, so
+two JSON files from different commits or machines can be compared entry by
+entry.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks import history, suite
+
+SCHEMA_VERSION = 1
+
+
+def machine_info():
+    """Hardware and library versions the timings depend on"""
+    import numpy
+    import pandas
+    import scipy
+
+    return {
+        'node': platform.node(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'scipy': scipy.__version__,
+        'pandas': pandas.__version__,
+    }
+
+
+def summarise(times):
+    """Statistics of a list of run times (seconds)"""
+    return {
+        'runs': len(times),
+        'mean': statistics.fmean(times),
+        'median': statistics.median(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'min': min(times),
+        'max': max(times),
+    }
+
+
+def run_benchmark(benchmark, workdir, repeat=5, max_seconds=30.0, quiet=True):
+    """
+    Time one benchmark
+
+    Returns:
+        Result dictionary (key, group, name, params, times and statistics),
+        or with an 'error' entry if setup or a run failed
+    """
+    entry = {'key': benchmark.key, 'group': benchmark.group, 'name': benchmark.name,
+             'params': benchmark.params}
+    # The application prints progress and cache statistics; keep them out of the report
+    output = contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext()
+    try:
+        with output:
+            func = benchmark.setup(workdir)
+            func()
+            times = []
+            started = time.perf_counter()
+            for _ in range(max(1, repeat)):
+                start = time.perf_counter()
+                func()
+                times.append(time.perf_counter() - start)
+                if time.perf_counter() - started > max_seconds:
+                    break
+    except Exception as e:
+        entry['error'] = f"{type(e).__name__}: {e}"
+        return entry
+
+    entry['times'] = times
+    entry.update(summarise(times))
+    return entry
+
+
+def run(benchmarks, repeat=5, max_seconds=30.0, progress=None, quiet=True):
+    """
+    Run benchmarks, each in its own scratch directory
+
+    Args:
+        benchmarks: List of suite.Benchmark
+        repeat: Timed runs per benchmark
+        max_seconds: Stop repeating a benchmark after this much time
+        progress: Callback(entry) after each benchmark
+        quiet: Suppress output printed by the application code
+
+    Returns:
+        List of result dictionaries
+    """
+    results = []
+    with tempfile.TemporaryDirectory(prefix='peeker-bench-') as root:
+        for idx, benchmark in enumerate(benchmarks):
+            workdir = os.path.join(root, str(idx))
+            os.makedirs(workdir)
+            entry = run_benchmark(benchmark, workdir, repeat, max_seconds, quiet)
+            results.append(entry)
+            if progress:
+                progress(entry)
+    return results
+
+
+def format_entry(entry):
+    if 'error' in entry:
+        return f"{entry['key']:<55} error: {entry['error']}"
+    return (f"{entry['key']:<55} {entry['median'] * 1000:10.2f} ms  "
+            f"(±{entry['stdev'] * 1000:.2f}, {entry['runs']} runs)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profile', choices=sorted(suite.PROFILES), default='default')
+    parser.add_argument('--group', action='append', choices=suite.GROUPS,
+                        help='Benchmark group to run (repeatable, default all)')
+    parser.add_argument('--filter', default=None, help='Only run benchmarks whose key contains this text')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=30.0)
+    parser.add_argument('--output', default=None, help='JSON results file')
+    parser.add_argument('--store', nargs='?', const=history.DEFAULT_DB, default=None, metavar='DB',
+                        help='Record the run in the benchmark history (default benchmarks/history.sqlite)')
+    parser.add_argument('--verbose', action='store_true', help='Show output printed by the application')
+    args = parser.parse_args(argv)
+
+    benchmarks = suite.build(args.profile, args.group)
+    if args.filter:
+        benchmarks = [b for b in benchmarks if args.filter in b.key]
+    if not benchmarks:
+        print("No benchmarks selected")
+        return 1
+
+    print(f"Running {len(benchmarks)} benchmark(s), profile '{args.profile}'")
+    results = run(benchmarks, args.repeat, args.max_seconds,
+                  progress=lambda entry: print(format_entry(entry)), quiet=not args.verbose)
+
+    machine = machine_info()
+    commit, dirty = history.git_commit()
+    report = {
+        'schema': SCHEMA_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'dirty': dirty,
+        'fingerprint': history.machine_fingerprint(machine),
+        'profile': args.profile,
+        'repeat': args.repeat,
+        'machine': machine,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to: {args.output}")
+    if args.store:
+        run_id = history.record(report, args.store)
+        print(f"Recorded as run:{run_id} ({(commit or 'no commit')[:10]}{history.DIRTY_SUFFIX if dirty else ''}) "
+              f"in {args.store}")
+
+    return 1 if any('error' in entry for entry in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""Benchmark definitions"""
+import os
+import re
+from functools import lru_cache
+
+from benchmarks import synthetic
+from core.auc_calculator import AUCCalculator
+from core.baseline_correction import apply_baseline_correction
+from core.file_processor import FileProcessor
+from core.noise_correction import apply_noise_correction
+from utils.export_manager import ExportManager
+from config.settings import BASELINE_METHODS, NOISE_METHODS
+
+# Sizes per profile. Text and Excel reads are capped separately: the readers
+# are orders of magnitude slower per point than the numeric stages
+PROFILES = {
+    'quick': {'sizes': (1_000, 10_000), 'read_sizes': (1_000, 10_000),
+              'excel_sizes': (1_000,), 'batch_sizes': (1, 10)},
+    'default': {'sizes': (1_000, 10_000, 100_000, 1_000_000), 'read_sizes': (1_000, 10_000, 100_000),
+                'excel_sizes': (1_000, 10_000), 'batch_sizes': (1, 10, 100)},
+    'full': {'sizes': synthetic.SIZES, 'read_sizes': (1_000, 10_000, 100_000, 1_000_000),
+             'excel_sizes': (1_000, 10_000, 100_000), 'batch_sizes': (1, 10, 100, 1000)},
+}
+GROUPS = ('read', 'noise', 'baseline', 'integrate', 'export', 'batch')
+BATCH_FILE_POINTS = 10_000
+
+
+class Benchmark:
+    """
+    One timed operation
+
+    setup(workdir) prepares inputs (files go into workdir) and returns the
+    zero-argument callable that is timed.
+    """
+
+    def __init__(self, group, name, params, setup):
+        self.group = group
+        self.name = name
+        self.params = params
+        self.setup = setup
+
+    @property
+    def key(self):
+        """Stable identifier used to compare results between runs"""
+        params = ','.join(f'{k}={v}' for k, v in self.params.items())
+        return f'{self.group}/{self.name}[{params}]'
+
+
+def slug(method):
+    """Short benchmark name for a GUI method name ('Rolling Ball' -> 'rolling-ball')"""
+    name = method.split('(')[0].strip().lower()
+    return re.sub(r'[^a-z0-9]+', '-', name).strip('-')
+
+
+@lru_cache(maxsize=2)
+def trace(length, irregular=0.0):
+    """Shared synthetic trace per size (drift, noise and a few spikes)"""
+    return synthetic.generate(length, spikes=5, irregular=irregular)
+
+
+def peak_args(length):
+    windows = trace(length)['windows']
+    return [(w['start'], w['end']) for w in windows], [w['name'] for w in windows]
+
+
+def _read(length, file_format):
+    def setup(workdir):
+        data = trace(length)
+        path = synthetic.write_trace(os.path.join(workdir, f'trace.{file_format}'),
+                                     data['time'], data['signal'], file_format)
+        processor = FileProcessor()
+        return lambda: processor.read_arrays(path)
+    return setup
+
+
+def _noise(length, method):
+    def setup(workdir):
+        signal = trace(length)['signal']
+        return lambda: apply_noise_correction(signal, method)
+    return setup
+
+
+def _baseline(length, method):
+    def setup(workdir):
+        data = trace(length)
+        return lambda: apply_baseline_correction(data['time'], data['signal'], method)
+    return setup
+
+
+def _integrate(length, irregular):
+    def setup(workdir):
+        data = trace(length, irregular)
+        ranges, names = peak_args(length)
+        calculator = AUCCalculator()
+        return lambda: calculator.calculate_multiple_peaks(data['time'], data['signal'], ranges, names,
+                                                           presorted=True)
+    return setup
+
+
+def _export(n_results, file_format):
+    def setup(workdir):
+        ranges, names = peak_args(BATCH_FILE_POINTS)
+        data = trace(BATCH_FILE_POINTS)
+        result = AUCCalculator().calculate_multiple_peaks(data['time'], data['signal'], ranges, names,
+                                                          presorted=True)
+        results = [dict(result, filename=f'run{idx:05d}.csv') for idx in range(n_results)]
+        path = os.path.join(workdir, f'results.{file_format}')
+        manager = ExportManager()
+        return lambda: manager.export_results(results, path, file_format)
+    return setup
+
+
+def _batch(n_files):
+    def setup(workdir):
+        paths = synthetic.write_dataset(os.path.join(workdir, 'runs'), n_files, BATCH_FILE_POINTS, spikes=5)
+        ranges, names = peak_args(BATCH_FILE_POINTS)
+        processor = FileProcessor(stage_timing=False)
+        return lambda: processor.process_files(paths, ranges, names)
+    return setup
+
+
+def build(profile='default', groups=None):
+    """
+    Benchmarks of a profile, in run order
+
+    Args:
+        profile: Key of PROFILES
+        groups: Subset of GROUPS (default all)
+
+    Returns:
+        List of Benchmark
+    """
+    sizes = PROFILES[profile]
+    groups = groups or GROUPS
+    benchmarks = []
+
+    if 'read' in groups:
+        for file_format in synthetic.writable_formats():
+            excel = file_format in synthetic.EXCEL_MAX_ROWS
+            for length in sizes['excel_sizes'] if excel else sizes['read_sizes']:
+                benchmarks.append(Benchmark('read', file_format, {'points': length}, _read(length, file_format)))
+
+    if 'noise' in groups:
+        for method in NOISE_METHODS[1:]:
+            for length in sizes['sizes']:
+                benchmarks.append(Benchmark('noise', slug(method), {'points': length}, _noise(length, method)))
+
+    if 'baseline' in groups:
+        for method in BASELINE_METHODS[1:]:
+            for length in sizes['sizes']:
+                benchmarks.append(Benchmark('baseline', slug(method), {'points': length},
+                                            _baseline(length, method)))
+
+    if 'integrate' in groups:
+        for sampling, irregular in (('uniform', 0.0), ('irregular', 0.3)):
+            for length in sizes['sizes']:
+                benchmarks.append(Benchmark('integrate', 'trapezoid', {'points': length, 'sampling': sampling},
+                                            _integrate(length, irregular)))
+
+    if 'export' in groups:
+        for file_format in ('csv', 'xlsx'):
+            for n_results in sizes['batch_sizes']:
+                benchmarks.append(Benchmark('export', file_format, {'results': n_results},
+                                            _export(n_results, file_format)))
+
+    if 'batch' in groups:
+        for n_files in sizes['batch_sizes']:
+            benchmarks.append(Benchmark('batch', 'process_files', {'files': n_files,
+                                                                   'points': BATCH_FILE_POINTS},
+                                        _batch(n_files)))
+
+    return benchmarks
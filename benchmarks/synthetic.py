@@ -0,0 +1,252 @@
+"""Synthetic chromatograms with known peak areas"""
+import base64
+import os
+
+import numpy as np
+from scipy.io import netcdf_file
+from scipy.special import erfc, erfcx
+
+try:
+    import xlwt
+except ImportError:
+    xlwt = None
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+FORMATS = ('csv', 'txt', 'xlsx', 'xls', 'cdf', 'animl')
+EXCEL_MAX_ROWS = {'xlsx': 1_048_576, 'xls': 65_536}
+
+# Peaks on a 30-minute run: isolated Gaussian, tailing EMG, a fused pair
+# (resolution ~0.7), a small Gaussian and a strongly tailing EMG
+DEFAULT_PEAKS = (
+    {'name': 'Gaussian', 'shape': 'gaussian', 'center': 5.0, 'sigma': 0.10, 'area': 0.5},
+    {'name': 'EMG', 'shape': 'emg', 'center': 10.0, 'sigma': 0.08, 'tau': 0.15, 'area': 0.4},
+    {'name': 'Fused A', 'shape': 'gaussian', 'center': 16.0, 'sigma': 0.12, 'area': 0.3, 'group': 'Fused'},
+    {'name': 'Fused B', 'shape': 'gaussian', 'center': 16.35, 'sigma': 0.12, 'area': 0.2, 'group': 'Fused'},
+    {'name': 'Minor', 'shape': 'gaussian', 'center': 21.0, 'sigma': 0.10, 'area': 0.05},
+    {'name': 'Tailing', 'shape': 'emg', 'center': 25.0, 'sigma': 0.10, 'tau': 0.5, 'area': 0.6},
+)
+
+
+def gaussian_peak(time, center, sigma, area):
+    """Gaussian with the given area"""
+    return area / (sigma * np.sqrt(2 * np.pi)) * np.exp(-0.5 * ((time - center) / sigma) ** 2)
+
+
+def emg_peak(time, center, sigma, tau, area):
+    """
+    Exponentially modified Gaussian with the given area
+
+    Evaluated with erfcx on the rising side and erfc on the tail, so neither
+    branch overflows for long traces or sharp peaks.
+    """
+    x = np.asarray(time, dtype=np.float64) - center
+    z = (sigma / tau - x / sigma) / np.sqrt(2)
+    with np.errstate(over='ignore', invalid='ignore', under='ignore'):
+        rising = np.exp(-0.5 * (x / sigma) ** 2) * erfcx(z)
+        tail = np.exp(0.5 * (sigma / tau) ** 2 - x / tau) * erfc(z)
+    return area / (2 * tau) * np.where(z >= 0, rising, tail)
+
+
+def peak_signal(time, peak):
+    """Evaluate one peak definition from DEFAULT_PEAKS"""
+    if peak['shape'] == 'emg':
+        return emg_peak(time, peak['center'], peak['sigma'], peak['tau'], peak['area'])
+    return gaussian_peak(time, peak['center'], peak['sigma'], peak['area'])
+
+
+def peak_windows(peaks=DEFAULT_PEAKS):
+    """
+    Integration windows and true areas, with fused peaks merged
+
+    Returns:
+        List of dictionaries with name, start, end and area
+    """
+    windows = {}
+    for peak in peaks:
+        name = peak.get('group', peak['name'])
+        tail = 8 * peak.get('tau', 0.0)
+        start = peak['center'] - 5 * peak['sigma']
+        end = peak['center'] + 5 * peak['sigma'] + tail
+        if name in windows:
+            window = windows[name]
+            window['start'] = min(window['start'], start)
+            window['end'] = max(window['end'], end)
+            window['area'] += peak['area']
+        else:
+            windows[name] = {'name': name, 'start': start, 'end': end, 'area': peak['area']}
+    return list(windows.values())
+
+
+def generate(length, duration=30.0, peaks=DEFAULT_PEAKS, drift=0.02, noise=0.002,
+             spikes=0, irregular=0.0, seed=0):
+    """
+    Generate a synthetic chromatogram
+
+    Args:
+        length: Number of points
+        duration: Run length in minutes
+        peaks: Peak definitions (see DEFAULT_PEAKS)
+        drift: Baseline rise over the run; a slow bend of half that size is added
+        noise: Standard deviation of white detector noise
+        spikes: Number of single-point spikes (electrical glitches)
+        irregular: Sampling jitter as a fraction of the nominal interval
+                   (0 gives a uniform grid; values below 0.5 keep time sorted)
+        seed: Random seed
+
+    Returns:
+        Dictionary with time, signal, the noise-free peaks and baseline, and
+        the integration windows with their true areas
+    """
+    rng = np.random.default_rng(seed)
+    time = np.linspace(0.0, duration, length)
+    if irregular > 0:
+        dt = duration / max(length - 1, 1)
+        time[1:-1] += rng.uniform(-irregular, irregular, length - 2) * dt
+
+    baseline = 0.01 + drift * time / duration + 0.5 * drift * np.sin(np.pi * time / duration)
+    clean = np.zeros(length)
+    for peak in peaks:
+        clean += peak_signal(time, peak)
+
+    signal = baseline + clean
+    if noise > 0:
+        signal += rng.normal(0.0, noise, length)
+    if spikes > 0:
+        positions = rng.choice(length, size=min(spikes, length), replace=False)
+        signal[positions] += rng.choice([-1.0, 1.0], size=len(positions)) * clean.max()
+
+    return {
+        'time': time,
+        'signal': signal,
+        'peaks': clean,
+        'baseline': baseline,
+        'windows': peak_windows(peaks)
+    }
+
+
+def writable_formats():
+    """Formats write_trace can produce with the installed packages"""
+    return tuple(f for f in FORMATS if f != 'xls' or xlwt is not None)
+
+
+def write_trace(path, time, signal, file_format=None, header=True):
+    """
+    Write a trace in one of the formats FileHandler reads
+
+    csv is comma separated, txt tab separated; xlsx needs openpyxl and xls
+    needs xlwt (pandas can no longer write .xls itself). cdf is an AIA/ANDI
+    netCDF file and animl an AnIML document with a base64 signal; both keep
+    a uniform time axis as start and step, and header does not apply.
+
+    Returns:
+        Path written
+    """
+    file_format = file_format or os.path.splitext(path)[1].lstrip('.').lower()
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported file format: {file_format}")
+
+    if file_format in EXCEL_MAX_ROWS and len(time) + header > EXCEL_MAX_ROWS[file_format]:
+        raise ValueError(f"{len(time):,} points do not fit in one .{file_format} sheet")
+
+    if file_format in ('csv', 'txt'):
+        delimiter = ',' if file_format == 'csv' else '\t'
+        np.savetxt(path, np.column_stack([time, signal]), fmt='%.9g', delimiter=delimiter,
+                   header=delimiter.join(['time', 'signal']) if header else '', comments='')
+    elif file_format == 'cdf':
+        _write_andi(path, time, signal)
+    elif file_format == 'animl':
+        _write_animl(path, time, signal)
+    elif file_format == 'xlsx':
+        import pandas as pd
+        pd.DataFrame({'time': time, 'signal': signal}).to_excel(path, index=False, header=header,
+                                                                engine='openpyxl')
+    else:
+        if xlwt is None:
+            raise ValueError("Writing .xls files requires the xlwt package")
+        workbook = xlwt.Workbook()
+        sheet = workbook.add_sheet('Sheet1')
+        offset = 0
+        if header:
+            sheet.write(0, 0, 'time')
+            sheet.write(0, 1, 'signal')
+            offset = 1
+        for row, (t, s) in enumerate(zip(time.tolist(), signal.tolist()), start=offset):
+            sheet.write(row, 0, t)
+            sheet.write(row, 1, s)
+        workbook.save(path)
+
+    return path
+
+
+def _uniform_step(time):
+    """Sampling interval of an evenly spaced time axis, or None"""
+    if len(time) < 2:
+        return None
+    step = (time[-1] - time[0]) / (len(time) - 1)
+    return step if np.allclose(np.diff(time), step, rtol=1e-9, atol=0) else None
+
+
+def _write_andi(path, time, signal):
+    """AIA/ANDI chromatogram: float64 ordinate_values, times in seconds"""
+    seconds = np.asarray(time, dtype=np.float64) * 60
+    step = _uniform_step(seconds)
+    with netcdf_file(path, 'w') as f:
+        f.createDimension('point_number', len(signal))
+        values = f.createVariable('ordinate_values', 'd', ('point_number',))
+        values[:] = signal
+        if step is None:
+            retention = f.createVariable('raw_data_retention', 'd', ('point_number',))
+            retention[:] = seconds
+        else:
+            for name, value in (('actual_sampling_interval', step), ('actual_delay_time', seconds[0])):
+                scalar = f.createVariable(name, 'd', ())
+                scalar[...] = value
+
+
+def _write_animl(path, time, signal):
+    """AnIML document with one chromatogram SeriesSet, times in minutes"""
+    def encoded(values):
+        raw = np.ascontiguousarray(values, dtype='<f8').tobytes()
+        return f'<EncodedValueSet>{base64.b64encode(raw).decode()}</EncodedValueSet>'
+
+    step = _uniform_step(time)
+    if step is None:
+        time_values = encoded(time)
+    else:
+        time_values = (f'<AutoIncrementedValueSet><StartValue><D>{float(time[0])!r}</D></StartValue>'
+                       f'<Increment><D>{float(step)!r}</D></Increment></AutoIncrementedValueSet>')
+    series = ''.join(
+        f'<Series name="{name}" seriesID="{name}" dependency="{dependency}" seriesType="Float64">'
+        f'{values}<Unit label="{unit}"/></Series>'
+        for name, dependency, values, unit in (('Time', 'independent', time_values, 'min'),
+                                               ('Signal', 'dependent', encoded(signal), 'mAU'))
+    )
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>'
+                '<AnIML xmlns="urn:org:astm:animl:schema:core:draft:0.90" version="0.90">'
+                '<ExperimentStepSet><ExperimentStep name="Chromatogram"><Result>'
+                f'<SeriesSet name="Chromatogram" length="{len(signal)}">{series}</SeriesSet>'
+                '</Result></ExperimentStep></ExperimentStepSet></AnIML>')
+
+
+def write_dataset(folder, n_files, length, file_format='csv', **options):
+    """
+    Write a folder of synthetic runs (seed = file index)
+
+    Args:
+        folder: Output folder (created if missing)
+        n_files: Number of files
+        length: Points per file
+        file_format: One of FORMATS
+        **options: Passed to generate
+
+    Returns:
+        List of written paths
+    """
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for idx in range(n_files):
+        trace = generate(length, seed=idx, **options)
+        path = os.path.join(folder, f'run{idx:05d}.{file_format}')
+        paths.append(write_trace(path, trace['time'], trace['signal'], file_format))
+    return paths
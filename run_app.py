@@ -4,6 +4,7 @@ Launcher Script
 """
 import sys
 import os
+import multiprocessing
 
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -15,6 +16,9 @@ if src_dir not in sys.path:
 
 
 if __name__ == "__main__":
+    # Needed for worker processes in frozen (py2app/PyInstaller) builds
+    multiprocessing.freeze_support()
+    
     try:
         import tkinter as tk
         from tkinter import ttk
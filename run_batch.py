@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Headless batch launcher (see src/batch.py)
+"""
+import sys
+import os
+import multiprocessing
+
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(current_dir, 'src')
+
+# Add src directory
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+
+if __name__ == "__main__":
+    # Needed for worker processes in frozen (py2app/PyInstaller) builds
+    multiprocessing.freeze_support()
+    
+    from batch import main
+    sys.exit(main())
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Live tail launcher (see src/tail.py)
+"""
+import sys
+import os
+
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.join(current_dir, 'src')
+
+# Add src directory
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
+
+
+if __name__ == "__main__":
+    from tail import main
+    sys.exit(main())
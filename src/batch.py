@@ -0,0 +1,218 @@
+"""
+Headless batch processing
+
+Usage:
+    python run_batch.py INPUT [INPUT ...] --peak NAME:START:END [--peak ...] [options]
+
+INPUT is a folder (scanned like the GUI's folder mode) or a single file.
+Results are exported like the GUI does, with the stage timings saved next
+to them; --profile also saves cProfile and tracemalloc reports there.
+--low-memory streams results to a CSV or SQLite file in chunks instead of
+collecting them, for folders too large to hold every result in memory.
+--stream integrates each file in one pass over fixed-size chunks instead
+of loading it whole, for multi-GB traces.
+"""
+import argparse
+import contextlib
+import os
+import sys
+
+from core.file_processor import FileProcessor
+from utils.export_manager import ExportManager
+from utils.profiling import RunProfiler, format_peak_rss
+from utils.result_writer import STREAM_FORMATS
+from utils.stage_timing import RunTimings
+from config.settings import BASELINE_METHODS, NOISE_METHODS, LOW_MEMORY_CHUNK_ROWS, STREAM_CHUNK_ROWS
+
+
+def parse_peak(text):
+    """
+    Parse NAME:START:END (the name may itself contain colons)
+
+    Returns:
+        Tuple of (name, start, end)
+    """
+    try:
+        name, start, end = text.rsplit(':', 2)
+        start, end = float(start), float(end)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected NAME:START:END, got '{text}'")
+    if not name or start >= end:
+        raise argparse.ArgumentTypeError(f"invalid peak '{text}': needs a name and START < END")
+    return name, start, end
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='run_batch.py',
+        description='Integrate HPLC peaks for a batch of files without the GUI'
+    )
+    parser.add_argument('inputs', nargs='+', help='Folders and/or files to process')
+    parser.add_argument('--peak', type=parse_peak, action='append', required=True, metavar='NAME:START:END',
+                        help='Peak window (repeatable)')
+    parser.add_argument('--exclude-from-total', action='append', default=[], metavar='NAME',
+                        help='Peak left out of the total (repeatable)')
+    parser.add_argument('--custom-total', type=parse_peak, default=None, metavar='NAME:START:END',
+                        help='Also integrate one window as a custom total')
+    parser.add_argument('--baseline', choices=BASELINE_METHODS, default='None')
+    parser.add_argument('--noise', choices=NOISE_METHODS, default='None')
+    parser.add_argument('--no-header', action='store_true', help='Files have no header row')
+    parser.add_argument('--time-col', type=int, default=1, help='Time column (1-based)')
+    parser.add_argument('--signal-col', type=int, default=2, help='Signal column (1-based)')
+    parser.add_argument('--no-recursive', action='store_true', help='Do not descend into subfolders')
+    parser.add_argument('--include', action='append', default=None, metavar='GLOB',
+                        help='Only process matching files (repeatable)')
+    parser.add_argument('--exclude', action='append', default=None, metavar='GLOB',
+                        help='Skip matching files (repeatable)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for the compute stage (default: threads only)')
+    parser.add_argument('--output', default=None,
+                        help='Results file (default hplc_results_<timestamp>.<format> here)')
+    parser.add_argument('--format', choices=('csv', 'xlsx', 'sqlite'), default=None,
+                        help='Export format (default from --output, else xlsx, or csv with --low-memory); '
+                             'sqlite needs --low-memory')
+    parser.add_argument('--low-memory', action='store_true',
+                        help='Stream results to disk in chunks (csv or sqlite) instead of keeping them in memory')
+    parser.add_argument('--chunk-size', type=int, default=LOW_MEMORY_CHUNK_ROWS,
+                        help='Results per write in --low-memory mode')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read each file in chunks and integrate in one pass (time must ascend; no QC columns)')
+    parser.add_argument('--stream-chunk-rows', type=int, default=STREAM_CHUNK_ROWS,
+                        help='Rows parsed at a time with --stream')
+    parser.add_argument('--profile', action='store_true',
+                        help='Save cProfile and tracemalloc reports next to the results (slower)')
+    parser.add_argument('--quiet', action='store_true', help='Only print the summary')
+    return parser
+
+
+def iter_inputs(file_handler, inputs, scan_options):
+    """Files named directly, then the contents of each folder"""
+    for path in inputs:
+        if os.path.isdir(path):
+            yield from file_handler.iter_files(path, **scan_options)
+        elif os.path.isfile(path):
+            yield path
+        else:
+            raise FileNotFoundError(f"No such file or folder: {path}")
+
+
+def output_paths(args, export_manager):
+    """Resolve --output/--format/--low-memory to (absolute path, format)"""
+    if args.low_memory:
+        default_format, formats = 'csv', ('csv', 'sqlite')
+    else:
+        default_format, formats = 'xlsx', ('csv', 'xlsx')
+    if args.format is not None and args.format not in formats:
+        raise ValueError(f"--format {args.format} is not available"
+                         f"{' with' if args.low_memory else ' without'} --low-memory")
+    file_format = args.format
+    if args.output:
+        ext = os.path.splitext(args.output)[1].lower()
+        if args.low_memory:
+            ext_format = STREAM_FORMATS.get(ext)
+            if ext_format is None:
+                raise ValueError("--low-memory writes .csv or .sqlite/.db files")
+            if file_format is not None and file_format != ext_format:
+                raise ValueError(f"--format {file_format} does not match {args.output}")
+            file_format = ext_format
+        else:
+            ext = ext.lstrip('.')
+            file_format = file_format or (ext if ext in formats else default_format)
+        return os.path.abspath(args.output), file_format
+    file_format = file_format or default_format
+    return os.path.abspath(export_manager.generate_output_filename('hplc_results', file_format)), file_format
+
+
+def run(args):
+    """
+    Process, export and report
+
+    Returns:
+        Exit status: 0 on success, 1 if any file failed, 2 if nothing was processed
+    """
+    peak_names = [name for name, _, _ in args.peak]
+    peak_ranges = [(start, end) for _, start, end in args.peak]
+    include_in_total = [name not in args.exclude_from_total for name in peak_names]
+
+    processor = FileProcessor(
+        has_header=not args.no_header,
+        time_col_idx=args.time_col,
+        signal_col_idx=args.signal_col,
+        baseline_method=args.baseline,
+        noise_method=args.noise,
+        pipeline_options={'process_workers': args.workers} if args.workers else None,
+        streaming=args.stream,
+        stream_chunk_rows=args.stream_chunk_rows
+    )
+    export_manager = ExportManager()
+    output_path, file_format = output_paths(args, export_manager)
+    scan_options = {'recursive': not args.no_recursive, 'include': args.include, 'exclude': args.exclude}
+
+    def progress_callback(current, total, filename, success):
+        if not args.quiet:
+            print(f"{'✓' if success else '✗'} [{current}] {filename}")
+
+    profiler = RunProfiler() if args.profile else None
+    if profiler is not None:
+        if args.workers:
+            print("Note: work done in worker processes is not profiled")
+        profiler.start()
+    try:
+        files = iter_inputs(processor.file_handler, args.inputs, scan_options)
+        # Files found in sub-folders are named by their path below the inputs
+        root = processor.common_root(args.inputs)
+        if args.low_memory:
+            streamed = processor.process_to_file(
+                files, peak_ranges, peak_names, export_manager.resolve_output_path(output_path, file_format),
+                include_in_total, args.custom_total, progress_callback, args.chunk_size, root
+            )
+            output_path = streamed['output']
+            processed, failed = streamed['files'], streamed['failed']
+            timings = processor.last_timings
+        else:
+            results = processor.process_files(
+                files, peak_ranges, peak_names, include_in_total, args.custom_total,
+                progress_callback=progress_callback, root=root
+            )
+            processed, failed = len(results), sum('error' in r for r in results)
+            timings = processor.last_timings
+            if results:
+                with timings.run_stage('export') if timings is not None else contextlib.nullcontext():
+                    output_path = export_manager.export_results(results, output_path, file_format,
+                                                                processor.last_columns)
+    finally:
+        if profiler is not None:
+            profiler.stop()
+
+    if not processed:
+        if args.low_memory and os.path.exists(output_path):
+            os.remove(output_path)
+        print("No supported files found")
+        return 2
+
+    base_path = os.path.splitext(output_path)[0]
+    if timings is not None:
+        print(RunTimings.format_summary(timings.summary()))
+        sidecar_path = export_manager.export_timings(timings, output_path)
+        if sidecar_path:
+            print(f"Stage timings saved to: {sidecar_path}")
+    if profiler is not None:
+        for path in profiler.save(base_path):
+            print(f"Profile saved to: {path}")
+
+    print(f"Processed {processed} file(s), {failed} failed")
+    print(format_peak_rss())
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return run(args)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
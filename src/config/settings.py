@@ -8,13 +8,17 @@ WINDOW_HEIGHT = 800
 PADDING = 10
 
 # Supported file formats
-SUPPORTED_FORMATS = ['.csv', '.xlsx', '.xls', '.txt']
+SUPPORTED_FORMATS = ['.csv', '.xlsx', '.xls', '.txt', '.cdf', '.animl']
+ANDI_TIME_IN_MINUTES = True  # AIA/ANDI .cdf files store seconds; convert to the minutes used for peak windows
+ANIML_TIME_IN_MINUTES = True  # AnIML time series with a seconds unit are converted to minutes
 
 # File format options for dialog
 SUPPORTED_FILE_FORMATS = [
     ('CSV files', '*.csv'),
     ('Excel files', '*.xlsx *.xls'),
     ('Text files', '*.txt'),
+    ('AIA/ANDI files', '*.cdf'),
+    ('AnIML files', '*.animl'),
     ('All files', '*.*')
 ]
 
@@ -34,10 +38,12 @@ DEFAULT_OUTPUT_NAME = 'Peaks_results'
 EXPORT_FORMATS = ['xlsx', 'csv']
 
 # Baseline correction methods incorporated
-BASELINE_METHODS = ['None', 'Linear', 'Polynomial', 'Als (Asymmetric Least Squares)']
+BASELINE_METHODS = ['None', 'Linear', 'Polynomial', 'Als (Asymmetric Least Squares)',
+                    'arPLS (Asymmetrically Reweighted PLS)', 'airPLS (Adaptive Iteratively Reweighted PLS)',
+                    'Morphological (Top-hat)', 'Rolling Ball', 'SNIP']
 
 # Noise correction methods
-NOISE_METHODS = ['None', 'Moving Average', 'Savitzky-Golay', 'Gaussian']
+NOISE_METHODS = ['None', 'Moving Average', 'Savitzky-Golay', 'Gaussian', 'Median', 'Whittaker', 'Wavelet']
 
 # Column detection
 DEFAULT_TIME_COLUMN_INDEX = 1  # First column
@@ -53,19 +59,51 @@ DEFAULT_NOISE_WINDOW = 5
 DEFAULT_BASELINE_LAMBDA = 1e5
 DEFAULT_BASELINE_P = 0.01
 DEFAULT_BASELINE_ITERATIONS = 10
+DEFAULT_ARPLS_LAMBDA = 1e5
+DEFAULT_ARPLS_RATIO = 1e-6  # Relative weight change at which arPLS stops
+DEFAULT_AIRPLS_LAMBDA = 100
+DEFAULT_MORPH_HALF_WINDOW = 50  # Samples; wider than the half width of the widest peak
+DEFAULT_SNIP_HALF_WINDOW = 40
+DEFAULT_MULTIRES_BASELINE = False  # Fit ALS/arPLS/airPLS on a decimated trace (True, or a bin size)
+MULTIRES_TARGET_POINTS = 20000  # Reduced grid size when the bin size is chosen automatically
+POLYNOMIAL_PROJECTOR_CACHE_BYTES = 64 * 1024 * 1024  # Polynomial-baseline bases kept per (time grid, degree)
 DEFAULT_SAVGOL_WINDOW = 11
 DEFAULT_SAVGOL_POLYORDER = 3
 DEFAULT_GAUSSIAN_SIGMA = 2.0
+GAUSSIAN_DIRECT_MAX_SIGMA = 12.0  # Above this, Gaussian smoothing uses FFT or recursive filtering
+GAUSSIAN_RECURSIVE_MIN_POINTS = 50000  # Traces this long use the recursive (Young-van Vliet) filter
+DEFAULT_MEDIAN_WINDOW = 5
+DEFAULT_WHITTAKER_LAMBDA = 100.0
+DEFAULT_WAVELET = 'db4'  # Needs PyWavelets; the NumPy fallback always uses Haar
+
+# Batch pipeline (reader threads prefetch parsed files for the compute workers)
+DEFAULT_READER_THREADS = 4
+DEFAULT_COMPUTE_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+DEFAULT_READ_QUEUE_DEPTH = 8
+DEFAULT_RESULT_QUEUE_DEPTH = 32
+DEFAULT_PROCESS_WORKERS = 0  # >0 runs the compute stage in worker processes (shared-memory arrays)
+DEFAULT_COMPUTE_BATCH_SIZE = 16  # Waiting files on one time grid corrected as a stack (1 = file by file)
+WORKER_POOL_SIZE = max(1, min(4, (os.cpu_count() or 2) - 1))  # GUI's persistent worker processes
+RESULT_CACHE_SIZE = 10000  # Per-file results remembered between runs (content hash + method)
+CORRECTION_CACHE_BYTES = 256 * 1024 * 1024  # Smoothed/baseline-corrected traces kept for re-analysis
+ENABLE_STAGE_TIMING = True  # Per-file wall/CPU time per stage, logged and saved as <export>.timing.json
+PROFILE_TOP_ENTRIES = 30  # Functions/allocation sites listed in profile reports
+PROFILE_TRACEMALLOC_FRAMES = 10  # Stack depth recorded per allocation while profiling
+PROFILE_SNAPSHOT_INTERVAL = 0.5  # Seconds between checks for a new memory high while profiling
+LOW_MEMORY_CHUNK_ROWS = 1000  # Results buffered before each write in low-memory (streaming) mode
+STREAM_CHUNK_ROWS = 500000  # Rows parsed at a time when a trace is integrated without loading it whole
+LIVE_TAIL_INTERVAL = 0.1  # Seconds between checks for appended rows when following a file being written
 
 # Data validation
 MIN_DATA_POINTS = 2
+ENABLE_QUALITY_METRICS = True  # Add QC_* columns (sampling, duplicates, saturation, noise) to results
 MAX_COLUMN_INDEX = 100
 
 class Settings:
     def __init__(self):
         self.default_input_folder = os.path.join(os.getcwd(), 'input_files')
         self.default_output_folder = os.path.join(os.getcwd(), 'output_files')
-        self.allowed_file_types = ['.csv', '.xlsx', '.xls', '.txt']
+        self.allowed_file_types = ['.csv', '.xlsx', '.xls', '.txt', '.cdf', '.animl']
         self.export_format = 'csv'  # Options: 'csv', 'excel'
         self.enable_logging = True
         self.log_file_path = os.path.join(os.getcwd(), 'processing_log.csv')
@@ -1,20 +1,52 @@
 #used trpz rule
 import numpy as np
-from core.baseline_correction import apply_baseline_correction
+from core.baseline_correction import BaselineCorrector, apply_baseline_correction
 from core.noise_correction import apply_noise_correction
+from utils.stage_timing import stage
+
+# np.trapz was renamed to np.trapezoid in NumPy 2.0
+trapezoid = getattr(np, 'trapezoid', None) or np.trapz
 
 
 class AUCCalculator:
     """Calculate Area Under Curve"""
     
     def __init__(self, baseline_method='None', noise_method='None',
-                 baseline_params=None, noise_params=None):
+                 baseline_params=None, noise_params=None, correction_cache=None):
         self.baseline_method = baseline_method
         self.noise_method = noise_method
         self.baseline_params = baseline_params or {}
         self.noise_params = noise_params or {}
+        # Optional CorrectionCache: reuse smoothed/corrected arrays across calls
+        self.correction_cache = correction_cache
     
-    def calculate_auc(self, time, signal, xi, xf):
+    def smooth(self, signal):
+        """
+        Apply the noise correction to whole traces
+        
+        Args:
+            signal: Signal array, or 2-D (files, points) array (one vectorized call)
+        
+        Returns:
+            Smoothed signal
+        """
+        if self.noise_method == 'None':
+            return signal
+        with stage('noise'):
+            if self.correction_cache is not None:
+                return self.correction_cache.smooth(signal, self.noise_method, self.noise_params)
+            return apply_noise_correction(signal, self.noise_method, **self.noise_params)
+    
+    def correct_baseline(self, time, signal):
+        """Apply the baseline correction (through the correction cache if set)"""
+        if self.baseline_method == 'None':
+            return signal
+        with stage('baseline'):
+            if self.correction_cache is not None:
+                return self.correction_cache.baseline(time, signal, self.baseline_method, self.baseline_params)
+            return apply_baseline_correction(time, signal, self.baseline_method, **self.baseline_params)
+    
+    def calculate_auc(self, time, signal, xi, xf, presorted=False, smoothed=False):
         """
         Calculate AUC for given time range using trapez. rule
         
@@ -23,43 +55,46 @@ class AUCCalculator:
             signal: Signal array
             xi: Start time (target peak)
             xf: End time
+            presorted: Arrays come from DataValidator.clean_arrays (sorted, finite
+                       float64), so the window is sliced with a binary search
+            smoothed: Signal was already passed through smooth(); otherwise
+                      the noise correction is applied to the window alone
         
         Returns:
             AUC value
         """
-        # Convert to numpy arrays
-        time_arr = np.array(time)
-        signal_arr = np.array(signal)
-        
-        mask = (time_arr >= xi) & (time_arr <= xf)
-        filtered_time = time_arr[mask]
-        filtered_signal = signal_arr[mask]
+        if presorted:
+            start = np.searchsorted(time, xi, side='left')
+            end = np.searchsorted(time, xf, side='right')
+            filtered_time = time[start:end]
+            filtered_signal = signal[start:end]
+        else:
+            # Convert to numpy arrays
+            time_arr = np.array(time)
+            signal_arr = np.array(signal)
+            
+            mask = (time_arr >= xi) & (time_arr <= xf)
+            filtered_time = time_arr[mask]
+            filtered_signal = signal_arr[mask]
         
         if len(filtered_time) < 2:
             raise ValueError(f"Insufficient data points between {xi} and {xf}")
         
 
-        if self.noise_method != 'None':
-            filtered_signal = apply_noise_correction(
-                filtered_signal,
-                self.noise_method,
-                **self.noise_params
-            )
+        if self.noise_method != 'None' and not smoothed:
+            filtered_signal = self.smooth(filtered_signal)
         
         if self.baseline_method != 'None':
-            filtered_signal = apply_baseline_correction(
-                filtered_time,
-                filtered_signal,
-                self.baseline_method,
-                **self.baseline_params
-            )
+            filtered_signal = self.correct_baseline(filtered_time, filtered_signal)
 
-        auc = np.trapz(filtered_signal, filtered_time)
+        with stage('integrate'):
+            auc = trapezoid(filtered_signal, filtered_time)
         
         return max(0, auc)  # Ensure non-negative
     
     def calculate_multiple_peaks(self, time, signal, peak_ranges, peak_names, 
-                                 include_in_total=None, custom_total_range=None):
+                                 include_in_total=None, custom_total_range=None,
+                                 presorted=False, smoothed=False):
         """
         Calculate AUC for multiple peaks
         
@@ -72,6 +107,53 @@ class AUCCalculator:
                              If None, all peaks are included
             custom_total_range: Tuple of (start, end, name) for custom total peak
                                If provided, calculates both standard and custom total
+            presorted: Arrays are already cleaned (see calculate_auc)
+            smoothed: Signal was already passed through smooth()
+        
+        Returns:
+            Dictionary with results
+        """
+        # Smooth the whole trace once rather than every window separately
+        if not presorted:
+            signal = np.asarray(signal, dtype=np.float64)
+        if not smoothed:
+            signal = self.smooth(signal)
+        
+        peak_aucs = [self._try_auc(time, signal, xi, xf, presorted) for xi, xf in peak_ranges]
+        custom_auc = None
+        if custom_total_range:
+            custom_auc = self._try_auc(time, signal, custom_total_range[0], custom_total_range[1], presorted)
+        
+        return self._summarise(peak_aucs, custom_auc, peak_names, include_in_total, custom_total_range)
+    
+    @staticmethod
+    def result_columns(peak_names, include_in_total=None, custom_total_range=None):
+        """
+        Area, total and percentage keys of a result, in result order
+        
+        Exports put these columns first, so a failed file at the top of a
+        run does not move its error column ahead of the areas.
+        """
+        custom_auc = (0.0, None) if custom_total_range else None
+        return list(AUCCalculator._summarise([(0.0, None)] * len(peak_names), custom_auc, peak_names,
+                                             include_in_total, custom_total_range))
+    
+    def _try_auc(self, time, signal, xi, xf, presorted):
+        """(auc, None) for one window of a smoothed trace, or (0, error message)"""
+        try:
+            return self.calculate_auc(time, signal, xi, xf, presorted, smoothed=True), None
+        except Exception as e:
+            return 0, str(e)
+    
+    @staticmethod
+    def _summarise(peak_aucs, custom_auc, peak_names, include_in_total=None, custom_total_range=None):
+        """
+        Build the result dictionary from per-window AUCs
+        
+        Args:
+            peak_aucs: List of (auc, error message or None), one per peak
+            custom_auc: (auc, error message or None) for custom_total_range, or None
+            peak_names, include_in_total, custom_total_range: As for calculate_multiple_peaks
         
         Returns:
             Dictionary with results
@@ -79,38 +161,28 @@ class AUCCalculator:
         results = {}
         standard_total_auc = 0
         
-
         if include_in_total is None:
             include_in_total = [True] * len(peak_names)
 
-        for idx, (peak_name, (xi, xf)) in enumerate(zip(peak_names, peak_ranges)):
-            try:
-                auc = self.calculate_auc(time, signal, xi, xf)
-                results[peak_name] = auc
-                
-                if include_in_total[idx]:
-                    standard_total_auc += auc
-                    
-            except Exception as e:
-                results[peak_name] = 0
-                results[f'{peak_name}_error'] = str(e)
+        for idx, (peak_name, (auc, error)) in enumerate(zip(peak_names, peak_aucs)):
+            results[peak_name] = auc
+            if error is not None:
+                results[f'{peak_name}_error'] = error
+            elif include_in_total[idx]:
+                standard_total_auc += auc
         
         if custom_total_range:
-            custom_start, custom_end, custom_name = custom_total_range
-            try:
-                custom_total_auc = self.calculate_auc(time, signal, custom_start, custom_end)
-                results[f'{custom_name}'] = custom_total_auc
-                
+            custom_name = custom_total_range[2]
+            custom_total_auc, error = custom_auc
+            results[f'{custom_name}'] = custom_total_auc
+            if error is not None:
+                results[f'{custom_name}_error'] = error
+            else:
                 for peak_name in peak_names:
                     if custom_total_auc > 0:
                         results[f'{peak_name}_%_Custom'] = (results.get(peak_name, 0) / custom_total_auc) * 100
                     else:
                         results[f'{peak_name}_%_Custom'] = 0
-                
-            except Exception as e:
-                results[f'{custom_name}'] = 0
-                results[f'{custom_name}_error'] = str(e)
-                custom_total_auc = 0
 
         results['Total_Standard'] = standard_total_auc
         
@@ -126,4 +198,73 @@ class AUCCalculator:
                 if f'{peak_name}_%_Standard' in results:
                     results[f'{peak_name}_%'] = results.pop(f'{peak_name}_%_Standard')
         
-        return results
\ No newline at end of file
+        return results
+    
+    def calculate_batch(self, time, signals, peak_ranges, peak_names,
+                        include_in_total=None, custom_total_range=None):
+        """
+        Calculate AUCs for several traces sampled on one shared time grid
+        
+        The noise correction runs once over the stacked (files, points)
+        array, and each peak window is baseline-corrected and integrated for
+        all traces together when the baseline method accepts stacks
+        (BaselineCorrector.STACKED_METHODS). FileProcessor.compute_results_batch
+        sends the batch pipeline's waiting files on one time grid through here.
+        
+        Args:
+            time: Clean, sorted time array shared by all traces
+            signals: 2-D array of shape (files, points)
+            peak_ranges, peak_names, include_in_total, custom_total_range:
+                As for calculate_multiple_peaks
+        
+        Returns:
+            List of result dictionaries, one per row of signals
+        """
+        time = np.asarray(time, dtype=np.float64)
+        signals = np.atleast_2d(np.asarray(signals, dtype=np.float64))
+        if signals.shape[1] != len(time):
+            raise ValueError(f"Signals have {signals.shape[1]} points but time has {len(time)}")
+        
+        smoothed = self.smooth(signals)
+        peak_aucs = [self._try_auc_batch(time, smoothed, xi, xf) for xi, xf in peak_ranges]
+        custom_aucs = None
+        if custom_total_range:
+            custom_aucs = self._try_auc_batch(time, smoothed, custom_total_range[0], custom_total_range[1])
+        
+        results = []
+        for row in range(len(signals)):
+            row_peaks = [(aucs[row], error) for aucs, error in peak_aucs]
+            row_custom = None
+            if custom_aucs is not None:
+                row_custom = (custom_aucs[0][row], custom_aucs[1])
+            results.append(self._summarise(row_peaks, row_custom, peak_names,
+                                           include_in_total, custom_total_range))
+        return results
+    
+    def _try_auc_batch(self, time, signals, xi, xf):
+        """
+        AUC of one window for every row of a smoothed stack
+        
+        Returns:
+            Tuple of (array of AUCs, None), or (zeros, error message)
+        """
+        try:
+            start = np.searchsorted(time, xi, side='left')
+            end = np.searchsorted(time, xf, side='right')
+            window_time = time[start:end]
+            window = signals[:, start:end]
+            
+            if len(window_time) < 2:
+                raise ValueError(f"Insufficient data points between {xi} and {xf}")
+            
+            if self.baseline_method != 'None':
+                if self.baseline_method in BaselineCorrector.STACKED_METHODS:
+                    window = self.correct_baseline(window_time, window)
+                else:
+                    window = np.vstack([self.correct_baseline(window_time, row) for row in window])
+            
+            with stage('integrate'):
+                aucs = trapezoid(window, window_time, axis=-1)
+            return np.maximum(aucs, 0), None
+        except Exception as e:
+            return np.zeros(len(signals)), str(e)
@@ -1,12 +1,39 @@
 """Baseline correction algorithms"""
+import hashlib
+import threading
+from collections import OrderedDict
+
 import numpy as np
 import pandas as pd
-from scipy import sparse
-from scipy.sparse.linalg import spsolve
+from scipy.special import expit, ndtri
+from scipy.ndimage import grey_opening, uniform_filter1d
+from scipy.interpolate import CubicSpline
+from config.settings import (DEFAULT_ARPLS_LAMBDA, DEFAULT_ARPLS_RATIO, DEFAULT_AIRPLS_LAMBDA,
+                             DEFAULT_MORPH_HALF_WINDOW, DEFAULT_SNIP_HALF_WINDOW,
+                             DEFAULT_MULTIRES_BASELINE, MULTIRES_TARGET_POINTS,
+                             POLYNOMIAL_PROJECTOR_CACHE_BYTES)
+from core.pls_solver import reweighted_fit
+
+# Polynomial bases keyed by (time grid hash, degree), least recently used first,
+# bounded by their total size (a basis is points x (degree + 1) float64)
+_projector_cache = OrderedDict()
+_projector_bytes = 0
+_projector_lock = threading.Lock()
+
 
 class BaselineCorrector:
     """Applies various baseline correction methods"""
     
+    # Methods that accept a 2-D (files, points) stack in one call
+    STACKED_METHODS = ('None', 'Linear', 'Polynomial', 'Morphological (Top-hat)', 'Rolling Ball', 'SNIP')
+    
+    # Penalized least-squares methods: (default lambda, default difference order)
+    PLS_METHODS = {
+        'Als (Asymmetric Least Squares)': (1e5, 2),
+        'arPLS (Asymmetrically Reweighted PLS)': (DEFAULT_ARPLS_LAMBDA, 2),
+        'airPLS (Adaptive Iteratively Reweighted PLS)': (DEFAULT_AIRPLS_LAMBDA, 1)
+    }
+    
     @staticmethod
     def apply_correction(time, signal, method='None', **kwargs):
         """
@@ -21,6 +48,11 @@ class BaselineCorrector:
         Returns:
             Corrected signal
         """
+        multires = kwargs.pop('multires', DEFAULT_MULTIRES_BASELINE)
+        if multires and method in BaselineCorrector.PLS_METHODS:
+            factor = None if multires is True else int(multires)
+            return BaselineCorrector.multires_baseline(signal, method, factor, **kwargs)
+        
         if method == 'None' or method is None:
             return signal
         elif method == 'Linear':
@@ -33,49 +65,362 @@ class BaselineCorrector:
             p = kwargs.get('p', 0.01)
             niter = kwargs.get('niter', 10)
             return BaselineCorrector.als_baseline(signal, lam, p, niter)
+        elif method == 'arPLS (Asymmetrically Reweighted PLS)':
+            lam = kwargs.get('lam', DEFAULT_ARPLS_LAMBDA)
+            ratio = kwargs.get('ratio', DEFAULT_ARPLS_RATIO)
+            max_iter = kwargs.get('max_iter', 100)
+            return BaselineCorrector.arpls_baseline(signal, lam, ratio, max_iter)
+        elif method == 'airPLS (Adaptive Iteratively Reweighted PLS)':
+            lam = kwargs.get('lam', DEFAULT_AIRPLS_LAMBDA)
+            order = kwargs.get('order', 1)
+            max_iter = kwargs.get('max_iter', 15)
+            return BaselineCorrector.airpls_baseline(signal, lam, order, max_iter)
+        elif method == 'Morphological (Top-hat)':
+            half_window = kwargs.get('half_window', DEFAULT_MORPH_HALF_WINDOW)
+            return BaselineCorrector.tophat_baseline(signal, half_window)
+        elif method == 'Rolling Ball':
+            half_window = kwargs.get('half_window', DEFAULT_MORPH_HALF_WINDOW)
+            smooth_half_window = kwargs.get('smooth_half_window', None)
+            return BaselineCorrector.rolling_ball_baseline(signal, half_window, smooth_half_window)
+        elif method == 'SNIP':
+            max_half_window = kwargs.get('max_half_window', DEFAULT_SNIP_HALF_WINDOW)
+            decreasing = kwargs.get('decreasing', False)
+            lls = kwargs.get('lls', False)
+            return BaselineCorrector.snip_baseline(signal, max_half_window, decreasing, lls)
         else:
             return signal
     
     @staticmethod
     def linear_baseline(time, signal):
-        """Linear baseline correction"""
+        """Linear baseline correction (signal may be a 2-D (files, points) stack)"""
         time_arr = np.array(time)
         signal_arr = np.array(signal)
         
-        slope = (signal_arr[-1] - signal_arr[0]) / (time_arr[-1] - time_arr[0])
-        intercept = signal_arr[0] - slope * time_arr[0]
+        slope = (signal_arr[..., -1:] - signal_arr[..., :1]) / (time_arr[-1] - time_arr[0])
+        intercept = signal_arr[..., :1] - slope * time_arr[0]
         baseline = slope * time_arr + intercept
         
         return signal_arr - baseline
     
     @staticmethod
     def polynomial_baseline(time, signal, degree=2):
-        """Polynomial baseline correction"""
-        time_arr = np.array(time)
-        signal_arr = np.array(signal)
+        """
+        Polynomial baseline correction
+        
+        Least-squares fit through the cached projector for the time grid
+        (see polynomial_projector), so a stack of traces sharing one grid is
+        corrected with two matrix multiplies.
+        
+        Args:
+            time: Time array
+            signal: Signal array or 2-D (files, points) stack on that grid
+            degree: Polynomial degree
         
-        coeffs = np.polyfit(time_arr, signal_arr, degree)
-        baseline = np.polyval(coeffs, time_arr)
+        Returns:
+            Corrected signal
+        """
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        Q = BaselineCorrector.polynomial_projector(time, degree)
+        baseline = (signal_arr @ Q) @ Q.T
         
         return signal_arr - baseline
     
+    @staticmethod
+    def polynomial_projector(time, degree=2):
+        """
+        Orthonormal basis of the polynomials up to `degree` on a time grid
+        
+        Q comes from a QR factorization of the Vandermonde matrix of the time
+        axis (mapped onto [-1, 1] for conditioning); the least-squares
+        polynomial fit of y is then Q @ (Q.T @ y). Bases are cached by a hash
+        of the grid, so every file (and every peak window) sampled on the
+        same grid reuses one factorization; the cache holds at most
+        POLYNOMIAL_PROJECTOR_CACHE_BYTES of bases.
+        
+        Args:
+            time: Time array
+            degree: Polynomial degree
+        
+        Returns:
+            Read-only array of shape (points, degree + 1)
+        """
+        time_arr = np.ascontiguousarray(time, dtype=np.float64)
+        degree = max(0, min(int(degree), len(time_arr) - 1))
+        key = (hashlib.blake2b(time_arr.tobytes(), digest_size=16).digest(), degree)
+        
+        with _projector_lock:
+            Q = _projector_cache.get(key)
+            if Q is not None:
+                _projector_cache.move_to_end(key)
+                return Q
+        
+        centre = (time_arr[-1] + time_arr[0]) / 2
+        half_range = (time_arr[-1] - time_arr[0]) / 2 or 1.0
+        vander = np.vander((time_arr - centre) / half_range, degree + 1, increasing=True)
+        Q, _ = np.linalg.qr(vander)
+        Q.setflags(write=False)
+        if Q.nbytes > POLYNOMIAL_PROJECTOR_CACHE_BYTES:
+            return Q
+        
+        global _projector_bytes
+        with _projector_lock:
+            previous = _projector_cache.pop(key, None)
+            if previous is not None:
+                _projector_bytes -= previous.nbytes
+            _projector_cache[key] = Q
+            _projector_bytes += Q.nbytes
+            while _projector_bytes > POLYNOMIAL_PROJECTOR_CACHE_BYTES:
+                _, evicted = _projector_cache.popitem(last=False)
+                _projector_bytes -= evicted.nbytes
+        return Q
+    
     @staticmethod
     def als_baseline(signal, lam=1e5, p=0.01, niter=10):
         """Asymmetric Least Squares baseline correction"""
-        signal_arr = np.array(signal)
-        L = len(signal_arr)
-        D = sparse.diags([1, -2, 1], [0, -1, -2], shape=(L, L-2))
-        D = lam * D.dot(D.transpose())
-        w = np.ones(L)
-        W = sparse.spdiags(w, 0, L, L)
-        
-        for i in range(niter):
-            W.setdiag(w)
-            Z = W + D
-            z = spsolve(Z, w * signal_arr)
-            w = p * (signal_arr > z) + (1 - p) * (signal_arr < z)
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        
+        def update(y, z, iteration, w):
+            return p * (y > z) + (1 - p) * (y < z)
         
+        # tol=0 stops only once the weights repeat, i.e. with the same
+        # result as running all niter iterations
+        z, _ = reweighted_fit(signal_arr, lam, update, max_iter=niter, tol=0.0)
         return signal_arr - z
+    
+    @staticmethod
+    def arpls_baseline(signal, lam=1e5, ratio=1e-6, max_iter=100):
+        """
+        Asymmetrically reweighted penalized least squares (Baek et al., 2015)
+        
+        Weights follow a logistic function of the residual scaled by the
+        spread of the negative residuals (the noise), so no asymmetry
+        parameter has to be tuned per method.
+        
+        Args:
+            signal: Signal array
+            lam: Smoothness penalty
+            ratio: Convergence threshold on the relative weight change
+            max_iter: Maximum number of iterations
+        
+        Returns:
+            Corrected signal
+        """
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        
+        def update(y, z, iteration, w):
+            d = y - z
+            negative = d[d < 0]
+            if negative.size < 2:
+                return None
+            m, s = negative.mean(), negative.std()
+            if s == 0:
+                return None
+            return expit(-2 * (d - (2 * s - m)) / s)
+        
+        z, _ = reweighted_fit(signal_arr, lam, update, max_iter=max_iter, tol=ratio)
+        return signal_arr - z
+    
+    @staticmethod
+    def airpls_baseline(signal, lam=100, order=1, max_iter=15):
+        """
+        Adaptive iteratively reweighted penalized least squares (Zhang et al., 2010)
+        
+        Points above the current fit get zero weight; points below are
+        weighted by how far they sit under it, more strongly each iteration.
+        Stops once the total negative residual falls below 0.1% of the signal.
+        
+        Args:
+            signal: Signal array
+            lam: Smoothness penalty
+            order: Difference order of the penalty
+            max_iter: Maximum number of iterations
+        
+        Returns:
+            Corrected signal
+        """
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        threshold = 0.001 * np.abs(signal_arr).sum()
+        
+        def update(y, z, iteration, w):
+            d = y - z
+            below = d < 0
+            dssn = np.abs(d[below].sum())
+            if dssn < threshold or not below.any():
+                return None
+            new_w = np.zeros_like(d)
+            new_w[below] = np.exp(iteration * np.abs(d[below]) / dssn)
+            new_w[0] = new_w[-1] = np.exp(iteration * d[below].max() / dssn)
+            return new_w
+        
+        z, _ = reweighted_fit(signal_arr, lam, update, order=order, max_iter=max_iter)
+        return signal_arr - z
+
+    
+    @staticmethod
+    def _opening(signal_arr, half_window):
+        """Grey opening with a flat element of 2*half_window+1 samples along the last axis"""
+        size = (1,) * (signal_arr.ndim - 1) + (2 * int(half_window) + 1,)
+        return grey_opening(signal_arr, size=size, mode='nearest')
+    
+    @staticmethod
+    def tophat_baseline(signal, half_window=50):
+        """
+        Morphological (white top-hat) baseline correction
+        
+        The baseline is the grey opening of the signal, which removes every
+        feature narrower than the structuring element. Runs in O(n) per trace
+        and accepts 2-D (files, points) arrays.
+        
+        Args:
+            signal: Signal array or 2-D stack
+            half_window: Half width of the structuring element in samples;
+                         should exceed the half width of the widest peak
+        
+        Returns:
+            Corrected signal
+        """
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        return signal_arr - BaselineCorrector._opening(signal_arr, half_window)
+    
+    @staticmethod
+    def rolling_ball_baseline(signal, half_window=50, smooth_half_window=None):
+        """
+        Rolling-ball baseline correction
+        
+        Grey opening followed by a moving average of the opening, which
+        removes the flat-topped steps a bare top-hat leaves under peaks.
+        
+        Args:
+            signal: Signal array or 2-D stack
+            half_window: Half width of the structuring element in samples
+            smooth_half_window: Half width of the smoothing window (default: half_window)
+        
+        Returns:
+            Corrected signal
+        """
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        if smooth_half_window is None:
+            smooth_half_window = half_window
+        baseline = BaselineCorrector._opening(signal_arr, half_window)
+        baseline = uniform_filter1d(baseline, 2 * int(smooth_half_window) + 1, axis=-1, mode='nearest')
+        return signal_arr - baseline
+    
+    @staticmethod
+    def snip_baseline(signal, max_half_window=40, decreasing=False, lls=False):
+        """
+        SNIP (statistics-sensitive non-linear iterative peak clipping) baseline
+        
+        For each half window p, every point is replaced by the mean of its
+        neighbours p samples away when that is lower. Each pass is one
+        vectorized operation over the whole trace (or stack), so the cost is
+        O(n * max_half_window).
+        
+        Args:
+            signal: Signal array or 2-D stack
+            max_half_window: Largest clipping half window in samples
+            decreasing: Run the windows from largest to smallest
+            lls: Apply the log-log-sqrt transform first (for count-like data
+                 spanning several orders of magnitude)
+        
+        Returns:
+            Corrected signal
+        """
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        length = signal_arr.shape[-1]
+        max_half_window = min(int(max_half_window), (length - 1) // 2)
+        
+        if lls:
+            offset = signal_arr.min(axis=-1, keepdims=True)
+            baseline = np.log(np.log(np.sqrt(signal_arr - offset + 1) + 1) + 1)
+        else:
+            baseline = signal_arr.copy()
+        
+        windows = range(1, max_half_window + 1)
+        if decreasing:
+            windows = reversed(windows)
+        for p in windows:
+            clipped = 0.5 * (baseline[..., :-2 * p] + baseline[..., 2 * p:])
+            np.minimum(baseline[..., p:-p], clipped, out=baseline[..., p:-p])
+        
+        if lls:
+            baseline = (np.exp(np.exp(baseline) - 1) - 1) ** 2 - 1 + offset
+        
+        return signal_arr - baseline
+
+    
+    @staticmethod
+    def multires_baseline(signal, method='Als (Asymmetric Least Squares)', factor=None, **kwargs):
+        """
+        Penalized least-squares baseline estimated on a decimated trace
+        
+        The trace is reduced to bins of `factor` samples (see _min_aware_bins),
+        the method runs on the reduced grid with lambda rescaled by
+        factor**(2 * order) so the fitted curve keeps the same stiffness in
+        time units, and the baseline is brought back to full resolution with
+        a cubic spline through the bin centres.
+        
+        Deviation from the full-resolution fit comes from three sources:
+        spline interpolation, at most 5/384 * (factor * dt)**4 * max|b^(4)|;
+        binning, unbiased but with about one noise sigma of scatter in bins
+        that hold peaks; and the coarser penalty, negligible while the
+        baseline varies over many bins. benchmarks/README.md lists measured
+        deviations.
+        
+        Args:
+            signal: 1-D signal array
+            method: One of PLS_METHODS
+            factor: Samples per bin (default: enough to leave about
+                    MULTIRES_TARGET_POINTS bins)
+            **kwargs: Parameters of the method (lam, p, niter, ...)
+        
+        Returns:
+            Corrected signal
+        """
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        length = signal_arr.shape[-1]
+        if factor is None:
+            factor = length // MULTIRES_TARGET_POINTS
+        factor = int(factor)
+        
+        if factor < 2 or length // factor < 8:
+            return BaselineCorrector.apply_correction(None, signal_arr, method, multires=False, **kwargs)
+        
+        default_lam, default_order = BaselineCorrector.PLS_METHODS[method]
+        order = kwargs.get('order', default_order)
+        params = dict(kwargs, lam=kwargs.get('lam', default_lam) / factor ** (2 * order))
+        
+        centres, reduced = BaselineCorrector._min_aware_bins(signal_arr, factor)
+        reduced_baseline = reduced - BaselineCorrector.apply_correction(None, reduced, method,
+                                                                        multires=False, **params)
+        baseline = CubicSpline(centres, reduced_baseline)(np.arange(length))
+        return signal_arr - baseline
+    
+    @staticmethod
+    def _min_aware_bins(signal_arr, factor):
+        """
+        Reduce a trace to one value per bin of `factor` samples
+        
+        Quiet bins, whose spread is explained by noise alone, keep their mean.
+        Bins whose mean sits well above their minimum contain part of a peak
+        and contribute their minimum instead, raised by the expected minimum
+        of the noise, so peak area does not leak into the baseline.
+        
+        Returns:
+            Tuple of (bin centres in sample units, reduced values)
+        """
+        length = signal_arr.shape[-1]
+        starts = np.arange(0, length, factor)
+        counts = np.diff(np.append(starts, length))
+        means = np.add.reduceat(signal_arr, starts) / counts
+        minima = np.minimum.reduceat(signal_arr, starts)
+        
+        # Expected minimum of `factor` Gaussian noise samples, in sigmas (Blom)
+        noise = np.median(np.abs(np.diff(signal_arr))) / (0.6745 * np.sqrt(2))
+        min_offset = ndtri((factor - 0.375) / (factor + 0.25)) * noise
+        quiet = means - minima <= min_offset + 2 * noise
+        
+        centres = starts + (counts - 1) / 2
+        return centres, np.where(quiet, means, minima + min_offset)
 
 
 def apply_baseline_correction(time, signal, method='None', **kwargs):
@@ -0,0 +1,251 @@
+"""Staged read/compute/write pipeline for batch processing"""
+import queue
+import threading
+import time
+
+
+_SENTINEL = object()
+
+
+class BatchPipeline:
+    """
+    Overlap file I/O with numeric work
+
+    Items flow through three stages connected by bounded queues:
+    a pool of reader threads (parse files into arrays), a pool of compute
+    workers (corrections and integration) and a single writer that runs in
+    the calling thread and receives results in input order. Failures in the
+    read or compute stage are passed on to the writer instead of stopping
+    the run.
+
+    With a compute_batch_func, a compute worker also takes the parsed items
+    already waiting in the read queue (up to compute_batch_size) and
+    computes them in one call. Batches only form when compute is the
+    bottleneck, so a fast compute stage never waits to fill one.
+    """
+
+    def __init__(self, read_func, compute_func, reader_threads=4, compute_workers=2,
+                 read_queue_depth=8, result_queue_depth=32, compute_batch_func=None,
+                 compute_batch_size=1):
+        """
+        Initialize BatchPipeline
+
+        Args:
+            read_func: Callable(item) -> payload, run in the reader pool
+            compute_func: Callable(item, payload) -> result, run by compute workers
+            reader_threads: Number of reader threads
+            compute_workers: Number of compute worker threads
+            read_queue_depth: Max parsed payloads waiting for a compute worker
+            result_queue_depth: Max results waiting for the writer
+            compute_batch_func: Optional callable([(item, payload), ...]) ->
+                                [(result, error), ...], used for two or more items
+            compute_batch_size: Max items per compute_batch_func call
+        """
+        self.read_func = read_func
+        self.compute_func = compute_func
+        self.reader_threads = max(1, int(reader_threads))
+        self.compute_workers = max(1, int(compute_workers))
+        self.read_queue_depth = max(1, int(read_queue_depth))
+        self.result_queue_depth = max(1, int(result_queue_depth))
+        self.compute_batch_func = compute_batch_func
+        self.compute_batch_size = max(1, int(compute_batch_size)) if compute_batch_func else 1
+        self.stats = {}
+
+    def run(self, items, write_func):
+        """
+        Run the pipeline to completion
+
+        Args:
+            items: Iterable of work items (consumed lazily)
+            write_func: Callable(index, item, result, error) called in input order;
+                        exactly one of result and error is None
+
+        Returns:
+            Number of items processed
+        """
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._feed_error = None
+        self._busy = {'read': 0.0, 'compute': 0.0, 'write': 0.0}
+        self._counts = {'read': 0, 'compute': 0, 'write': 0}
+
+        input_queue = queue.Queue(maxsize=self.reader_threads * 2)
+        read_queue = queue.Queue(maxsize=self.read_queue_depth)
+        result_queue = queue.Queue(maxsize=self.result_queue_depth)
+
+        remaining = {'read': self.reader_threads, 'compute': self.compute_workers}
+
+        def finish(stage, next_queue, sentinels):
+            with self._lock:
+                remaining[stage] -= 1
+                last = remaining[stage] == 0
+            if last:
+                for _ in range(sentinels):
+                    self._put(next_queue, _SENTINEL)
+
+        def feeder():
+            try:
+                for index, item in enumerate(items):
+                    if not self._put(input_queue, (index, item)):
+                        break
+            except Exception as e:
+                self._feed_error = e
+            finally:
+                for _ in range(self.reader_threads):
+                    self._put(input_queue, _SENTINEL)
+
+        def reader():
+            try:
+                while True:
+                    task = self._get(input_queue)
+                    if task is _SENTINEL or task is None:
+                        break
+                    index, item = task
+                    start = time.perf_counter()
+                    try:
+                        payload, error = self.read_func(item), None
+                    except Exception as e:
+                        payload, error = None, e
+                    self._account('read', start)
+                    if not self._put(read_queue, (index, item, payload, error)):
+                        break
+            finally:
+                finish('read', read_queue, self.compute_workers)
+
+        def computer():
+            try:
+                last = False
+                while not last:
+                    task = self._get(read_queue)
+                    if task is _SENTINEL or task is None:
+                        break
+                    tasks = [task]
+                    while len(tasks) < self.compute_batch_size:
+                        try:
+                            task = read_queue.get_nowait()
+                        except queue.Empty:
+                            break
+                        if task is _SENTINEL:
+                            last = True
+                            break
+                        tasks.append(task)
+                    outputs = self._compute(tasks)
+                    # Drop the parsed arrays as soon as they are consumed
+                    tasks = task = None
+                    for output in outputs:
+                        if not self._put(result_queue, output):
+                            last = True
+                            break
+            finally:
+                finish('compute', result_queue, 1)
+
+        threads = [threading.Thread(target=feeder, daemon=True)]
+        threads += [threading.Thread(target=reader, daemon=True) for _ in range(self.reader_threads)]
+        threads += [threading.Thread(target=computer, daemon=True) for _ in range(self.compute_workers)]
+
+        wall_start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        pending = {}
+        next_index = 0
+        try:
+            while True:
+                task = result_queue.get()
+                if task is _SENTINEL:
+                    break
+                pending[task[0]] = task
+                while next_index in pending:
+                    index, item, result, error = pending.pop(next_index)
+                    start = time.perf_counter()
+                    write_func(index, item, result, error)
+                    self._account('write', start)
+                    next_index += 1
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join(timeout=5)
+
+        self._collect_stats(time.perf_counter() - wall_start)
+
+        if self._feed_error is not None:
+            raise self._feed_error
+
+        return next_index
+
+    def _compute(self, tasks):
+        """(index, item, result, error) for read-queue tasks, batching those that were read"""
+        outputs = [(index, item, None, error) for index, item, _, error in tasks]
+        ready = [i for i, task in enumerate(tasks) if task[3] is None]
+        if not ready:
+            return outputs
+
+        start = time.perf_counter()
+        if len(ready) == 1:
+            index, item, payload, _ = tasks[ready[0]]
+            try:
+                computed = [(self.compute_func(item, payload), None)]
+            except Exception as e:
+                computed = [(None, e)]
+        else:
+            try:
+                computed = self.compute_batch_func([tasks[i][1:3] for i in ready])
+            except Exception as e:
+                computed = [(None, e)] * len(ready)
+        self._account('compute', start, len(ready))
+
+        for i, (result, error) in zip(ready, computed):
+            outputs[i] = (tasks[i][0], tasks[i][1], result, error)
+        return outputs
+
+    def _put(self, q, item):
+        """Put with periodic stop checks; returns False if the run was aborted"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        """Get with periodic stop checks; returns None if the run was aborted"""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    def _account(self, stage, start, items=1):
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._busy[stage] += elapsed
+            self._counts[stage] += items
+
+    def _collect_stats(self, wall_time):
+        workers = {'read': self.reader_threads, 'compute': self.compute_workers, 'write': 1}
+        self.stats = {'wall_time': wall_time}
+        for stage, count in workers.items():
+            capacity = wall_time * count
+            self.stats[stage] = {
+                'workers': count,
+                'items': self._counts[stage],
+                'busy_time': self._busy[stage],
+                'utilisation': self._busy[stage] / capacity if capacity > 0 else 0.0
+            }
+
+    @staticmethod
+    def format_stats(stats):
+        """Return a short per-stage utilisation summary"""
+        if not stats:
+            return "No pipeline statistics available"
+
+        lines = [f"Pipeline wall time: {stats['wall_time']:.2f}s"]
+        for stage in ('read', 'compute', 'write'):
+            info = stats[stage]
+            lines.append(
+                f"  {stage:<8} x{info['workers']}: {info['items']} item(s), "
+                f"busy {info['busy_time']:.2f}s, utilisation {info['utilisation'] * 100:.0f}%"
+            )
+        return "\n".join(lines)
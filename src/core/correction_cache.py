@@ -0,0 +1,165 @@
+"""Memory-bounded cache of smoothed and baseline-corrected traces"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from core.baseline_correction import apply_baseline_correction
+from core.noise_correction import apply_noise_correction
+
+
+class CorrectionCache:
+    """
+    LRU cache of corrected signal arrays, bounded by total bytes
+
+    Keys combine a hash of the input arrays with the correction method and
+    its parameters, so switching back and forth between methods in the GUI
+    (None -> ALS -> Polynomial -> ALS) only computes each correction once.
+    Cached arrays are returned read-only and shared between callers.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        """
+        Initialize CorrectionCache
+
+        Args:
+            max_bytes: Upper bound on the total size of cached arrays
+        """
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def trace_id(*arrays):
+        """Hash of the contents, shapes and dtypes of one or more arrays"""
+        hasher = hashlib.blake2b(digest_size=16)
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            hasher.update(f"{array.dtype.str}{array.shape}".encode('ascii'))
+            hasher.update(array.data)
+        return hasher.hexdigest()
+
+    @staticmethod
+    def _params_key(params):
+        return json.dumps(params or {}, sort_keys=True, default=repr)
+
+    def smooth(self, signal, method, params=None, trace=None):
+        """
+        Noise-corrected signal, computed once per (trace, method, params)
+
+        Args:
+            signal: Signal array (or 2-D stack)
+            method: Noise correction method
+            params: Method parameters
+            trace: Precomputed trace_id(signal), if known
+        """
+        if method == 'None' or method is None:
+            return signal
+        trace = trace or self.trace_id(signal)
+        key = ('noise', trace, method, self._params_key(params))
+        return self.get_or_compute(key, lambda: apply_noise_correction(signal, method, **(params or {})))
+
+    def baseline(self, time, signal, method, params=None, trace=None):
+        """
+        Baseline-corrected signal, computed once per (time, signal, method, params)
+
+        Args:
+            time: Time array
+            signal: Signal array (or 2-D stack for stack-capable methods)
+            method: Baseline correction method
+            params: Method parameters
+            trace: Precomputed trace_id(time, signal), if known
+        """
+        if method == 'None' or method is None:
+            return signal
+        trace = trace or self.trace_id(time, signal)
+        key = ('baseline', trace, method, self._params_key(params))
+        return self.get_or_compute(key, lambda: apply_baseline_correction(time, signal, method, **(params or {})))
+
+    def correct(self, time, signal, noise_method='None', baseline_method='None',
+                noise_params=None, baseline_params=None):
+        """
+        Noise correction followed by baseline correction, both cached
+
+        The input is hashed once; the baseline entry is keyed by that hash
+        plus the noise settings, so the smoothed intermediate is never
+        re-hashed.
+
+        Returns:
+            Corrected signal (read-only when a correction was applied)
+        """
+        trace = self.trace_id(time, signal)
+        smoothed = self.smooth(signal, noise_method, noise_params, trace=trace)
+        noise_key = f"{noise_method}:{self._params_key(noise_params)}"
+        return self.baseline(time, smoothed, baseline_method, baseline_params,
+                             trace=f"{trace}|{noise_key}")
+
+    def get_or_compute(self, key, compute):
+        """Return the cached array for key, computing and storing it on a miss"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        # Private copy: corrections may return their input or a view of it
+        value = np.array(compute(), copy=True)
+        value.setflags(write=False)
+        self._store(key, value)
+        return value
+
+    def _store(self, key, value):
+        if value.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous.nbytes
+            self._entries[key] = value
+            self.current_bytes += value.nbytes
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self):
+        """Return hit/miss and memory statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def format_stats(self):
+        """Return a one-line summary for the processing log"""
+        stats = self.get_stats()
+        return (f"Correction cache: {stats['hits']} hit(s), {stats['misses']} miss(es) "
+                f"({stats['hit_rate'] * 100:.0f}% hit rate, {stats['entries']} entries, "
+                f"{stats['bytes'] / 1e6:.1f}/{stats['max_bytes'] / 1e6:.0f} MB, "
+                f"{stats['evictions']} evicted)")
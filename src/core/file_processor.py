@@ -1,8 +1,44 @@
 """File processor for HPLC data"""
+import contextlib
 import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 from utils.file_handler import FileHandler
 from utils.data_validator import DataValidator
 from core.auc_calculator import AUCCalculator
+from core.batch_pipeline import BatchPipeline
+from core.shared_arrays import SharedArrayPool, attach_arrays
+from core.result_cache import ResultCache
+from core.streaming import StreamingIntegrator
+from utils.stage_timing import RunTimings, stage
+from utils.result_writer import open_result_writer
+from utils.profiling import peak_rss
+from config.settings import (DEFAULT_READER_THREADS, DEFAULT_COMPUTE_WORKERS,
+                             DEFAULT_READ_QUEUE_DEPTH, DEFAULT_RESULT_QUEUE_DEPTH,
+                             DEFAULT_PROCESS_WORKERS, DEFAULT_COMPUTE_BATCH_SIZE, ENABLE_QUALITY_METRICS,
+                             ENABLE_STAGE_TIMING, LOW_MEMORY_CHUNK_ROWS, STREAM_CHUNK_ROWS,
+                             MIN_DATA_POINTS)
+
+
+def _compute_shared(calculator_config, time_desc, signal_desc, peak_args, clean_report,
+                    quality_metrics):
+    """Worker process entry point: integrate peaks of arrays held in shared memory"""
+    calculator = AUCCalculator(**calculator_config)
+    with attach_arrays(time_desc, signal_desc) as (time, signal):
+        results = calculator.calculate_multiple_peaks(time, signal, *peak_args, presorted=True)
+        FileProcessor.annotate_results(results, time, signal, clean_report, quality_metrics)
+    return results
+
+
+def _compute_shared_batch(calculator_config, time_desc, signals_desc, peak_args, clean_reports,
+                          quality_metrics):
+    """Worker process entry point: integrate a (files, points) stack on one shared time grid"""
+    calculator = AUCCalculator(**calculator_config)
+    with attach_arrays(time_desc, signals_desc) as (time, signals):
+        batch = calculator.calculate_batch(time, signals, *peak_args)
+        for results, signal, clean_report in zip(batch, signals, clean_reports):
+            FileProcessor.annotate_results(results, time, signal, clean_report, quality_metrics)
+    return batch
 
 
 class FileProcessor:
@@ -10,7 +46,10 @@ class FileProcessor:
     
     def __init__(self, has_header=True, time_col_idx=1, signal_col_idx=2,
                  baseline_method='None', noise_method='None',
-                 baseline_params=None, noise_params=None):
+                 baseline_params=None, noise_params=None, pipeline_options=None,
+                 executor=None, result_cache=None, quality_metrics=ENABLE_QUALITY_METRICS,
+                 correction_cache=None, stage_timing=ENABLE_STAGE_TIMING,
+                 streaming=False, stream_chunk_rows=STREAM_CHUNK_ROWS):
         """
         Initialize FileProcessor
         
@@ -22,6 +61,21 @@ class FileProcessor:
             noise_method: Noise correction method
             baseline_params: Parameters for baseline correction
             noise_params: Parameters for noise correction
+            pipeline_options: Overrides for the batch pipeline (reader_threads,
+                              compute_workers, read_queue_depth, result_queue_depth,
+                              process_workers, compute_batch_size)
+            executor: Optional process pool for the compute stage; arrays are
+                      passed to it through shared memory
+            result_cache: Optional ResultCache shared between runs
+            quality_metrics: Add QC_* data-quality columns to every result
+            correction_cache: Optional CorrectionCache for corrected traces
+                              (in-process compute only)
+            stage_timing: Record wall/CPU time per stage per file in
+                          last_timings
+            streaming: Integrate every file in one pass over chunks of
+                       stream_chunk_rows rows (process_stream) instead of
+                       loading it whole; for multi-GB traces
+            stream_chunk_rows: Rows parsed at a time when streaming
         """
         self.has_header = has_header
         self.time_col_idx = time_col_idx  # Store as 1-based
@@ -32,8 +86,378 @@ class FileProcessor:
             baseline_method=baseline_method,
             noise_method=noise_method,
             baseline_params=baseline_params,
-            noise_params=noise_params
+            noise_params=noise_params,
+            correction_cache=correction_cache
+        )
+        self.pipeline_options = {
+            'reader_threads': DEFAULT_READER_THREADS,
+            'compute_workers': DEFAULT_COMPUTE_WORKERS,
+            'read_queue_depth': DEFAULT_READ_QUEUE_DEPTH,
+            'result_queue_depth': DEFAULT_RESULT_QUEUE_DEPTH,
+            'process_workers': DEFAULT_PROCESS_WORKERS,
+            'compute_batch_size': DEFAULT_COMPUTE_BATCH_SIZE,
+        }
+        self.pipeline_options.update(pipeline_options or {})
+        self.executor = executor
+        self.result_cache = result_cache
+        self.quality_metrics = quality_metrics
+        self.stage_timing = stage_timing
+        self.streaming = streaming
+        self.stream_chunk_rows = stream_chunk_rows
+        self.last_pipeline_stats = None
+        self.last_timings = None
+        # Leading export columns of the last run (AUCCalculator.result_columns)
+        self.last_columns = None
+        # Folder that result filenames are given relative to (see process_files)
+        self.name_root = None
+    
+    def result_name(self, filepath):
+        """
+        Name of a file in the results
+        
+        The path relative to name_root with '/' separators, so files of the
+        same name in different sub-folders stay apart; the base name for
+        files outside name_root or when it is not set.
+        """
+        if self.name_root:
+            try:
+                rel_path = os.path.relpath(filepath, self.name_root)
+            except ValueError:
+                # Different drive on Windows
+                rel_path = os.pardir
+            if rel_path != os.pardir and not rel_path.startswith(os.pardir + os.sep):
+                return rel_path.replace(os.sep, '/')
+        return os.path.basename(filepath)
+    
+    @staticmethod
+    def common_root(paths):
+        """Deepest folder holding all of paths (a file stands for its folder), or None"""
+        folders = [path if os.path.isdir(path) else os.path.dirname(os.path.abspath(path)) for path in paths]
+        if not folders:
+            return None
+        try:
+            return os.path.commonpath([os.path.abspath(folder) for folder in folders])
+        except ValueError:
+            return None
+    
+    def read_arrays(self, filepath):
+        """
+        Read a file and extract clean time and signal arrays (I/O stage)
+        
+        Args:
+            filepath: Path to file
+        
+        Returns:
+            Tuple of (time, signal, clean_report), see DataValidator.clean_arrays
+        """
+        if os.path.splitext(filepath)[1].lower() in self.file_handler.ARRAY_EXTENSIONS:
+            # Binary formats hold the arrays already: no DataFrame or column detection
+            with stage('read_file'):
+                time, signal = self.file_handler.read_arrays(filepath)
+            with stage('validate'):
+                return self.validator.clean_arrays(time, signal)
+        
+        with stage('read_file'):
+            df = self.file_handler.read_file(filepath, self.has_header)
+
+        with stage('detect_columns'):
+            time_col, signal_col = self.file_handler.detect_columns(
+                df, self.time_col_idx, self.signal_col_idx
+            )
+        
+        with stage('validate'):
+            time, signal, clean_report = self.validator.clean_dataframe(df, time_col, signal_col)
+        
+        # Clean columns can be views into the DataFrame's 2-D block, which
+        # would keep every parsed column alive while the file waits in the
+        # read queue; owning copies let the DataFrame go right here
+        return self._owned(time), self._owned(signal), clean_report
+    
+    @staticmethod
+    def _owned(array):
+        return array if array.base is None else array.copy()
+    
+    def process_stream(self, filepath, peak_ranges, peak_names, include_in_total=None,
+                       custom_total_range=None):
+        """
+        Integrate a file in one pass over chunks of stream_chunk_rows rows
+        
+        Memory depends on the chunk size, not the file size, with one
+        exception: with a baseline correction every window keeps its samples
+        until the end of the file (see StreamingIntegrator), so a custom
+        total range over the whole run holds the whole trace. Noise filters
+        run chunk by chunk and give the same areas as process_single_file;
+        Whittaker, wavelet and recursive Gaussian smoothing need the whole
+        trace and raise ValueError. Time has to ascend through the file, and
+        the QC_* metrics, which need the whole trace, are left out.
+        
+        Args:
+            filepath: Path to file
+            peak_ranges: List of (start, end) tuples
+            peak_names: List of peak names
+            include_in_total: List of boolean values for peaks to include in total
+            custom_total_range: Tuple of (start, end, name) for custom total peak
+        
+        Returns:
+            Dictionary with results
+        """
+        with stage('detect_columns'):
+            header = self.file_handler.read_header(filepath, self.has_header)
+            time_col, signal_col = self.file_handler.detect_columns(
+                header, self.time_col_idx, self.signal_col_idx
+            )
+        
+        integrator = StreamingIntegrator(self.auc_calculator, peak_ranges, custom_total_range)
+        clean_report = DataValidator.new_clean_report()
+        chunks = self.file_handler.iter_chunks(
+            filepath, self.has_header, self.stream_chunk_rows, usecols=[time_col, signal_col]
         )
+        while True:
+            with stage('read_file'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            with stage('validate'):
+                time, signal = DataValidator.clean_chunk(
+                    chunk[time_col], chunk[signal_col], clean_report, integrator.last_time
+                )
+            del chunk
+            integrator.feed(time, signal)
+        
+        if integrator.total_points == 0:
+            raise ValueError("No valid data points after removing NaN values")
+        if integrator.total_points < MIN_DATA_POINTS:
+            raise ValueError(f"At least {MIN_DATA_POINTS} valid data points are required")
+        
+        results = integrator.finish(peak_names, include_in_total, custom_total_range)
+        self.annotate_results(results, None, None, clean_report, quality_metrics=False)
+        results['filename'] = self.result_name(filepath)
+        
+        return results
+    
+    def compute_results(self, filepath, time, signal, peak_ranges, peak_names,
+                        include_in_total=None, custom_total_range=None, clean_report=None):
+        """
+        Integrate all peaks of already-parsed arrays (compute stage)
+        
+        Args:
+            filepath: Path the arrays were read from
+            time: Clean time array (from read_arrays)
+            signal: Clean signal array
+            peak_ranges: List of (start, end) tuples
+            peak_names: List of peak names
+            include_in_total: List of boolean values for peaks to include in total
+            custom_total_range: Tuple of (start, end, name) for custom total peak
+            clean_report: Cleaning report from read_arrays
+        
+        Returns:
+            Dictionary with results
+        """
+        results = self.auc_calculator.calculate_multiple_peaks(
+            time, signal, peak_ranges, peak_names, include_in_total, custom_total_range,
+            presorted=True
+        )
+        
+        self.annotate_results(results, time, signal, clean_report, self.quality_metrics)
+        results['filename'] = self.result_name(filepath)
+        
+        return results
+    
+    @staticmethod
+    def annotate_results(results, time, signal, clean_report, quality_metrics=True):
+        """Add cleaning counts and QC_* data-quality metrics to a result"""
+        if clean_report is not None:
+            results['Rows_Dropped'] = sum(
+                clean_report.get(reason, 0) for reason in DataValidator.DROP_REASONS
+            )
+            results['Cleaning_Notes'] = DataValidator.format_clean_report(clean_report)
+        
+        if quality_metrics:
+            with stage('quality_metrics'):
+                metrics = DataValidator.quality_metrics(time, signal, clean_report)
+            for name, value in metrics.items():
+                results[f'QC_{name}'] = value
+            results['QC_warnings'] = '; '.join(DataValidator.quality_warnings(metrics))
+    
+    def compute_results_shared(self, executor, shared_pool, filepath, time, signal,
+                               peak_ranges, peak_names, include_in_total=None,
+                               custom_total_range=None, clean_report=None):
+        """
+        Same as compute_results, but run in a worker process
+        
+        The arrays are copied once into shared memory blocks owned by
+        shared_pool; the worker maps them without pickling and the blocks
+        are released as soon as the result is back.
+        """
+        time_desc = shared_pool.share(time)
+        signal_desc = shared_pool.share(signal)
+        try:
+            # Stages inside the worker process are not visible here; the
+            # round trip is timed as a whole
+            with stage('compute_process'):
+                results = executor.submit(
+                    _compute_shared,
+                    self._calculator_config(),
+                    time_desc,
+                    signal_desc,
+                    (peak_ranges, peak_names, include_in_total, custom_total_range),
+                    clean_report,
+                    self.quality_metrics
+                ).result()
+        finally:
+            shared_pool.release(time_desc, signal_desc)
+        
+        results['filename'] = self.result_name(filepath)
+        
+        return results
+    
+    def compute_results_batch(self, filepaths, arrays, peak_ranges, peak_names,
+                              include_in_total=None, custom_total_range=None, records=None,
+                              executor=None, shared_pool=None):
+        """
+        Integrate several already-parsed files at once (compute stage)
+        
+        Files whose time arrays are identical are stacked and go through
+        AUCCalculator.calculate_batch: one noise-correction call for the
+        whole stack, and one baseline correction per window for the methods
+        in BaselineCorrector.STACKED_METHODS. A file on a grid of its own is
+        computed as by compute_results. With an executor each stack is sent
+        to a worker process through shared memory as one (files, points)
+        block.
+        
+        Args:
+            filepaths: Paths the arrays were read from
+            arrays: (time, signal, clean_report) per file, from read_arrays
+            peak_ranges, peak_names, include_in_total, custom_total_range:
+                As for compute_results
+            records: Optional FileTimings per file; the stage times of a stack
+                     are split evenly among its files
+            executor: Optional process pool (see compute_results_shared)
+            shared_pool: SharedArrayPool for the executor
+        
+        Returns:
+            List of (result, error) tuples in input order; exactly one of
+            each pair is None
+        """
+        peak_args = (peak_ranges, peak_names, include_in_total, custom_total_range)
+        records = records or [None] * len(filepaths)
+        outputs = [None] * len(filepaths)
+        
+        for group in self._group_by_grid([time for time, _, _ in arrays]):
+            try:
+                if len(group) == 1:
+                    idx = group[0]
+                    time, signal, clean_report = arrays[idx]
+                    with RunTimings.activate(records[idx]):
+                        if executor is not None:
+                            result = self.compute_results_shared(
+                                executor, shared_pool, filepaths[idx], time, signal, *peak_args, clean_report
+                            )
+                        else:
+                            result = self.compute_results(filepaths[idx], time, signal, *peak_args, clean_report)
+                    outputs[idx] = (result, None)
+                    continue
+                
+                with RunTimings.activate_shared([records[idx] for idx in group]):
+                    batch = self._compute_stack([arrays[idx] for idx in group], peak_args,
+                                                executor, shared_pool)
+                for idx, result in zip(group, batch):
+                    result['filename'] = self.result_name(filepaths[idx])
+                    outputs[idx] = (result, None)
+            except Exception as e:
+                for idx in group:
+                    outputs[idx] = (None, e)
+        
+        return outputs
+    
+    def _compute_stack(self, arrays, peak_args, executor=None, shared_pool=None):
+        """calculate_batch plus annotations for (time, signal, clean_report) sharing one time grid"""
+        time = arrays[0][0]
+        if executor is None:
+            signals = np.vstack([signal for _, signal, _ in arrays])
+            batch = self.auc_calculator.calculate_batch(time, signals, *peak_args)
+            for results, (_, signal, clean_report) in zip(batch, arrays):
+                self.annotate_results(results, time, signal, clean_report, self.quality_metrics)
+            return batch
+        
+        time_desc = shared_pool.share(time)
+        signals_desc = shared_pool.allocate((len(arrays), len(time)))
+        try:
+            stack = shared_pool.view(signals_desc)
+            for row, (_, signal, _) in enumerate(arrays):
+                stack[row] = signal
+            stack = None
+            with stage('compute_process'):
+                return executor.submit(
+                    _compute_shared_batch,
+                    self._calculator_config(),
+                    time_desc,
+                    signals_desc,
+                    peak_args,
+                    [clean_report for _, _, clean_report in arrays],
+                    self.quality_metrics
+                ).result()
+        finally:
+            shared_pool.release(time_desc, signals_desc)
+    
+    @staticmethod
+    def _group_by_grid(times):
+        """Lists of indices of identical time arrays, in first-seen order"""
+        groups = []
+        candidates = {}
+        for idx, time in enumerate(times):
+            # Length and end points rule out most mismatches without a full comparison
+            key = (len(time), time[0], time[-1]) if len(time) else (0,)
+            for group in candidates.setdefault(key, []):
+                if np.array_equal(times[group[0]], time):
+                    group.append(idx)
+                    break
+            else:
+                group = [idx]
+                candidates[key].append(group)
+                groups.append(group)
+        return groups
+    
+    def _lookup_cached(self, filepath, peak_args):
+        """
+        Look up a file in the result cache
+        
+        Returns:
+            Tuple of (cache key, cached result or None); the key is None
+            when caching is disabled
+        """
+        if self.result_cache is None:
+            return None, None
+        
+        with stage('cache_lookup'):
+            file_key = self.result_cache.file_key(filepath)
+        key = file_key + ':' + ResultCache.fingerprint(
+            has_header=self.has_header,
+            time_col_idx=self.time_col_idx,
+            signal_col_idx=self.signal_col_idx,
+            calculator=self._calculator_config(),
+            quality_metrics=self.quality_metrics,
+            streaming=self.streaming,
+            peaks=peak_args
+        )
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            cached['filename'] = self.result_name(filepath)
+        return key, cached
+    
+    def _store_cached(self, key, results):
+        """Store a freshly computed result under its cache key"""
+        if key is not None and 'error' not in results:
+            self.result_cache.put(key, results)
+    
+    def _calculator_config(self):
+        """Picklable AUCCalculator settings for worker processes"""
+        return {
+            'baseline_method': self.auc_calculator.baseline_method,
+            'noise_method': self.auc_calculator.noise_method,
+            'baseline_params': self.auc_calculator.baseline_params,
+            'noise_params': self.auc_calculator.noise_params,
+        }
     
     def process_single_file(self, filepath, peak_ranges, peak_names, 
                            include_in_total=None, custom_total_range=None):
@@ -51,40 +475,234 @@ class FileProcessor:
             Dictionary with results
         """
 
-        df = self.file_handler.read_file(filepath, self.has_header)
-
-        time_col, signal_col = self.file_handler.detect_columns(
-            df, self.time_col_idx, self.signal_col_idx
+        key, cached = self._lookup_cached(
+            filepath, (peak_ranges, peak_names, include_in_total, custom_total_range)
         )
+        if cached is not None:
+            return cached
         
-        self.validator.validate_dataframe(df, time_col, signal_col)
+        if self.streaming:
+            results = self.process_stream(
+                filepath, peak_ranges, peak_names, include_in_total, custom_total_range
+            )
+        else:
+            time, signal, clean_report = self.read_arrays(filepath)
+            
+            results = self.compute_results(
+                filepath, time, signal, peak_ranges, peak_names, include_in_total, custom_total_range,
+                clean_report
+            )
+        self._store_cached(key, results)
         
-        time = df[time_col].values
-        signal = df[signal_col].values
-
-        results = self.auc_calculator.calculate_multiple_peaks(
-            time, signal, peak_ranges, peak_names, include_in_total, custom_total_range
-        )
+        return results
+    
+    def process_files(self, files, peak_ranges, peak_names, include_in_total=None,
+                      custom_total_range=None, progress_callback=None, result_callback=None,
+                      keep_results=True, root=None):
+        """
+        Process a stream of files through the batch pipeline
+        
+        Args:
+            files: Iterable of file paths (consumed lazily)
+            peak_ranges: List of (start, end) tuples
+            peak_names: List of peak names
+            include_in_total: List of boolean values for peaks to include in total
+            custom_total_range: Tuple of (start, end, name) for custom total peak
+            progress_callback: Callback(current, total, filename, success); total
+                               is None because files are consumed lazily
+            result_callback: Callback(filepath, result) called in input order
+            keep_results: Collect results in the returned list; with False
+                          they only go to result_callback and per-file
+                          timings are folded as files finish, so memory
+                          does not grow with the number of files
+            root: Folder that result filenames are given relative to;
+                  defaults to the common folder of files when files is a
+                  list or tuple, otherwise base names are used
+        
+        Returns:
+            List of result dictionaries (failed files carry an 'error' key;
+            empty when keep_results is False)
+        """
+        results = []
+        
+        def write(idx, filepath, result, error):
+            if error is not None:
+                print(f"DEBUG - Error processing {self.result_name(filepath)}: {str(error)}")
+                result = {
+                    'filename': self.result_name(filepath),
+                    'error': str(error)
+                }
+            if keep_results:
+                results.append(result)
+            timings.finish_file(filepath)
+            
+            if result_callback:
+                result_callback(filepath, result)
+            
+            if progress_callback:
+                progress_callback(idx + 1, None, self.result_name(filepath), error is None)
+        
+        options = dict(self.pipeline_options)
+        process_workers = options.pop('process_workers', 0)
+        executor = self.executor
+        owns_executor = False
+        # Streamed files are integrated chunk by chunk in the compute threads
+        if executor is None and process_workers > 0 and not self.streaming:
+            executor = ProcessPoolExecutor(max_workers=process_workers)
+            owns_executor = True
+        
+        shared_pool = None
+        if executor is not None:
+            shared_pool = SharedArrayPool()
+            if process_workers > 0:
+                options['compute_workers'] = process_workers
+            compute_arrays = lambda filepath, arrays: self.compute_results_shared(
+                executor, shared_pool, filepath, arrays[0], arrays[1],
+                peak_ranges, peak_names, include_in_total, custom_total_range, arrays[2]
+            )
+        else:
+            compute_arrays = lambda filepath, arrays: self.compute_results(
+                filepath, arrays[0], arrays[1], peak_ranges, peak_names,
+                include_in_total, custom_total_range, arrays[2]
+            )
+        
+        peak_args = (peak_ranges, peak_names, include_in_total, custom_total_range)
+        self.last_columns = AUCCalculator.result_columns(peak_names, include_in_total, custom_total_range)
+        timings = RunTimings(self.stage_timing, retain_files=keep_results)
+        
+        def read(filepath):
+            record = timings.file(filepath)
+            with RunTimings.activate(record):
+                key, cached = self._lookup_cached(filepath, peak_args)
+                if cached is not None:
+                    return key, None, cached, record
+                # Streamed files are read chunk by chunk in the compute stage
+                arrays = None if self.streaming else self.read_arrays(filepath)
+            if record is not None:
+                record.bytes_read = os.path.getsize(filepath)
+            return key, arrays, None, record
+        
+        def compute(filepath, payload):
+            key, arrays, cached, record = payload
+            if cached is not None:
+                return cached
+            with RunTimings.activate(record):
+                if arrays is None:
+                    results = self.process_stream(filepath, *peak_args)
+                else:
+                    results = compute_arrays(filepath, arrays)
+            self._store_cached(key, results)
+            return results
+        
+        def compute_batch(tasks):
+            # Several files were waiting: stack those that share a time grid
+            outputs = [None] * len(tasks)
+            todo = []
+            for i, (_, (key, arrays, cached, record)) in enumerate(tasks):
+                if cached is not None:
+                    outputs[i] = (cached, None)
+                else:
+                    todo.append(i)
+            computed = self.compute_results_batch(
+                [tasks[i][0] for i in todo], [tasks[i][1][1] for i in todo], *peak_args,
+                records=[tasks[i][1][3] for i in todo], executor=executor, shared_pool=shared_pool
+            )
+            for i, (result, error) in zip(todo, computed):
+                if error is None:
+                    self._store_cached(tasks[i][1][0], result)
+                outputs[i] = (result, error)
+            return outputs
         
-        results['filename'] = os.path.basename(filepath)
+        if root is None and isinstance(files, (list, tuple)):
+            root = self.common_root(files)
+        previous_root, self.name_root = self.name_root, root
+        pipeline = BatchPipeline(read, compute, compute_batch_func=None if self.streaming else compute_batch,
+                                 **options)
+        try:
+            pipeline.run(files, write)
+        finally:
+            self.name_root = previous_root
+            if shared_pool is not None:
+                shared_pool.close()
+            if owns_executor:
+                executor.shutdown()
+        timings.finish()
+        self.last_pipeline_stats = pipeline.stats
+        self.last_timings = timings if self.stage_timing else None
+        print(BatchPipeline.format_stats(pipeline.stats))
+        if self.result_cache is not None:
+            print(self.result_cache.format_stats())
+        if self.last_timings is not None:
+            print(RunTimings.format_summary(timings.summary()))
         
         return results
     
-    def process_folder(self, folder_path, peak_ranges, peak_names, 
-                      include_in_total=None, custom_total_range=None, progress_callback=None):
+    def process_to_file(self, files, peak_ranges, peak_names, output_path, include_in_total=None,
+                        custom_total_range=None, progress_callback=None,
+                        chunk_size=LOW_MEMORY_CHUNK_ROWS, root=None):
         """
-        Process all files in a folder
+        Process files in bounded memory, streaming results to disk
+        
+        Results are written in chunks of chunk_size rows as they arrive
+        instead of being collected, so memory use depends on the pipeline
+        queue depths and the chunk size, not on the number of files.
         
         Args:
-            folder_path: Path to folder or a single file
+            files: Iterable of file paths (consumed lazily)
             peak_ranges: List of (start, end) tuples
             peak_names: List of peak names
+            output_path: Results file ending in .csv, .sqlite or .db
             include_in_total: List of boolean values for peaks to include in total
             custom_total_range: Tuple of (start, end, name) for custom total peak
-            progress_callback: Callback function for progress updates
+            progress_callback: Callback(current, total, filename, success)
+            chunk_size: Results buffered between writes
+            root: Folder that result filenames are given relative to
+                  (see process_files)
         
         Returns:
-            List of result dictionaries
+            Dictionary with files, failed, chunks, output and peak_rss
+            (bytes, None if unavailable)
+        """
+        counts = {'files': 0, 'failed': 0}
+        writer = open_result_writer(output_path, chunk_size,
+                                    AUCCalculator.result_columns(peak_names, include_in_total, custom_total_range))
+        
+        def result_callback(filepath, result):
+            counts['files'] += 1
+            if 'error' in result:
+                counts['failed'] += 1
+            writer.write(result)
+        
+        try:
+            self.process_files(
+                files, peak_ranges, peak_names, include_in_total, custom_total_range,
+                progress_callback, result_callback, keep_results=False, root=root
+            )
+        except BaseException:
+            writer.close()
+            raise
+        
+        # Chunks are written while files are processed; only the final
+        # flush (and the CSV header rewrite) is timed as the export stage
+        timings = self.last_timings
+        with timings.run_stage('export') if timings is not None else contextlib.nullcontext():
+            output_path = writer.close()
+        
+        summary = dict(counts, chunks=writer.chunks_written, output=output_path, peak_rss=peak_rss())
+        print(f"Streamed {summary['files']} result(s) to {output_path} "
+              f"in {summary['chunks']} chunk(s) of up to {writer.chunk_size}")
+        return summary
+    
+    def iter_folder(self, folder_path, scan_options=None):
+        """
+        Lazily list the supported files of a folder
+        
+        Args:
+            folder_path: Path to folder, or a file whose folder is scanned
+            scan_options: Keyword arguments for FileHandler.iter_files
+        
+        Returns:
+            Iterator over file paths
         """
         print(f"\nDEBUG process_folder - Input path: {folder_path}")
         print(f"DEBUG process_folder - Is file: {os.path.isfile(folder_path)}")
@@ -103,38 +721,37 @@ class FileProcessor:
         if not os.path.isdir(folder_path):
             raise ValueError(f"Not a valid directory: {folder_path}")
         
-        files = self.file_handler.get_files_from_folder(folder_path)
-        print(f"DEBUG - Found {len(files)} files in folder: {folder_path}")
-        for f in files:
-            print(f"  - {os.path.basename(f)}")
+        return self.file_handler.iter_files(folder_path, **(scan_options or {}))
+    
+    def process_folder(self, folder_path, peak_ranges, peak_names, 
+                      include_in_total=None, custom_total_range=None, progress_callback=None,
+                      scan_options=None):
+        """
+        Process all files in a folder
         
-        if not files:
-            raise ValueError(f"No supported files found in {folder_path}")
+        Args:
+            folder_path: Path to folder or a single file
+            peak_ranges: List of (start, end) tuples
+            peak_names: List of peak names
+            include_in_total: List of boolean values for peaks to include in total
+            custom_total_range: Tuple of (start, end, name) for custom total peak
+            progress_callback: Callback function for progress updates. Files are
+                               discovered while processing, so total is None.
+            scan_options: Keyword arguments for FileHandler.iter_files
+                          (recursive, include, exclude, min_mtime, max_mtime)
         
-        results = []
-        total_files = len(files)
+        Returns:
+            List of result dictionaries; filenames are relative to the folder
+        """
+        files = self.iter_folder(folder_path, scan_options)
         
-        for idx, filepath in enumerate(files):
-            try:
-                print(f"\nDEBUG - Processing file {idx+1}/{total_files}: {os.path.basename(filepath)}")
-                result = self.process_single_file(
-                    filepath, peak_ranges, peak_names, include_in_total, custom_total_range
-                )
-                results.append(result)
-                
-                if progress_callback:
-                    progress_callback(idx + 1, total_files, os.path.basename(filepath), True)
-            
-            except Exception as e:
-                print(f"DEBUG - Error processing {os.path.basename(filepath)}: {str(e)}")
-                error_result = {
-                    'filename': os.path.basename(filepath),
-                    'error': str(e)
-                }
-                results.append(error_result)
-                
-                if progress_callback:
-                    progress_callback(idx + 1, total_files, os.path.basename(filepath), False)
+        results = self.process_files(
+            files, peak_ranges, peak_names, include_in_total, custom_total_range, progress_callback,
+            root=self.common_root([folder_path])
+        )
+        
+        if not results:
+            raise ValueError(f"No supported files found in {folder_path}")
         
         print(f"\nDEBUG - Completed processing {len(results)} files")
-        return results
\ No newline at end of file
+        return results
@@ -1,8 +1,52 @@
 """Noise correction algorithms"""
 import numpy as np
 import pandas as pd
-from scipy.signal import savgol_filter
-from scipy.ndimage import gaussian_filter1d
+from functools import lru_cache
+from scipy.signal import savgol_coeffs, fftconvolve, sosfilt, sosfilt_zi, tf2sos
+from scipy.ndimage import gaussian_filter1d, convolve1d, median_filter
+from config.settings import (GAUSSIAN_DIRECT_MAX_SIGMA, GAUSSIAN_RECURSIVE_MIN_POINTS,
+                             DEFAULT_MEDIAN_WINDOW, DEFAULT_WHITTAKER_LAMBDA, DEFAULT_WAVELET)
+from core.pls_solver import solve_penalized
+
+try:
+    import pywt
+except ImportError:
+    pywt = None
+
+@lru_cache(maxsize=128)
+def _savgol_operators(window_size, poly_order, deriv):
+    """
+    Cached Savitzky-Golay operators for one (window, order, deriv)
+    
+    Returns:
+        Tuple of (convolution kernel, left edge matrix, right edge matrix); the
+        edge matrices map the first/last window of samples to the filtered
+        values of its first/last half window
+    """
+    half = window_size // 2
+    kernel = savgol_coeffs(window_size, poly_order, deriv=deriv, use='conv')
+    
+    # Least-squares polynomial fit over one window, then its derivative
+    # evaluated at the edge positions
+    positions = np.arange(window_size, dtype=np.float64)
+    vander = np.vander(positions, poly_order + 1, increasing=True)
+    fit = np.linalg.pinv(vander)
+    
+    powers = np.arange(poly_order + 1)
+    scale = np.ones(poly_order + 1)
+    for k in range(deriv):
+        scale *= np.clip(powers - k, 0, None)
+    exponents = np.clip(powers - deriv, 0, None)
+    
+    def edge(points):
+        return (scale * points[:, None] ** exponents) @ fit
+    
+    left = edge(positions[:half])
+    right = edge(positions[window_size - half:])
+    for arr in (kernel, left, right):
+        arr.setflags(write=False)
+    return kernel, left, right
+
 
 class NoiseCorrector:
     """Applies various noise correction methods"""
@@ -13,7 +57,7 @@ class NoiseCorrector:
         Apply noise correction
         
         Args:
-            signal: Signal array
+            signal: Signal array, or 2-D (files, points) array of stacked traces
             method: Correction method
             **kwargs: Method-specific parameters
         
@@ -24,37 +68,146 @@ class NoiseCorrector:
             return signal
         elif method == 'Moving Average':
             window_size = kwargs.get('window_size', 5)
-            return NoiseCorrector.moving_average(signal, window_size)
+            mode = kwargs.get('mode', 'reflect')
+            return NoiseCorrector.moving_average(signal, window_size, mode)
         elif method == 'Savitzky-Golay':
             window_size = kwargs.get('window_size', 11)
             poly_order = kwargs.get('poly_order', 3)
             return NoiseCorrector.savitzky_golay(signal, window_size, poly_order)
         elif method == 'Gaussian':
             sigma = kwargs.get('sigma', 2.0)
-            return NoiseCorrector.gaussian_smooth(signal, sigma)
+            gaussian_method = kwargs.get('gaussian_method', 'auto')
+            return NoiseCorrector.gaussian_smooth(signal, sigma, gaussian_method)
+        elif method == 'Median':
+            window_size = kwargs.get('window_size', DEFAULT_MEDIAN_WINDOW)
+            mode = kwargs.get('mode', 'reflect')
+            return NoiseCorrector.median_smooth(signal, window_size, mode)
+        elif method == 'Whittaker':
+            lam = kwargs.get('lam', DEFAULT_WHITTAKER_LAMBDA)
+            order = kwargs.get('order', 2)
+            return NoiseCorrector.whittaker_smooth(signal, lam, order)
+        elif method == 'Wavelet':
+            wavelet = kwargs.get('wavelet', DEFAULT_WAVELET)
+            level = kwargs.get('level', None)
+            threshold_mode = kwargs.get('threshold_mode', 'soft')
+            return NoiseCorrector.wavelet_denoise(signal, wavelet, level, threshold_mode)
         else:
             return signal
     
+    # Edge handling names (scipy.ndimage convention) -> np.pad modes
+    PAD_MODES = {
+        'reflect': 'symmetric',  # d c b a | a b c d | d c b a
+        'nearest': 'edge',       # a a a a | a b c d | d d d d
+        'mirror': 'reflect',     # d c b | a b c d | c b a
+        'constant': 'constant'   # 0 0 0 0 | a b c d | 0 0 0 0 (legacy np.convolve 'same')
+    }
+    
     @staticmethod
-    def moving_average(signal, window_size=5):
-        """Moving average smoothing"""
-        signal_arr = np.array(signal)
-        if window_size < 1:
+    def moving_average(signal, window_size=5, mode='reflect'):
+        """
+        Moving average smoothing
+        
+        Uses a running sum, so the cost is O(n) whatever the window size.
+        
+        Args:
+            signal: 1-D signal or 2-D (files, points) array, smoothed along the last axis
+            window_size: Window length (rounded up to odd)
+            mode: Edge handling: 'reflect', 'nearest', 'mirror' or 'constant'
+        
+        Returns:
+            Smoothed array of the same shape
+        """
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        if window_size < 1 or signal_arr.shape[-1] == 0:
             return signal_arr
         
-        window_size = min(window_size, len(signal_arr))
+        window_size = min(int(window_size), signal_arr.shape[-1])
         if window_size % 2 == 0:
             window_size += 1
+        half = window_size // 2
         
-        return np.convolve(signal_arr, np.ones(window_size)/window_size, mode='same')
+        if mode not in NoiseCorrector.PAD_MODES:
+            raise ValueError(f"Unknown edge mode: {mode}")
+        pad_mode = NoiseCorrector.PAD_MODES[mode]
+        if pad_mode == 'reflect' and signal_arr.shape[-1] <= half:
+            pad_mode = 'symmetric'
+        
+        # Centre each row first so the running sum does not lose precision on long traces
+        offset = 0.0 if mode == 'constant' else signal_arr.mean(axis=-1, keepdims=True)
+        pad_width = [(0, 0)] * (signal_arr.ndim - 1) + [(half + 1, half)]
+        padded = np.pad(signal_arr - offset, pad_width, mode=pad_mode)
+        padded[..., 0] = 0.0
+        
+        csum = np.cumsum(padded, axis=-1)
+        return (csum[..., window_size:] - csum[..., :-window_size]) / window_size + offset
     
     @staticmethod
-    def savitzky_golay(signal, window_size=11, poly_order=3):
-        """Savitzky-Golay filter"""
-        signal_arr = np.array(signal)
+    def savitzky_golay(signal, window_size=11, poly_order=3, deriv=0, delta=1.0):
+        """
+        Savitzky-Golay filter
         
-        if len(signal_arr) < window_size:
-            window_size = len(signal_arr) if len(signal_arr) % 2 == 1 else len(signal_arr) - 1
+        Args:
+            signal: 1-D signal or 2-D (files, points) array, filtered along the last axis
+            window_size: Window length (clamped to the trace length, made odd)
+            poly_order: Polynomial order
+            deriv: Derivative order (0 = smoothing)
+            delta: Sample spacing, used to scale derivatives
+        
+        Returns:
+            Filtered array of the same shape
+        """
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        window_size, poly_order = NoiseCorrector._savgol_window(
+            signal_arr.shape[-1], window_size, poly_order
+        )
+        
+        if window_size < 3 or deriv > poly_order:
+            return signal_arr if deriv == 0 else np.zeros_like(signal_arr)
+        
+        kernel, left, right = _savgol_operators(window_size, poly_order, deriv)
+        half = window_size // 2
+        
+        # Interior by convolution; the first/last half windows are replaced by the
+        # value of the polynomial fitted to the edge window (savgol_filter mode='interp')
+        result = convolve1d(signal_arr, kernel, axis=-1, mode='nearest')
+        result[..., :half] = signal_arr[..., :window_size] @ left.T
+        result[..., -half:] = signal_arr[..., -window_size:] @ right.T
+        
+        if deriv:
+            result /= delta ** deriv
+        return result
+    
+    @staticmethod
+    def savgol_derivatives(signal, window_size=11, poly_order=3, delta=1.0):
+        """
+        Smoothed signal with its first and second derivatives
+        
+        All three come from the same cached Savitzky-Golay kernels, so peak
+        detection and integration events can share one pass.
+        
+        Returns:
+            Tuple of (smoothed, first_derivative, second_derivative)
+        """
+        return tuple(
+            NoiseCorrector.savitzky_golay(signal, window_size, poly_order, deriv, delta)
+            for deriv in (0, 1, 2)
+        )
+    
+    @staticmethod
+    def first_derivative(signal, window_size=11, poly_order=3, delta=1.0):
+        """Savitzky-Golay first derivative"""
+        return NoiseCorrector.savitzky_golay(signal, window_size, poly_order, 1, delta)
+    
+    @staticmethod
+    def second_derivative(signal, window_size=11, poly_order=3, delta=1.0):
+        """Savitzky-Golay second derivative"""
+        return NoiseCorrector.savitzky_golay(signal, window_size, poly_order, 2, delta)
+    
+    @staticmethod
+    def _savgol_window(length, window_size, poly_order):
+        """Clamp window and order to the trace length (done once per call)"""
+        if length < window_size:
+            window_size = length if length % 2 == 1 else length - 1
         
         if window_size < poly_order + 2:
             poly_order = max(1, window_size - 2)
@@ -62,15 +215,241 @@ class NoiseCorrector:
         if window_size % 2 == 0:
             window_size += 1
         
-        try:
-            return savgol_filter(signal_arr, window_size, poly_order)
-        except:
+        # An even window equal to the trace length is rounded past it
+        if window_size > length:
+            window_size -= 2
+            poly_order = min(poly_order, max(1, window_size - 2))
+        
+        return window_size, poly_order
+    
+    # Truncation radius of the Gaussian kernel, in sigmas (same as gaussian_filter1d)
+    GAUSSIAN_TRUNCATE = 4.0
+    
+    @staticmethod
+    def gaussian_smooth(signal, sigma=2.0, method='auto', mode='reflect'):
+        """
+        Gaussian smoothing
+        
+        Args:
+            signal: 1-D signal or 2-D (files, points) array, smoothed along the last axis
+            sigma: Standard deviation in samples
+            method: 'direct' (gaussian_filter1d, O(n*sigma)), 'fft' (FFT
+                    convolution, O(n log n)), 'recursive' (Young-van Vliet IIR,
+                    O(n), approximate) or 'auto'
+            mode: Edge handling ('reflect', 'nearest', 'mirror', 'constant')
+        
+        Returns:
+            Smoothed array of the same shape
+        """
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        if sigma <= 0 or signal_arr.shape[-1] < 2:
+            return signal_arr
+        
+        if method == 'auto':
+            method = NoiseCorrector.choose_gaussian_method(sigma, signal_arr.shape[-1])
+        
+        if method == 'direct':
+            return gaussian_filter1d(signal_arr, sigma=sigma, axis=-1, mode=mode,
+                                     truncate=NoiseCorrector.GAUSSIAN_TRUNCATE)
+        elif method == 'fft':
+            return NoiseCorrector._gaussian_fft(signal_arr, sigma, mode)
+        elif method == 'recursive':
+            return NoiseCorrector._gaussian_recursive(signal_arr, sigma, mode)
+        else:
+            raise ValueError(f"Unknown Gaussian method: {method}")
+    
+    @staticmethod
+    def choose_gaussian_method(sigma, length):
+        """
+        Pick the fastest Gaussian implementation for a kernel and trace length
+        
+        Thresholds come from benchmarks/README.md: direct convolution wins for
+        short kernels; beyond that FFT convolution wins on short traces and
+        the recursive filter (cost independent of sigma; at most 0.3%
+        maximum relative error against the exact kernel where it is chosen,
+        0.8% at worst) on long ones.
+        """
+        if sigma <= GAUSSIAN_DIRECT_MAX_SIGMA:
+            return 'direct'
+        if length < GAUSSIAN_RECURSIVE_MIN_POINTS:
+            return 'fft'
+        return 'recursive'
+    
+    @staticmethod
+    def _pad(signal_arr, before, after, mode):
+        pad_width = [(0, 0)] * (signal_arr.ndim - 1) + [(before, after)]
+        return np.pad(signal_arr, pad_width, mode=NoiseCorrector.PAD_MODES[mode])
+    
+    @staticmethod
+    def _sos_state(zi, first):
+        """Steady-state initial conditions for an input that starts at `first`"""
+        first = np.asarray(first)
+        return zi.reshape(zi.shape[:1] + (1,) * first.ndim + zi.shape[1:]) * first[..., None]
+    
+    @staticmethod
+    def _gaussian_fft(signal_arr, sigma, mode):
+        """Exact Gaussian (same kernel as gaussian_filter1d) via FFT convolution"""
+        radius = int(NoiseCorrector.GAUSSIAN_TRUNCATE * sigma + 0.5)
+        x = np.arange(-radius, radius + 1, dtype=np.float64)
+        kernel = np.exp(-0.5 * (x / sigma) ** 2)
+        kernel /= kernel.sum()
+        
+        padded = NoiseCorrector._pad(signal_arr, radius, radius, mode)
+        kernel = kernel.reshape((1,) * (signal_arr.ndim - 1) + (-1,))
+        return fftconvolve(padded, kernel, mode='valid', axes=-1)
+    
+    @staticmethod
+    def _gaussian_recursive(signal_arr, sigma, mode):
+        """
+        Young-van Vliet recursive Gaussian
+        
+        A third-order causal pass followed by an anti-causal pass, both run by
+        scipy.signal.sosfilt, so the cost does not depend on sigma. The edges
+        are padded by the kernel radius and the filters start from their
+        steady state for the first padded sample.
+        """
+        if sigma >= 2.5:
+            q = 0.98711 * sigma - 0.96330
+        else:
+            q = 3.97156 - 4.14554 * np.sqrt(1 - 0.26891 * max(sigma, 0.5))
+        
+        # The denominator is a product of (m + q(1 - z^-1)) factors. The
+        # published b1..b3 are rounded to five digits, which is enough to move
+        # the poles once sigma is large, so they are expanded from b0's terms.
+        c0, c1, c2, c3 = 1.57825, 2.44413, 1.4281, 0.422205
+        b0 = c0 + c1 * q + c2 * q ** 2 + c3 * q ** 3
+        b1 = c1 * q + 2 * c2 * q ** 2 + 3 * c3 * q ** 3
+        b2 = -(c2 * q ** 2 + 3 * c3 * q ** 3)
+        b3 = c3 * q ** 3
+        gain = c0 / b0
+        
+        # Run the third-order recursion as cascaded sections: with sigma in
+        # the hundreds the poles crowd towards 1 and a single direct-form
+        # filter loses most of its precision.
+        sos = tf2sos([gain, 0.0, 0.0, 0.0], [1.0, -b1 / b0, -b2 / b0, -b3 / b0])
+        zi = sosfilt_zi(sos)
+        
+        radius = int(NoiseCorrector.GAUSSIAN_TRUNCATE * sigma + 0.5)
+        padded = NoiseCorrector._pad(signal_arr, radius, radius, mode)
+        
+        forward, _ = sosfilt(sos, padded, axis=-1, zi=NoiseCorrector._sos_state(zi, padded[..., 0]))
+        backward = forward[..., ::-1]
+        smoothed, _ = sosfilt(sos, backward, axis=-1, zi=NoiseCorrector._sos_state(zi, backward[..., 0]))
+        
+        return np.ascontiguousarray(smoothed[..., ::-1][..., radius:radius + signal_arr.shape[-1]])
+
+    
+    @staticmethod
+    def median_smooth(signal, window_size=5, mode='reflect'):
+        """
+        Running median, for spike-contaminated traces
+        
+        Args:
+            signal: 1-D signal or 2-D (files, points) array, filtered along the last axis
+            window_size: Window length in samples (rounded up to odd)
+            mode: Edge handling ('reflect', 'nearest', 'mirror', 'constant')
+        
+        Returns:
+            Filtered array of the same shape
+        """
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        window_size = max(1, int(window_size)) | 1
+        if window_size == 1 or signal_arr.shape[-1] < 2:
             return signal_arr
+        
+        size = (1,) * (signal_arr.ndim - 1) + (window_size,)
+        return median_filter(signal_arr, size=size, mode=mode)
     
     @staticmethod
-    def gaussian_smooth(signal, sigma=2.0):
-        """Gaussian smoothing"""
-        return gaussian_filter1d(np.array(signal), sigma=sigma)
+    def whittaker_smooth(signal, lam=100.0, order=2):
+        """
+        Whittaker smoother: minimise |y - z|^2 + lam * |D z|^2
+        
+        Follows drift without the phase lag of a moving window. Uses the same
+        banded solver as the ALS baseline; a stack of traces is solved against
+        one factorization.
+        
+        Args:
+            signal: 1-D signal or 2-D (files, points) array
+            lam: Smoothness penalty (larger is smoother)
+            order: Difference order of the penalty
+        
+        Returns:
+            Smoothed array of the same shape
+        """
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        return solve_penalized(signal_arr, np.ones(signal_arr.shape[-1]), lam, order)
+    
+    @staticmethod
+    def wavelet_denoise(signal, wavelet='db4', level=None, threshold_mode='soft'):
+        """
+        Wavelet shrinkage with the universal (VisuShrink) threshold
+        
+        The noise level of each trace is estimated from the median absolute
+        finest-scale detail coefficient. Uses PyWavelets when installed,
+        otherwise a NumPy Haar transform (`wavelet` is then ignored).
+        
+        Args:
+            signal: 1-D signal or 2-D (files, points) array
+            wavelet: PyWavelets wavelet name
+            level: Decomposition depth (None for the maximum)
+            threshold_mode: 'soft' or 'hard'
+        
+        Returns:
+            Denoised array of the same shape
+        """
+        signal_arr = np.asarray(signal, dtype=np.float64)
+        length = signal_arr.shape[-1]
+        if length < 4:
+            return signal_arr
+        
+        if pywt is not None:
+            wavelet = pywt.Wavelet(wavelet)
+            max_level = pywt.dwt_max_level(length, wavelet.dec_len)
+            level = max(1, min(level or max_level, max_level))
+            coeffs = pywt.wavedec(signal_arr, wavelet, mode='symmetric', level=level, axis=-1)
+            threshold = NoiseCorrector._universal_threshold(coeffs[-1], length)
+            coeffs[1:] = [NoiseCorrector._shrink(c, threshold, threshold_mode) for c in coeffs[1:]]
+            return pywt.waverec(coeffs, wavelet, mode='symmetric', axis=-1)[..., :length]
+        
+        return NoiseCorrector._haar_denoise(signal_arr, level, threshold_mode)
+    
+    @staticmethod
+    def _universal_threshold(finest_details, length):
+        sigma = np.median(np.abs(finest_details), axis=-1, keepdims=True) / 0.6745
+        return sigma * np.sqrt(2 * np.log(length))
+    
+    @staticmethod
+    def _shrink(coeffs, threshold, threshold_mode):
+        if threshold_mode == 'hard':
+            return np.where(np.abs(coeffs) > threshold, coeffs, 0.0)
+        return np.sign(coeffs) * np.maximum(np.abs(coeffs) - threshold, 0.0)
+    
+    @staticmethod
+    def _haar_denoise(signal_arr, level, threshold_mode):
+        """Orthonormal Haar shrinkage; odd lengths are padded with the last sample"""
+        max_level = int(np.log2(signal_arr.shape[-1]))
+        level = max(1, min(level or max_level, max_level))
+        
+        approx = signal_arr
+        details = []
+        for _ in range(level):
+            length = approx.shape[-1]
+            if length % 2:
+                approx = np.concatenate([approx, approx[..., -1:]], axis=-1)
+            even, odd = approx[..., 0::2], approx[..., 1::2]
+            details.append(((even - odd) / np.sqrt(2), length))
+            approx = (even + odd) / np.sqrt(2)
+        
+        threshold = NoiseCorrector._universal_threshold(details[0][0], signal_arr.shape[-1])
+        for detail, length in reversed(details):
+            detail = NoiseCorrector._shrink(detail, threshold, threshold_mode)
+            merged = np.empty(approx.shape[:-1] + (2 * approx.shape[-1],))
+            merged[..., 0::2] = (approx + detail) / np.sqrt(2)
+            merged[..., 1::2] = (approx - detail) / np.sqrt(2)
+            approx = merged[..., :length]
+        
+        return approx
 
 
 def apply_noise_correction(signal, method='None', **kwargs):
@@ -0,0 +1,105 @@
+"""Banded penalized least-squares core shared by the ALS/arPLS/airPLS baselines and Whittaker smoothing"""
+from functools import lru_cache
+
+import numpy as np
+from scipy import sparse
+from scipy.linalg import solveh_banded
+
+
+@lru_cache(maxsize=16)
+def difference_penalty(length, order=2):
+    """
+    D'D for the `order`-th difference matrix D, in upper banded storage
+
+    Row `order` holds the main diagonal and row `order - k` the k-th
+    superdiagonal (the layout scipy.linalg.solveh_banded expects). The
+    result is cached per (length, order) and returned read-only.
+
+    Args:
+        length: Number of points
+        order: Difference order (2 for ALS/Whittaker)
+
+    Returns:
+        Array of shape (order + 1, length)
+    """
+    coeffs = np.diff(np.eye(order + 1), n=order, axis=0).ravel()
+    D = sparse.diags(coeffs, np.arange(order + 1), shape=(max(length - order, 0), length))
+    DtD = (D.T @ D).todia()
+
+    bands = np.zeros((order + 1, length))
+    for k in range(order + 1):
+        diagonal = DtD.diagonal(k)
+        bands[order - k, k:] = diagonal
+    bands.setflags(write=False)
+    return bands
+
+
+def solve_penalized(y, weights, lam, order=2):
+    """
+    Solve (W + lam * D'D) z = W y
+
+    The system is symmetric positive definite with bandwidth `order`, so a
+    banded Cholesky factorization solves it in O(n * order^2).
+
+    Args:
+        y: 1-D signal, or 2-D (files, points) stack sharing the same weights
+        weights: Per-point weights, shape (points,)
+        lam: Smoothness penalty
+        order: Difference order
+
+    Returns:
+        Smoothed array with the shape of y
+    """
+    y_arr = np.asarray(y, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    length = y_arr.shape[-1]
+    if length <= order:
+        return y_arr.copy()
+
+    ab = lam * difference_penalty(length, order)
+    ab[order] += weights
+    rhs = (weights * y_arr).T
+    return solveh_banded(ab, rhs, check_finite=False).T
+
+
+def reweighted_fit(y, lam, update_weights, order=2, max_iter=50, tol=0.0, weights=None):
+    """
+    Iteratively reweighted penalized least squares
+
+    The common loop behind ALS, arPLS and airPLS: solve for a smooth z,
+    let the method derive new weights from the residuals, repeat until the
+    weights settle.
+
+    Args:
+        y: 1-D signal
+        lam: Smoothness penalty
+        update_weights: Callable(y, z, iteration, weights) -> new weights, or
+                        None when the method's own stopping rule is met
+        order: Difference order
+        max_iter: Maximum number of solves
+        tol: Stop once |w_new - w| / |w| drops to this (0 stops only when
+             the weights no longer change, so the result is the same as
+             running all max_iter solves)
+        weights: Initial weights (default all ones)
+
+    Returns:
+        Tuple of (fitted curve, number of solves)
+    """
+    y = np.asarray(y, dtype=np.float64)
+    w = np.ones(y.shape[-1]) if weights is None else np.asarray(weights, dtype=np.float64)
+
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        z = solve_penalized(y, w, lam, order)
+        if iteration == max_iter:
+            break
+        new_w = update_weights(y, z, iteration, w)
+        if new_w is None:
+            break
+        norm = np.linalg.norm(w)
+        change = np.linalg.norm(new_w - w) / norm if norm > 0 else 0.0
+        if change <= tol:
+            break
+        w = new_w
+
+    return z, iteration
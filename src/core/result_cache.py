@@ -0,0 +1,263 @@
+"""Content-addressed cache of per-file results"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+class ResultCache:
+    """
+    LRU cache of result dictionaries
+
+    Keys combine a hash of the raw file bytes with a fingerprint of the
+    processing method, so re-running a sequence with the same method, or
+    processing a copy of a file from another folder, skips parsing and
+    integration entirely.
+
+    Hashing reads the whole file, so file_key avoids it where it cannot
+    pay off: a file whose (path, size, mtime) was seen before reuses the
+    earlier key, and a file with a size no cached file has cannot match
+    any entry, so its result is stored under that stat key instead. Only
+    when sizes collide are both files hashed (and the earlier entries moved
+    to their content hash), so cold runs read each file once.
+
+    The bookkeeping behind this is pruned with the entries: once the last
+    result of a file is evicted its size and hashes are forgotten, and at
+    most max_entries file hashes are remembered.
+    """
+
+    def __init__(self, max_entries=10000):
+        """
+        Initialize ResultCache
+
+        Args:
+            max_entries: Maximum number of cached results
+        """
+        self.max_entries = max(1, int(max_entries))
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._file_hashes = OrderedDict()  # (path, size, mtime_ns) -> content hash, LRU
+        self._hash_stats = {}              # content hash -> stats in _file_hashes
+        self._hash_sizes = {}              # content hash -> file size
+        self._file_entries = {}            # file part of stored keys -> [entries, size]
+        self._sizes = {}                   # size -> file parts with stored results
+        self._unhashed = {}                # size -> {(path, size, mtime_ns): keys stored under the stat key}
+
+    @staticmethod
+    def hash_file(filepath, chunk_size=1 << 20):
+        """
+        Hash the raw bytes of a file
+
+        Uses xxHash (XXH3-128) when the xxhash package is installed,
+        otherwise BLAKE2b.
+        """
+        hasher = xxhash.xxh3_128() if xxhash is not None else hashlib.blake2b(digest_size=16)
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    @staticmethod
+    def _stat_key(stat):
+        path, size, mtime_ns = stat
+        return f'stat:{size}:{mtime_ns}:{path}'
+
+    @staticmethod
+    def _parse_stat(file_part):
+        _, size, mtime_ns, path = file_part.split(':', 3)
+        return path, int(size), int(mtime_ns)
+
+    def _remember_hash(self, stat, file_hash):
+        """Record the content hash of a file, forgetting the oldest beyond max_entries (lock held)"""
+        self._file_hashes[stat] = file_hash
+        self._file_hashes.move_to_end(stat)
+        self._hash_stats.setdefault(file_hash, set()).add(stat)
+        self._hash_sizes[file_hash] = stat[1]
+        while len(self._file_hashes) > self.max_entries:
+            old_stat, old_hash = self._file_hashes.popitem(last=False)
+            self._forget_stat(old_stat, old_hash)
+
+    def _forget_stat(self, stat, file_hash):
+        stats = self._hash_stats.get(file_hash)
+        if stats is not None:
+            stats.discard(stat)
+            if not stats:
+                del self._hash_stats[file_hash]
+                if file_hash not in self._file_entries:
+                    self._hash_sizes.pop(file_hash, None)
+
+    def _track(self, key, size):
+        """Count a newly stored entry against its file (lock held)"""
+        file_part = key.rsplit(':', 1)[0]
+        entry = self._file_entries.get(file_part)
+        if entry is None:
+            entry = self._file_entries[file_part] = [0, size]
+            if size is not None:
+                self._sizes[size] = self._sizes.get(size, 0) + 1
+        entry[0] += 1
+
+    def _untrack(self, key):
+        """Drop a removed entry; the file's bookkeeping goes with its last entry (lock held)"""
+        file_part = key.rsplit(':', 1)[0]
+        entry = self._file_entries[file_part]
+        entry[0] -= 1
+        if entry[0]:
+            return
+        del self._file_entries[file_part]
+        size = entry[1]
+        if size is not None:
+            self._sizes[size] -= 1
+            if not self._sizes[size]:
+                del self._sizes[size]
+        if file_part.startswith('stat:'):
+            stat = self._parse_stat(file_part)
+            pending = self._unhashed.get(stat[1])
+            if pending is not None:
+                pending.pop(stat, None)
+                if not pending:
+                    del self._unhashed[stat[1]]
+        else:
+            self._hash_sizes.pop(file_part, None)
+            for stat in self._hash_stats.pop(file_part, ()):
+                self._file_hashes.pop(stat, None)
+
+    def file_key(self, filepath):
+        """
+        File part of a cache key, reading the file only when necessary
+
+        Returns the content hash, or a 'stat:' key for a file that has not
+        needed hashing. A file rewritten with the same size within the
+        filesystem's timestamp resolution is not noticed.
+        """
+        st = os.stat(filepath)
+        stat = (os.path.realpath(filepath), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            known = self._file_hashes.get(stat)
+            if known is not None:
+                self._file_hashes.move_to_end(stat)
+                return known
+            if stat in self._unhashed.get(st.st_size, ()) or st.st_size not in self._sizes:
+                return self._stat_key(stat)
+            pending = self._unhashed.pop(st.st_size, {})
+
+        # Possibly a copy of a cached file: compare contents
+        for other, keys in pending.items():
+            self._rekey(other, keys)
+        with self._lock:
+            known = self._file_hashes.get(stat)
+        if known is not None:
+            return known
+        file_hash = self.hash_file(filepath)
+        with self._lock:
+            self._remember_hash(stat, file_hash)
+        return file_hash
+
+    def _rekey(self, stat, keys):
+        """Hash a file stored under its stat key and move its entries to the content hash"""
+        path, size, mtime_ns = stat
+        try:
+            st = os.stat(path)
+            if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                return  # Changed since: its entries can no longer be hit
+            file_hash = self.hash_file(path)
+        except OSError:
+            return
+        prefix = self._stat_key(stat)
+        with self._lock:
+            self._remember_hash(stat, file_hash)
+            for key in keys:
+                value = self._entries.pop(key, None)
+                if value is not None:
+                    new_key = file_hash + key[len(prefix):]
+                    if new_key not in self._entries:
+                        self._track(new_key, size)
+                    self._entries[new_key] = value
+                    self._untrack(key)
+
+    def _register(self, key):
+        """
+        Note the file behind a key about to be stored (lock held)
+
+        Returns:
+            Tuple of (key to store it under, file size or None if unknown)
+        """
+        file_part = key.rsplit(':', 1)[0]
+        if file_part.startswith('stat:'):
+            stat = self._parse_stat(file_part)
+            if stat in self._file_hashes:
+                # Hashed while this result was being computed
+                return self._file_hashes[stat] + key[len(file_part):], stat[1]
+            self._unhashed.setdefault(stat[1], {}).setdefault(stat, []).append(key)
+            return key, stat[1]
+        return key, self._hash_sizes.get(file_part)
+
+    @staticmethod
+    def fingerprint(**parts):
+        """Canonical hash of method settings (peaks, totals, corrections, ...)"""
+        canonical = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=repr)
+        return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+
+    def get(self, key):
+        """Return a copy of the cached result, or None"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(value)
+
+    def put(self, key, value):
+        """Store a result, evicting the least recently used entries"""
+        with self._lock:
+            key, size = self._register(key)
+            if key not in self._entries:
+                self._track(key, size)
+            self._entries[key] = dict(value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._untrack(old_key)
+
+    def clear(self):
+        """Drop all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self._file_hashes.clear()
+            self._hash_stats.clear()
+            self._hash_sizes.clear()
+            self._file_entries.clear()
+            self._sizes.clear()
+            self._unhashed.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self):
+        """Return hit/miss statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def format_stats(self):
+        """Return a one-line summary for the processing log"""
+        stats = self.get_stats()
+        return (f"Result cache: {stats['hits']} hit(s), {stats['misses']} miss(es) "
+                f"({stats['hit_rate'] * 100:.0f}% hit rate, {stats['entries']}/{stats['max_entries']} entries)")
@@ -0,0 +1,156 @@
+"""Shared-memory transport for NumPy arrays between worker processes"""
+import threading
+import weakref
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _attach_block(name):
+    """Attach to an existing block without registering it for cleanup in this process"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 always registers the block with the resource tracker,
+        # which would unlink it when the worker exits.
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        return shm
+
+
+class SharedArray:
+    """A NumPy array backed by a multiprocessing.shared_memory block"""
+
+    def __init__(self, shm, shape, dtype, owner=False):
+        self.shm = shm
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.owner = owner
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, shape, dtype=np.float64):
+        """Allocate a new, uninitialised shared array"""
+        nbytes = int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize
+        shm = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+        return cls(shm, shape, dtype, owner=True)
+
+    @classmethod
+    def from_array(cls, array, dtype=np.float64):
+        """Copy an array into a new shared block"""
+        array = np.asarray(array, dtype=dtype)
+        shared = cls.create(array.shape, array.dtype)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor):
+        """Wrap an existing block (by descriptor) as a zero-copy view"""
+        name, shape, dtype = descriptor
+        return cls(_attach_block(name), shape, dtype, owner=False)
+
+    @property
+    def descriptor(self):
+        """Picklable (name, shape, dtype) tuple identifying the block"""
+        return (self.shm.name, self.shape, self.dtype.str)
+
+    def close(self):
+        """Unmap the block in this process"""
+        self.array = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # A view is still alive somewhere; the mapping goes away with it
+            pass
+
+    def unlink(self):
+        """Close and destroy the block (owner only)"""
+        self.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+@contextmanager
+def attach_arrays(*descriptors):
+    """
+    Worker-side zero-copy views of shared arrays
+
+    Example:
+        with attach_arrays(time_desc, signal_desc) as (time, signal):
+            ...
+    """
+    blocks = [SharedArray.attach(desc) for desc in descriptors]
+    try:
+        yield tuple(block.array for block in blocks)
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def _unlink_blocks(blocks):
+    for block in list(blocks.values()):
+        block.unlink()
+    blocks.clear()
+
+
+class SharedArrayPool:
+    """
+    Owns every shared block handed to workers
+
+    Blocks are only ever created by the parent process, so a crashing worker
+    cannot leak a segment: anything not released explicitly is unlinked when
+    the pool is closed, garbage collected or the interpreter exits.
+    """
+
+    def __init__(self):
+        self._blocks = {}
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, _unlink_blocks, self._blocks)
+
+    def share(self, array, dtype=np.float64):
+        """Copy an array into shared memory and return its descriptor"""
+        return self._register(SharedArray.from_array(array, dtype))
+
+    def allocate(self, shape, dtype=np.float64):
+        """Allocate an output block and return its descriptor"""
+        return self._register(SharedArray.create(shape, dtype))
+
+    def view(self, descriptor):
+        """Parent-side array for a descriptor created by this pool"""
+        return self._blocks[descriptor[0]].array
+
+    def release(self, *descriptors):
+        """Destroy blocks that are no longer needed"""
+        for descriptor in descriptors:
+            with self._lock:
+                block = self._blocks.pop(descriptor[0], None)
+            if block is not None:
+                block.unlink()
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def close(self):
+        """Destroy all remaining blocks"""
+        with self._lock:
+            _unlink_blocks(self._blocks)
+
+    def _register(self, block):
+        with self._lock:
+            self._blocks[block.shm.name] = block
+        return block.descriptor
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,222 @@
+"""Peak integration over a trace that arrives in chunks"""
+import numpy as np
+from core.auc_calculator import AUCCalculator, trapezoid
+from core.noise_correction import NoiseCorrector, apply_noise_correction
+from config.settings import GAUSSIAN_DIRECT_MAX_SIGMA
+from utils.stage_timing import stage
+
+# Noise methods whose output at a sample depends on the whole trace
+WHOLE_TRACE_NOISE = {'Whittaker', 'Wavelet'}
+
+
+def _noise_halo(method, params):
+    """
+    Samples each side that the noise filter reads around a point
+
+    Returns:
+        Tuple of (halo, noise params to smooth segments with)
+
+    Raises:
+        ValueError: For filters that need the whole trace
+    """
+    params = dict(params)
+    if method in WHOLE_TRACE_NOISE or (method == 'Gaussian' and params.get('gaussian_method') == 'recursive'):
+        raise ValueError(f"{method} noise correction needs the whole trace and cannot be streamed")
+    if method == 'Moving Average':
+        window_size = int(params.get('window_size', 5))
+        return max(0, window_size // 2), params
+    if method == 'Savitzky-Golay':
+        return int(params.get('window_size', 11)) // 2, params
+    if method == 'Median':
+        return max(1, int(params.get('window_size', 5))) // 2, params
+    if method == 'Gaussian':
+        sigma = params.get('sigma', 2.0)
+        # The exact kernel: 'auto' may pick the recursive approximation for a whole long trace
+        params['gaussian_method'] = 'direct' if sigma <= GAUSSIAN_DIRECT_MAX_SIGMA else 'fft'
+        return max(0, int(NoiseCorrector.GAUSSIAN_TRUNCATE * sigma + 0.5)), params
+    return 0, params
+
+
+class StreamingIntegrator:
+    """
+    Integrate every peak window in one pass over chunks of a sorted trace
+
+    Each window accumulates its trapezoid area chunk by chunk. The last
+    sample of a chunk is carried over, so the segment across a chunk
+    boundary is counted exactly once and the areas match
+    AUCCalculator.calculate_multiple_peaks on the whole trace.
+
+    The noise filters that read a fixed number of neighbours (moving
+    average, Savitzky-Golay, median, Gaussian kernel) run on each chunk
+    plus a halo of that many samples carried from the one before, and a
+    sample is only passed on once the samples after it have arrived, so
+    the smoothed trace is the one calculate_multiple_peaks sees. Whittaker,
+    wavelet and recursive Gaussian smoothing need the whole trace and are
+    refused. A baseline correction needs all points of a window at once:
+    with one configured, each window keeps its own samples and is
+    corrected and integrated by AUCCalculator.calculate_auc when the
+    stream ends.
+
+    Example:
+        integrator = StreamingIntegrator(calculator, [(1.0, 2.0), (3.0, 4.5)])
+        for time, signal in chunks:
+            integrator.feed(time, signal)
+        results = integrator.finish(['Peak A', 'Peak B'])
+    """
+
+    def __init__(self, calculator, peak_ranges, custom_total_range=None):
+        """
+        Initialize StreamingIntegrator
+
+        Args:
+            calculator: AUCCalculator with the correction settings
+            peak_ranges: List of (start, end) tuples
+            custom_total_range: Tuple of (start, end, name) for custom total peak
+
+        Raises:
+            ValueError: If the noise correction needs the whole trace
+        """
+        windows = list(peak_ranges)
+        if custom_total_range:
+            windows.append(tuple(custom_total_range[:2]))
+        self.calculator = calculator
+        self.windows = windows
+        self.starts = np.array([xi for xi, _ in windows], dtype=np.float64)
+        self.ends = np.array([xf for _, xf in windows], dtype=np.float64)
+        self.smoothing = calculator.noise_method not in ('None', None)
+        self.halo, self.noise_params = 0, None
+        if self.smoothing:
+            self.halo, self.noise_params = _noise_halo(calculator.noise_method, calculator.noise_params)
+        self.buffered = calculator.baseline_method != 'None'
+        self.areas = np.zeros(len(windows))
+        self.points = np.zeros(len(windows), dtype=np.int64)
+        self.total_points = 0
+        self.last_time = None
+        # Last sample integrated (behind last_time by the halo when smoothing)
+        self._carry_time = None
+        self._carry_signal = None
+        self._buffers = [[] for _ in windows]
+        # Raw samples not yet smoothed, after `_lead` already passed on as halo
+        self._raw_time = np.empty(0)
+        self._raw_signal = np.empty(0)
+        self._lead = 0
+
+    def feed(self, time, signal):
+        """
+        Add the next chunk
+
+        Args:
+            time: Ascending float64 times, all after the previous chunk's
+                  (see DataValidator.clean_chunk)
+            signal: Signal values
+        """
+        if len(time) == 0:
+            return
+        self.total_points += len(time)
+        self.last_time = time[-1]
+        if self.smoothing:
+            time, signal = self._smooth(time, signal)
+        self._integrate(time, signal)
+
+    def _smooth(self, time, signal, final=False):
+        """Smoothed samples whose filter window has fully arrived (all of them when final)"""
+        self._raw_time = np.concatenate((self._raw_time, time))
+        self._raw_signal = np.concatenate((self._raw_signal, signal))
+        available = len(self._raw_signal) - self._lead
+        if final:
+            ready = available
+        elif self.total_points < 2 * self.halo + 1:
+            # Shorter traces shrink the filter window; wait until that cannot happen
+            ready = 0
+        else:
+            ready = max(0, available - self.halo)
+        if ready == 0:
+            return self._raw_time[:0], self._raw_signal[:0]
+
+        with stage('noise'):
+            smoothed = apply_noise_correction(self._raw_signal, self.calculator.noise_method, **self.noise_params)
+        end = self._lead + ready
+        time_out, signal_out = self._raw_time[self._lead:end], smoothed[self._lead:end]
+        # Keep twice the halo: the segment flushed at the end must still hold a full filter window
+        keep = max(0, end - 2 * self.halo)
+        self._raw_time, self._raw_signal = self._raw_time[keep:], self._raw_signal[keep:]
+        self._lead = end - keep
+        return time_out, signal_out
+
+    def _integrate(self, time, signal):
+        """Add (smoothed) samples to the windows they fall in"""
+        if len(time) == 0:
+            return
+        offset = 0
+        if self._carry_time is not None:
+            time_ext = np.concatenate(([self._carry_time], time))
+            signal_ext = np.concatenate(([self._carry_signal], signal))
+            offset = 1
+        else:
+            time_ext, signal_ext = time, signal
+
+        lo = np.searchsorted(time_ext, self.starts, side='left')
+        hi = np.searchsorted(time_ext, self.ends, side='right')
+        with stage('integrate'):
+            for idx in np.flatnonzero(hi > lo):
+                start, end = lo[idx], hi[idx]
+                # The carried sample was counted with the previous chunk
+                first_new = max(start, offset)
+                self.points[idx] += end - first_new
+                if self.buffered:
+                    if end > first_new:
+                        self._buffers[idx].append((time_ext[first_new:end].copy(),
+                                                   signal_ext[first_new:end].copy()))
+                elif end - start >= 2:
+                    self.areas[idx] += trapezoid(signal_ext[start:end], time_ext[start:end])
+
+        self._carry_time = time[-1]
+        self._carry_signal = signal[-1]
+
+    def flush(self):
+        """Smooth and integrate the samples held back for the noise filter's halo"""
+        if self.smoothing and len(self._raw_signal) > self._lead:
+            self._integrate(*self._smooth(self._raw_time[:0], self._raw_signal[:0], final=True))
+
+    def complete(self):
+        """Indices of windows the stream has moved past, whose AUC is final"""
+        if self._carry_time is None:
+            return []
+        return np.flatnonzero(self.ends < self._carry_time).tolist()
+
+    def window_auc(self, idx):
+        """(auc, error message or None) of one window from the samples fed so far"""
+        xi, xf = self.windows[idx]
+        if self.points[idx] < 2:
+            return 0, f"Insufficient data points between {xi} and {xf}"
+        if not self.buffered:
+            return max(0, float(self.areas[idx])), None
+        time = np.concatenate([t for t, _ in self._buffers[idx]])
+        signal = np.concatenate([s for _, s in self._buffers[idx]])
+        try:
+            return self.calculator.calculate_auc(time, signal, xi, xf, presorted=True, smoothed=True), None
+        except Exception as e:
+            return 0, str(e)
+
+    def window_aucs(self):
+        """List of (auc, error message or None), one per window"""
+        return [self.window_auc(idx) for idx in range(len(self.windows))]
+
+    def finish(self, peak_names, include_in_total=None, custom_total_range=None):
+        """
+        Build the result dictionary once the last chunk was fed
+        (the samples held back for smoothing are flushed first)
+
+        Args:
+            peak_names, include_in_total, custom_total_range: As for
+                AUCCalculator.calculate_multiple_peaks
+
+        Returns:
+            Dictionary with results
+        """
+        self.flush()
+        aucs = self.window_aucs()
+        n_peaks = len(peak_names)
+        custom_auc = aucs[n_peaks] if custom_total_range else None
+        return AUCCalculator._summarise(aucs[:n_peaks], custom_auc, peak_names,
+                                        include_in_total, custom_total_range)
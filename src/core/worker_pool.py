@@ -0,0 +1,88 @@
+"""Application-wide worker process pool"""
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _warm_worker():
+    """Process initializer: pay the heavy imports once per worker"""
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import scipy.signal  # noqa: F401
+    import scipy.sparse.linalg  # noqa: F401
+    import scipy.ndimage  # noqa: F401
+    import core.file_processor  # noqa: F401
+
+
+def _ping():
+    return True
+
+
+class WorkerPool:
+    """
+    Process pool started on first use and kept alive between runs
+
+    The pool belongs to the application window rather than to a single
+    processing run, so re-running a batch with tweaked peak windows reuses
+    workers that already have NumPy, SciPy and pandas imported.
+    """
+
+    def __init__(self, max_workers):
+        """
+        Initialize WorkerPool
+
+        Args:
+            max_workers: Number of worker processes
+        """
+        self.max_workers = max(1, int(max_workers))
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self.max_workers
+
+    def is_running(self):
+        """Check if worker processes have been started"""
+        return self._executor is not None
+
+    def get_executor(self):
+        """
+        Get the executor, starting (or restarting after a crash) if needed
+
+        Returns:
+            ProcessPoolExecutor, or None if processes cannot be started here
+        """
+        with self._lock:
+            if self._executor is not None and getattr(self._executor, '_broken', False):
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+            if self._executor is None:
+                try:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        initializer=_warm_worker
+                    )
+                except (OSError, NotImplementedError, ImportError) as e:
+                    print(f"Warning: Could not start worker processes, using threads. Error: {e}")
+                    return None
+
+            return self._executor
+
+    def warm_up(self):
+        """Start every worker now instead of on the first submitted task"""
+        executor = self.get_executor()
+        if executor is not None:
+            for _ in range(self.max_workers):
+                executor.submit(_ping)
+
+    def shutdown(self, wait=True):
+        """Stop all worker processes"""
+        with self._lock:
+            if self._executor is not None:
+                try:
+                    self._executor.shutdown(wait=wait, cancel_futures=True)
+                except TypeError:
+                    # cancel_futures needs Python 3.9+
+                    self._executor.shutdown(wait=wait)
+                self._executor = None
@@ -8,7 +8,7 @@ from config.settings import PADDING, DEFAULT_TIME_COLUMN_INDEX, DEFAULT_SIGNAL_C
 from utils.file_handler import FileHandler
 
 # Supported file formats
-SUPPORTED_FORMATS = ['.csv', '.xlsx', '.xls', '.txt']
+SUPPORTED_FORMATS = ['.csv', '.xlsx', '.xls', '.txt', '.cdf', '.animl']
 
 
 class FileUploadFrame:
@@ -17,6 +17,7 @@ class FileUploadFrame:
     def __init__(self, parent):
         self.frame = ttk.Frame(parent, padding=PADDING)
         self.selected_files = []
+        self.selected_folder = None
         self.folder_mode = False
         self.file_handler = FileHandler()
         
@@ -282,17 +283,8 @@ class FileUploadFrame:
                 )
                 return
             
-            files = []
             try:
-                all_items = os.listdir(folder)
-                print(f"DEBUG - Items in folder: {all_items}")
-                
-                for item in all_items:
-                    full_path = os.path.join(folder, item)
-                    if os.path.isfile(full_path):
-                        if any(item.lower().endswith(ext.lower()) for ext in SUPPORTED_FORMATS):
-                            files.append(full_path)
-                            print(f"DEBUG - Found supported file: {item}")
+                files = list(self.file_handler.iter_files(folder, SUPPORTED_FORMATS))
             except Exception as e:
                 messagebox.showerror(
                     "Error",
@@ -303,11 +295,11 @@ class FileUploadFrame:
             print(f"DEBUG - Total files found: {len(files)}")
             
             if files:
-                files.sort()
                 self.selected_files = files
+                self.selected_folder = folder
                 self.file_listbox.delete(0, tk.END)
                 for f in files:
-                    self.file_listbox.insert(tk.END, os.path.basename(f))
+                    self.file_listbox.insert(tk.END, os.path.relpath(f, folder))
                 self.status_label.config(
                     text=f"✓ Folder: {os.path.basename(folder)} ({len(files)} file(s))",
                     foreground='green'
@@ -322,8 +314,7 @@ class FileUploadFrame:
                 messagebox.showwarning(
                     "No Files Found",
                     f"No supported files found in folder:\n{folder}\n\n"
-                    f"Supported formats: {', '.join(SUPPORTED_FORMATS)}\n\n"
-                    f"Items in folder: {len(all_items)}"
+                    f"Supported formats: {', '.join(SUPPORTED_FORMATS)}"
                 )
         else:
             files = filedialog.askopenfilenames(
@@ -333,6 +324,8 @@ class FileUploadFrame:
                     ("CSV files", "*.csv"),
                     ("Excel files", "*.xlsx *.xls"),
                     ("Text files", "*.txt"),
+                    ("AIA/ANDI files", "*.cdf"),
+                    ("AnIML files", "*.animl"),
                     ("All files", "*.*")
                 ]
             )
@@ -350,6 +343,7 @@ class FileUploadFrame:
     def _clear_selection(self):
         """Clear selected files"""
         self.selected_files = []
+        self.selected_folder = None
         self.file_listbox.delete(0, tk.END)
         self.status_label.config(text="No files selected", foreground='gray')
         self._clear_preview()
@@ -426,6 +420,10 @@ class FileUploadFrame:
         """Get list of selected file paths"""
         return self.selected_files
     
+    def get_selected_folder(self):
+        """Get the selected root folder (folder mode only)"""
+        return self.selected_folder
+    
     def is_folder_mode(self):
         """Check if in folder mode"""
         return self.folder_mode
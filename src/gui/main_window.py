@@ -6,6 +6,10 @@ from gui.peak_config_frame import PeakConfigFrame
 from gui.processing_frame import ProcessingFrame
 from gui.results_frame import ResultsFrame
 from gui.manual_analysis_frame import ManualAnalysisFrame
+from core.worker_pool import WorkerPool
+from core.result_cache import ResultCache
+from core.correction_cache import CorrectionCache
+from config.settings import WORKER_POOL_SIZE, RESULT_CACHE_SIZE, CORRECTION_CACHE_BYTES
 import os
 from tkinter import messagebox
 
@@ -16,13 +20,20 @@ class MainWindow(ttk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
         
+        # Worker processes are started on the first run and reused afterwards
+        self.worker_pool = WorkerPool(WORKER_POOL_SIZE)
+        self.result_cache = ResultCache(RESULT_CACHE_SIZE)
+        # Corrected traces shared by the peak config, processing and manual analysis tabs
+        self.correction_cache = CorrectionCache(CORRECTION_CACHE_BYTES)
+        self.winfo_toplevel().protocol("WM_DELETE_WINDOW", self._on_close)
+        
         # Create notebook (tabs)
         self.notebook = ttk.Notebook(self)
         self.notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
         # Create frames for each tab
         self.file_upload_frame = FileUploadFrame(self.notebook)
-        self.peak_config_frame = PeakConfigFrame(self.notebook)
+        self.peak_config_frame = PeakConfigFrame(self.notebook, correction_cache=self.correction_cache)
         self.results_frame = ResultsFrame(self.notebook)
         
         # Set file upload frame reference in peak config frame
@@ -33,10 +44,12 @@ class MainWindow(ttk.Frame):
             self.notebook,
             self.file_upload_frame,
             self.peak_config_frame,
-            self.results_frame
+            self.results_frame,
+            worker_pool=self.worker_pool,
+            result_cache=self.result_cache
         )
         
-        self.manual_analysis_frame = ManualAnalysisFrame(self.notebook)
+        self.manual_analysis_frame = ManualAnalysisFrame(self.notebook, correction_cache=self.correction_cache)
         
         # Add tabs
         self.notebook.add(self.file_upload_frame.frame, text="📁 File Upload")
@@ -57,6 +70,11 @@ class MainWindow(ttk.Frame):
         # Update status bar with application info
         self.status_bar.config(text="HPLC AUC Analyzer v1.0 | Ready")
     
+    def _on_close(self):
+        """Stop worker processes and close the application"""
+        self.worker_pool.shutdown(wait=False)
+        self.winfo_toplevel().destroy()
+    
     # Add debug output at the start of batch processing
     def start_batch_processing(self):
         """Start batch processing"""
@@ -79,7 +97,7 @@ class MainWindow(ttk.Frame):
         
         # If in folder mode, get the folder path (parent directory of first file)
         if self.file_upload_frame.is_folder_mode():
-            folder_path = os.path.dirname(selected_files[0])
+            folder_path = self.file_upload_frame.get_selected_folder() or os.path.dirname(selected_files[0])
             print(f"DEBUG - Folder mode detected")
             print(f"DEBUG - Using folder path: {folder_path}")
         else:
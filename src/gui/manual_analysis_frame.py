@@ -7,16 +7,21 @@ from matplotlib.figure import Figure
 import numpy as np
 import os
 from scipy.signal import find_peaks
-from config.settings import PADDING
+from config.settings import (PADDING, BASELINE_METHODS, NOISE_METHODS, CORRECTION_CACHE_BYTES,
+                             LIVE_TAIL_INTERVAL)
 from utils.file_handler import FileHandler
+from utils.data_validator import DataValidator
+from utils.tail_reader import TailReader
 from core.auc_calculator import AUCCalculator
+from core.correction_cache import CorrectionCache
 
 
 class ManualAnalysisFrame:
     """Frame for manual peak analysis with interactive plotting"""
     
-    def __init__(self, parent):
+    def __init__(self, parent, correction_cache=None):
         self.frame = ttk.Frame(parent, padding=PADDING)
+        self.correction_cache = correction_cache or CorrectionCache(CORRECTION_CACHE_BYTES)
         self.current_file = None
         self.time_data = None
         self.signal_data = None
@@ -26,6 +31,10 @@ class ManualAnalysisFrame:
         self.file_handler = FileHandler()
         self.zoom_enabled = False
         self.peak_aucs = {}  # Store calculated AUCs
+        self.signal_line = None
+        self.tail_reader = None  # Set while following a file that is still being written
+        self._tail_job = None
+        self._live_aucs = {}  # (start, end, baseline, noise) -> AUC of windows the data has passed
         
         self._create_widgets()
     
@@ -60,6 +69,14 @@ class ManualAnalysisFrame:
             command=self._load_file
         ).pack(side=tk.LEFT, padx=5)
         
+        self.follow_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            file_row,
+            text="Follow (file still being written)",
+            variable=self.follow_var,
+            command=self._toggle_follow
+        ).pack(side=tk.LEFT, padx=5)
+        
         self.file_label = ttk.Label(file_row, text="No file loaded", foreground='gray')
         self.file_label.pack(side=tk.LEFT, padx=10)
         
@@ -101,7 +118,7 @@ class ManualAnalysisFrame:
         ttk.Combobox(
             correction_row,
             textvariable=self.baseline_var,
-            values=["None", "Linear", "Polynomial", "Als (Asymmetric Least Squares)"],
+            values=BASELINE_METHODS,
             state='readonly',
             width=20
         ).pack(side=tk.LEFT, padx=5)
@@ -111,7 +128,7 @@ class ManualAnalysisFrame:
         ttk.Combobox(
             correction_row,
             textvariable=self.noise_var,
-            values=["None", "Moving Average", "Savitzky-Golay", "Gaussian"],
+            values=NOISE_METHODS,
             state='readonly',
             width=20
         ).pack(side=tk.LEFT, padx=5)
@@ -324,10 +341,12 @@ class ManualAnalysisFrame:
         filepath = filedialog.askopenfilename(
             title="Select Data File",
             filetypes=[
-                ("All Supported", "*.csv *.txt *.xlsx *.xls"),
+                ("All Supported", "*.csv *.txt *.xlsx *.xls *.cdf *.animl"),
                 ("CSV files", "*.csv"),
                 ("Text files", "*.txt"),
                 ("Excel files", "*.xlsx *.xls"),
+                ("AIA/ANDI files", "*.cdf"),
+                ("AnIML files", "*.animl"),
                 ("All files", "*.*")
             ]
         )
@@ -335,6 +354,11 @@ class ManualAnalysisFrame:
         if not filepath:
             return
         
+        self._stop_tail()
+        if self.follow_var.get():
+            self._start_tail(filepath)
+            return
+        
         try:
             # Read file
             df = self.file_handler.read_file(filepath, self.has_header_var.get())
@@ -344,9 +368,10 @@ class ManualAnalysisFrame:
                 df, self.time_col_var.get(), self.signal_col_var.get()
             )
             
-            # Get data
-            self.time_data = df[time_col].values
-            self.signal_data = df[signal_col].values
+            # Get clean, time-sorted data
+            self.time_data, self.signal_data, _ = DataValidator.clean_dataframe(
+                df, time_col, signal_col
+            )
             self.original_signal = self.signal_data.copy()
             self.current_file = filepath
             
@@ -373,7 +398,7 @@ class ManualAnalysisFrame:
             return
         
         self.ax.clear()
-        self.ax.plot(self.time_data, self.signal_data, 'b-', linewidth=1.5, label='Signal')
+        self.signal_line, = self.ax.plot(self.time_data, self.signal_data, 'b-', linewidth=1.5, label='Signal')
         self.ax.set_xlabel('Time (min)', fontsize=11)
         self.ax.set_ylabel('Signal (AU)', fontsize=11)
         self.ax.set_title(f'Chromatogram: {os.path.basename(self.current_file) if self.current_file else ""}', 
@@ -386,30 +411,134 @@ class ManualAnalysisFrame:
         
         self.canvas.draw()
     
+    def _toggle_follow(self):
+        """Start or stop following the current file"""
+        if not self.follow_var.get():
+            self._stop_tail()
+        elif self.current_file is not None:
+            self._start_tail(self.current_file)
+    
+    def _start_tail(self, filepath):
+        """Read what the file holds so far, then poll it for appended rows"""
+        try:
+            self.tail_reader = TailReader(
+                filepath, self.has_header_var.get(), self.time_col_var.get(), self.signal_col_var.get()
+            )
+            self.tail_reader.poll()
+        except Exception as e:
+            self.tail_reader = None
+            self.follow_var.set(False)
+            messagebox.showerror("Error", f"Failed to follow file:\n{str(e)}")
+            return
+        
+        self.current_file = filepath
+        self._live_aucs.clear()
+        self._set_tail_data()
+        self.file_label.config(text=f"{os.path.basename(filepath)} (following)", foreground='green')
+        self._plot_data()
+        self._clear_peaks()
+        self._tail_job = self.frame.after(int(LIVE_TAIL_INTERVAL * 1000), self._poll_tail)
+    
+    def _stop_tail(self):
+        """Stop polling; the data read so far stays loaded"""
+        if self._tail_job is not None:
+            self.frame.after_cancel(self._tail_job)
+            self._tail_job = None
+        if self.tail_reader is not None:
+            self.tail_reader = None
+            if self.current_file:
+                self.file_label.config(text=os.path.basename(self.current_file), foreground='green')
+    
+    def _set_tail_data(self):
+        # Views of the reader's buffers: appending never copies what is plotted
+        self.time_data = self.tail_reader.time
+        self.signal_data = self.tail_reader.signal
+        self.original_signal = self.signal_data
+    
+    def _poll_tail(self):
+        """Append new rows to the plot and integrate windows the data has moved past"""
+        self._tail_job = None
+        try:
+            time, _ = self.tail_reader.poll()
+        except Exception as e:
+            self._stop_tail()
+            self.follow_var.set(False)
+            messagebox.showerror("Error", f"Stopped following file:\n{str(e)}")
+            return
+        
+        if len(time):
+            self._set_tail_data()
+            if self._update_live_aucs():
+                # A window completed: full redraw for its shading
+                self._plot_data()
+            elif self.signal_line is not None:
+                self.signal_line.set_data(self.time_data, self.signal_data)
+                self.ax.relim()
+                self.ax.autoscale_view()
+                self.canvas.draw_idle()
+        
+        self._tail_job = self.frame.after(int(LIVE_TAIL_INTERVAL * 1000), self._poll_tail)
+    
+    def _update_live_aucs(self):
+        """
+        Integrate picked windows that the data has moved past, once each
+        
+        Returns:
+            True if a window completed since the last call
+        """
+        complete_peaks = [p for p in self.picked_peaks if len(p) == 2]
+        if not complete_peaks or len(self.time_data) < 2:
+            return False
+        
+        calculator = AUCCalculator(
+            baseline_method=self.baseline_var.get(),
+            noise_method=self.noise_var.get()
+        )
+        last_time = self.time_data[-1]
+        changed = False
+        peak_aucs = {}
+        for idx, (start, end) in enumerate(complete_peaks):
+            key = (start, end, calculator.baseline_method, calculator.noise_method)
+            if key not in self._live_aucs:
+                if end >= last_time:
+                    continue
+                try:
+                    # Tail data is clean and sorted: only the window is touched
+                    self._live_aucs[key] = calculator.calculate_auc(
+                        self.time_data, self.signal_data, start, end, presorted=True
+                    )
+                except ValueError:
+                    self._live_aucs[key] = 0
+                changed = True
+            peak_aucs[f'Peak_{idx+1}'] = {'auc': self._live_aucs[key], 'start': start, 'end': end}
+        
+        if changed:
+            self.peak_aucs = peak_aucs
+            self._show_peak_aucs()
+        return changed
+    
     def _apply_corrections(self):
         """Apply baseline and noise corrections"""
         if self.signal_data is None:
             messagebox.showwarning("Warning", "No data loaded")
             return
         
+        if self.tail_reader is not None:
+            # Correcting the whole trace on every poll would defeat reading
+            # only the appended rows
+            messagebox.showinfo("Following file",
+                                "While following a file the raw signal is shown; the selected "
+                                "corrections are applied to each peak window when it is integrated.")
+            return
+        
         try:
-            from core.baseline_correction import apply_baseline_correction
-            from core.noise_correction import apply_noise_correction
-            
-            # Start with original signal
-            corrected_signal = self.original_signal.copy()
-            
-            # Apply noise correction
-            noise_method = self.noise_var.get()
-            if noise_method != "None":
-                corrected_signal = apply_noise_correction(corrected_signal, noise_method)
-            
-            # Apply baseline correction
-            baseline_method = self.baseline_var.get()
-            if baseline_method != "None":
-                corrected_signal = apply_baseline_correction(
-                    self.time_data, corrected_signal, baseline_method
-                )
+            # Always start from the original signal; results are cached per
+            # method, so toggling between methods does not recompute them
+            corrected_signal = self.correction_cache.correct(
+                self.time_data, self.original_signal,
+                noise_method=self.noise_var.get(),
+                baseline_method=self.baseline_var.get()
+            )
             
             # Update signal
             self.signal_data = corrected_signal
@@ -624,58 +753,60 @@ class ManualAnalysisFrame:
             # Create AUC calculator
             calculator = AUCCalculator(
                 baseline_method=self.baseline_var.get(),
-                noise_method=self.noise_var.get()
+                noise_method=self.noise_var.get(),
+                correction_cache=self.correction_cache
             )
             
-            # Clear tree and aucs
-            self.peaks_tree.delete(*self.peaks_tree.get_children())
-            self.peak_aucs.clear()
-            
             # Calculate each peak
-            total_auc = 0
+            self.peak_aucs.clear()
             for idx, (start, end) in enumerate(complete_peaks):
                 auc = calculator.calculate_auc(self.time_data, self.signal_data, start, end)
-                total_auc += auc
-                peak_name = f'Peak_{idx+1}'
-                self.peak_aucs[peak_name] = {
+                self.peak_aucs[f'Peak_{idx+1}'] = {
                     'auc': auc,
                     'start': start,
                     'end': end
                 }
             
-            # Insert peaks with percentages
-            for peak_name, data in self.peak_aucs.items():
-                percent = (data['auc'] / total_auc * 100) if total_auc > 0 else 0
-                self.peaks_tree.insert('', tk.END, values=(
-                    peak_name,
-                    f"{data['start']:.3f}",
-                    f"{data['end']:.3f}",
-                    f"{data['auc']:.2f}",
-                    f"{percent:.2f}%"
-                ))
-            
-            # Add total
-            self.peaks_tree.insert('', tk.END, values=(
-                'TOTAL',
-                '-',
-                '-',
-                f'{total_auc:.2f}',
-                '100.00%'
-            ), tags=('total',))
-            
-            # Style total row
-            self.peaks_tree.tag_configure('total', font=('Arial', 10, 'bold'), background='#e8f4f8')
-            
-            # Update summary
-            self.total_auc_label.config(text=f"{total_auc:.2f}")
-            self.num_peaks_label.config(text=str(len(complete_peaks)))
-            
-            # Update peak info text
-            self._update_peak_info()
+            self._show_peak_aucs()
         
         except Exception as e:
             messagebox.showerror("Error", f"Failed to calculate AUC:\n{str(e)}")
     
+    def _show_peak_aucs(self):
+        """Fill the peak table and summary from peak_aucs"""
+        self.peaks_tree.delete(*self.peaks_tree.get_children())
+        total_auc = sum(data['auc'] for data in self.peak_aucs.values())
+        
+        # Insert peaks with percentages
+        for peak_name, data in self.peak_aucs.items():
+            percent = (data['auc'] / total_auc * 100) if total_auc > 0 else 0
+            self.peaks_tree.insert('', tk.END, values=(
+                peak_name,
+                f"{data['start']:.3f}",
+                f"{data['end']:.3f}",
+                f"{data['auc']:.2f}",
+                f"{percent:.2f}%"
+            ))
+        
+        # Add total
+        self.peaks_tree.insert('', tk.END, values=(
+            'TOTAL',
+            '-',
+            '-',
+            f'{total_auc:.2f}',
+            '100.00%'
+        ), tags=('total',))
+        
+        # Style total row
+        self.peaks_tree.tag_configure('total', font=('Arial', 10, 'bold'), background='#e8f4f8')
+        
+        # Update summary
+        self.total_auc_label.config(text=f"{total_auc:.2f}")
+        self.num_peaks_label.config(text=str(len(self.peak_aucs)))
+        
+        # Update peak info text
+        self._update_peak_info()
+    
     def _update_peak_info(self):
         """Update the peak information text display"""
         self.peak_info_text.config(state=tk.NORMAL)
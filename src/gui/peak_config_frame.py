@@ -7,16 +7,18 @@ import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
 import numpy as np
-from config.settings import PADDING
+from config.settings import PADDING, BASELINE_METHODS, NOISE_METHODS, CORRECTION_CACHE_BYTES
+from core.correction_cache import CorrectionCache
 
 
 class PeakConfigFrame:
     """Frame for peak configuration"""
     
-    def __init__(self, parent):
+    def __init__(self, parent, correction_cache=None):
         self.frame = ttk.Frame(parent, padding=PADDING)
         self.peak_rows = []
         self.file_upload_frame = None  # Will be set later
+        self.correction_cache = correction_cache or CorrectionCache(CORRECTION_CACHE_BYTES)
         
         self.current_time_data = None
         self.current_signal_data = None
@@ -64,9 +66,9 @@ class PeakConfigFrame:
         baseline_combo = ttk.Combobox(
             baseline_frame,
             textvariable=self.baseline_var,
-            values=["None", "Linear", "Polynomial", "Als (Asymmetric Least Squares)"],
+            values=BASELINE_METHODS,
             state='readonly',
-            width=30
+            width=45
         )
         baseline_combo.pack(side=tk.LEFT, padx=5)
         baseline_combo.bind('<<ComboboxSelected>>', lambda e: self._safe_update_visualization())
@@ -80,7 +82,7 @@ class PeakConfigFrame:
         noise_combo = ttk.Combobox(
             noise_frame,
             textvariable=self.noise_var,
-            values=["None", "Moving Average", "Savitzky-Golay", "Gaussian"],
+            values=NOISE_METHODS,
             state='readonly',
             width=30
         )
@@ -499,9 +501,7 @@ class PeakConfigFrame:
         
         try:
             from utils.file_handler import FileHandler
-            from core.baseline_correction import apply_baseline_correction
-            from core.noise_correction import apply_noise_correction
-            
+            from utils.data_validator import DataValidator
             file_handler = FileHandler()
             
             # Load first file
@@ -514,17 +514,14 @@ class PeakConfigFrame:
                 self.file_upload_frame.get_signal_column_index()
             )
             
-            time_data = df[time_col].values
-            signal_data = df[signal_col].values
+            time_data, signal_data, _ = DataValidator.clean_dataframe(df, time_col, signal_col)
             
-            # Apply corrections
-            noise_method = self.noise_var.get()
-            if noise_method != "None":
-                signal_data = apply_noise_correction(signal_data, noise_method)
-            
-            baseline_method = self.baseline_var.get()
-            if baseline_method != "None":
-                signal_data = apply_baseline_correction(time_data, signal_data, baseline_method)
+            # Apply corrections (cached, so switching methods back and forth is instant)
+            signal_data = self.correction_cache.correct(
+                time_data, signal_data,
+                noise_method=self.noise_var.get(),
+                baseline_method=self.baseline_var.get()
+            )
             
             # Store data
             self.current_time_data = time_data
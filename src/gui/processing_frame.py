@@ -5,18 +5,24 @@ import threading
 import os
 from datetime import datetime
 from core.file_processor import FileProcessor
+from core.batch_pipeline import BatchPipeline
 from utils.export_manager import ExportManager
+from utils.profiling import RunProfiler, format_peak_rss
+from utils.stage_timing import RunTimings
 from config.settings import PADDING
 
 
 class ProcessingFrame:
     """Frame for processing controls"""
     
-    def __init__(self, parent, file_upload_frame, peak_config_frame, results_frame):
+    def __init__(self, parent, file_upload_frame, peak_config_frame, results_frame,
+                 worker_pool=None, result_cache=None):
         self.frame = ttk.Frame(parent, padding=PADDING)
         self.file_upload_frame = file_upload_frame
         self.peak_config_frame = peak_config_frame
         self.results_frame = results_frame
+        self.worker_pool = worker_pool
+        self.result_cache = result_cache
         
         self.processing = False
         self.export_manager = ExportManager()
@@ -57,6 +63,22 @@ class ProcessingFrame:
             variable=self.enable_logging_var
         ).pack(anchor=tk.W, pady=5)
         
+        # Profiling option
+        self.profile_run_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            export_frame,
+            text="Profile this run (saves cProfile/memory reports next to the results; slower)",
+            variable=self.profile_run_var
+        ).pack(anchor=tk.W, pady=5)
+        
+        # Low-memory option
+        self.low_memory_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            export_frame,
+            text="Low-memory mode (stream results to CSV, no results table)",
+            variable=self.low_memory_var
+        ).pack(anchor=tk.W, pady=5)
+        
         # Processing button
         self.process_btn = ttk.Button(
             self.frame,
@@ -122,6 +144,8 @@ class ProcessingFrame:
     
     def _process(self):
         """Process files in background"""
+        profiler = RunProfiler() if self.profile_run_var.get() else None
+        output_path = None
         try:
             # Get settings
             files = self.file_upload_frame.get_selected_files()
@@ -152,13 +176,20 @@ class ProcessingFrame:
                 included_peaks = [p['name'] for p in peaks if p['include_in_total']]
                 self._log(f"Total calculation: Sum of SELECTED peaks: {', '.join(included_peaks)}")
             
-            # Create processor
+            # Create processor (compute runs in the application's warm worker pool,
+            # except when profiling: worker processes are invisible to the profiler)
+            executor = None
+            if self.worker_pool and profiler is None:
+                executor = self.worker_pool.get_executor()
             processor = FileProcessor(
                 has_header=has_header,
                 time_col_idx=time_col,
                 signal_col_idx=signal_col,
                 baseline_method=baseline_method,
-                noise_method=noise_method
+                noise_method=noise_method,
+                pipeline_options={'compute_workers': self.worker_pool.size} if executor else None,
+                executor=executor,
+                result_cache=self.result_cache
             )
             
             peak_ranges = [(p['start'], p['end']) for p in peaks]
@@ -166,56 +197,81 @@ class ProcessingFrame:
             include_in_total = [p['include_in_total'] for p in peaks]
             
             results = []
+            processed = None
+            
+            if profiler is not None:
+                self._log("Profiling this run (compute runs in-process)")
+                profiler.start()
+            
+            def progress_callback(current, total, filename, success):
+                status = "✓" if success else "✗"
+                count = f"{current}/{total}" if total else f"{current}"
+                self.frame.after(0, self._log, f"{status} [{count}] {filename}")
             
             if is_folder:
-                folder = files[0]
+                folder = self.file_upload_frame.get_selected_folder() or files[0]
                 self._log(f"Processing folder: {folder}")
                 
-                def progress_callback(current, total, filename, success):
-                    status = "✓" if success else "✗"
-                    self.frame.after(0, self._log, f"{status} [{current}/{total}] {filename}")
-                
-                results = processor.process_folder(
-                    folder,
-                    peak_ranges,
-                    peak_names,
-                    include_in_total,
-                    custom_total_range,
-                    progress_callback
-                )
+                if self.low_memory_var.get():
+                    output_path, processed = self._stream(
+                        processor, processor.iter_folder(folder), peak_ranges, peak_names,
+                        include_in_total, custom_total_range, progress_callback,
+                        processor.common_root([folder])
+                    )
+                else:
+                    results = processor.process_folder(
+                        folder,
+                        peak_ranges,
+                        peak_names,
+                        include_in_total,
+                        custom_total_range,
+                        progress_callback
+                    )
+                    
+                    if processor.last_pipeline_stats:
+                        self._log("\n" + BatchPipeline.format_stats(processor.last_pipeline_stats))
+                    
+                    # Export
+                    output_format = self.file_upload_frame.get_export_format()
+                    output_file = self.export_manager.generate_output_filename(
+                        self.output_name_var.get(),
+                        output_format
+                    )
+                    
+                    output_path = self._export(processor, results, output_file, output_format)
                 
-                # Export
-                output_format = self.file_upload_frame.get_export_format()
-                output_file = self.export_manager.generate_output_filename(
-                    self.output_name_var.get(),
-                    output_format
+            elif self.low_memory_var.get():
+                if self.enable_logging_var.get():
+                    self._log("Low-memory mode: per-file logging is skipped, every result is in the streamed CSV")
+                output_path, processed = self._stream(
+                    processor, files, peak_ranges, peak_names,
+                    include_in_total, custom_total_range, progress_callback
                 )
-                
-                self.export_manager.export_results(results, output_file, output_format)
-                self._log(f"\n✓ Results exported to: {output_file}")
-                
+            
             else:
-                for idx, file in enumerate(files):
+                def result_callback(file, result):
                     self._log(f"Processing: {os.path.basename(file)}")
                     
-                    try:
-                        result = processor.process_single_file(
-                            file, 
-                            peak_ranges, 
-                            peak_names,
-                            include_in_total,
-                            custom_total_range
-                        )
-                        results.append(result)
-                        self._log(f"  ✓ Success")
-                        
-                        if self.enable_logging_var.get():
-                            log_file = f"{self.output_name_var.get()}_log.csv"
-                            self.export_manager.append_to_log(result, log_file)
-                            self._log(f"  → Logged to: {log_file}")
+                    if 'error' in result:
+                        self._log(f"  ✗ Error: {result['error']}")
+                        return
                     
-                    except Exception as e:
-                        self._log(f"  ✗ Error: {str(e)}")
+                    results.append(result)
+                    self._log(f"  ✓ Success")
+                    
+                    if self.enable_logging_var.get():
+                        log_file = f"{self.output_name_var.get()}_log.csv"
+                        self.export_manager.append_to_log(result, log_file)
+                        self._log(f"  → Logged to: {log_file}")
+                
+                processor.process_files(
+                    files,
+                    peak_ranges,
+                    peak_names,
+                    include_in_total,
+                    custom_total_range,
+                    result_callback=result_callback
+                )
                 
                 # Export combined
                 if results:
@@ -223,28 +279,107 @@ class ProcessingFrame:
                         self.output_name_var.get(),
                         'xlsx'
                     )
-                    self.export_manager.export_results(results, output_file, 'xlsx')
-                    self._log(f"\n✓ Results exported to: {output_file}")
+                    output_path = self._export(processor, results, output_file, 'xlsx')
+                elif processor.last_timings is not None:
+                    self._log("\n" + RunTimings.format_summary(processor.last_timings.summary()))
+            
+            if self.result_cache is not None:
+                self._log(self.result_cache.format_stats())
             
             # Update results
             if results:
                 self.frame.after(0, self.results_frame.display_results, results)
+            if processed is None:
+                processed = len(results)
             
             self._log(f"\n{'='*50}")
-            self._log(f"Processing complete! {len(results)} file(s) processed")
+            self._log(f"Processing complete! {processed} file(s) processed")
+            self._log(format_peak_rss())
             self._log(f"{'='*50}")
             
             self.frame.after(0, messagebox.showinfo, "Success", 
-                           f"Processing complete!\n{len(results)} file(s) processed")
+                           f"Processing complete!\n{processed} file(s) processed")
         
         except Exception as e:
             self._log(f"\n✗ Error: {str(e)}")
             self.frame.after(0, messagebox.showerror, "Error", f"Processing failed:\n{str(e)}")
         
         finally:
+            # Setup can fail before the profiler is started; nothing to save then
+            if profiler is not None and profiler.started:
+                self._save_profile(profiler, output_path)
             self.processing = False
             self.frame.after(0, self._processing_complete)
     
+    def _export(self, processor, results, output_file, output_format):
+        """Export results and log/save the run's stage timings next to them"""
+        timings = processor.last_timings
+        if timings is None:
+            output_path = self.export_manager.export_results(
+                results, output_file, output_format, processor.last_columns
+            )
+            self._log(f"\n✓ Results exported to: {output_path}")
+            return output_path
+        
+        with timings.run_stage('export'):
+            output_path = self.export_manager.export_results(
+                results, output_file, output_format, processor.last_columns
+            )
+        self._log(f"\n✓ Results exported to: {output_path}")
+        
+        self._log("\n" + RunTimings.format_summary(timings.summary()))
+        sidecar_path = self.export_manager.export_timings(timings, output_path)
+        if sidecar_path:
+            self._log(f"✓ Stage timings saved to: {sidecar_path}")
+        return output_path
+    
+    def _stream(self, processor, files, peak_ranges, peak_names, include_in_total,
+                custom_total_range, progress_callback, root=None):
+        """
+        Low-memory run: stream results to CSV instead of collecting them
+        
+        Returns:
+            Tuple of (output path, number of files processed)
+        """
+        output_path = self.export_manager.resolve_output_path(
+            self.export_manager.generate_output_filename(self.output_name_var.get(), 'csv'), 'csv'
+        )
+        streamed = processor.process_to_file(
+            files, peak_ranges, peak_names, output_path, include_in_total,
+            custom_total_range, progress_callback, root=root
+        )
+        if not streamed['files']:
+            os.remove(streamed['output'])
+            raise ValueError("No supported files found")
+        
+        if processor.last_pipeline_stats:
+            self._log("\n" + BatchPipeline.format_stats(processor.last_pipeline_stats))
+        self._log(f"\n✓ Results streamed to: {streamed['output']} "
+                  f"({streamed['failed']} failed, {streamed['chunks']} chunk(s))")
+        
+        timings = processor.last_timings
+        if timings is not None:
+            self._log("\n" + RunTimings.format_summary(timings.summary()))
+            sidecar_path = self.export_manager.export_timings(timings, streamed['output'])
+            if sidecar_path:
+                self._log(f"✓ Stage timings saved to: {sidecar_path}")
+        return streamed['output'], streamed['files']
+    
+    def _save_profile(self, profiler, output_path):
+        """Stop the profiler and save its reports next to the results"""
+        try:
+            profiler.stop()
+            if output_path is None:
+                # Nothing was exported (no results or an error): use the default folder
+                output_path = os.path.join(
+                    self.export_manager.get_default_save_directory(),
+                    self.export_manager.generate_output_filename(self.output_name_var.get(), 'prof')
+                )
+            for path in profiler.save(os.path.splitext(output_path)[0]):
+                self._log(f"✓ Profile saved to: {path}")
+        except Exception as e:
+            self._log(f"✗ Could not save profile: {e}")
+    
     def _processing_complete(self):
         """Clean up after processing"""
         self.progress_bar.stop()
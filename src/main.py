@@ -1,6 +1,7 @@
 """Main entry point for HPLC AUC Analyzer"""
 import sys
 import os
+import multiprocessing
 
 # Ensure the parent directory is in the path
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -51,4 +52,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # Needed for worker processes in frozen (py2app/PyInstaller) builds
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
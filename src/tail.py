@@ -0,0 +1,104 @@
+"""
+Follow an acquisition that is still being written
+
+Usage:
+    python run_tail.py FILE --peak NAME:START:END [--peak ...] [options]
+
+Only the bytes appended since the previous check are read. Each peak's AUC
+is printed as soon as the data has moved past the end of its window, and a
+summary is printed when the file stops growing (--idle-timeout) or on
+Ctrl+C.
+"""
+import argparse
+import sys
+import time as clock
+
+from batch import parse_peak
+from core.auc_calculator import AUCCalculator
+from core.streaming import StreamingIntegrator
+from utils.data_validator import DataValidator
+from utils.tail_reader import TailReader
+from config.settings import BASELINE_METHODS, NOISE_METHODS, LIVE_TAIL_INTERVAL
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='run_tail.py',
+        description='Integrate HPLC peaks of a file while the instrument is still writing it'
+    )
+    parser.add_argument('file', help='CSV/TXT file being written')
+    parser.add_argument('--peak', type=parse_peak, action='append', required=True, metavar='NAME:START:END',
+                        help='Peak window (repeatable)')
+    parser.add_argument('--baseline', choices=BASELINE_METHODS, default='None')
+    parser.add_argument('--noise', choices=NOISE_METHODS, default='None')
+    parser.add_argument('--no-header', action='store_true', help='File has no header row')
+    parser.add_argument('--time-col', type=int, default=1, help='Time column (1-based)')
+    parser.add_argument('--signal-col', type=int, default=2, help='Signal column (1-based)')
+    parser.add_argument('--interval', type=float, default=LIVE_TAIL_INTERVAL,
+                        help='Seconds between checks for new rows')
+    parser.add_argument('--idle-timeout', type=float, default=None,
+                        help='Stop once the file has not grown for this many seconds (default: run until '
+                             'every window is complete or Ctrl+C)')
+    return parser
+
+
+def follow(args, out=print):
+    """
+    Poll the file and report windows as they complete
+
+    Returns:
+        Result dictionary as from AUCCalculator.calculate_multiple_peaks
+        (windows still open at the end are integrated over the data so far)
+    """
+    peak_names = [name for name, _, _ in args.peak]
+    peak_ranges = [(start, end) for _, start, end in args.peak]
+    reader = TailReader(args.file, not args.no_header, args.time_col, args.signal_col, keep=False)
+    integrator = StreamingIntegrator(
+        AUCCalculator(baseline_method=args.baseline, noise_method=args.noise), peak_ranges
+    )
+
+    reported = set()
+    last_growth = clock.monotonic()
+    try:
+        while True:
+            time, signal = reader.poll()
+            if len(time):
+                last_growth = clock.monotonic()
+                integrator.feed(time, signal)
+                for idx in integrator.complete():
+                    if idx not in reported:
+                        reported.add(idx)
+                        auc, error = integrator.window_auc(idx)
+                        out(f"{peak_names[idx]}: {auc:.6g}" + (f" ({error})" if error else "")
+                            + f"  [t={integrator.last_time:g}]")
+            if len(reported) == len(peak_names):
+                break
+            if args.idle_timeout is not None and clock.monotonic() - last_growth > args.idle_timeout:
+                out(f"No new rows for {args.idle_timeout:g}s, stopping")
+                break
+            clock.sleep(args.interval)
+    except KeyboardInterrupt:
+        out("Stopped")
+
+    results = integrator.finish(peak_names)
+    notes = DataValidator.format_clean_report(reader.report)
+    if notes:
+        results['Cleaning_Notes'] = notes
+    return results
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        results = follow(args)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Error: {e}")
+        return 2
+    print("Summary:")
+    for key, value in results.items():
+        print(f"  {key}: {value:.6g}" if isinstance(value, float) else f"  {key}: {value}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
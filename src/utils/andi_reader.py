@@ -0,0 +1,74 @@
+"""AIA/ANDI chromatography netCDF (.cdf) files"""
+import numpy as np
+from scipy.io import netcdf_file
+
+from config.settings import ANDI_TIME_IN_MINUTES
+
+TIME_COLUMN = 'Time (min)' if ANDI_TIME_IN_MINUTES else 'Time (s)'
+SIGNAL_COLUMN = 'Signal'
+
+
+def _scalar(variables, name, default):
+    variable = variables.get(name)
+    if variable is None:
+        return default
+    value = float(np.asarray(variable.getValue()).reshape(-1)[0])
+    return value if np.isfinite(value) else default
+
+
+def _values(variable):
+    """Variable data as float64, with _FillValue/missing_value as NaN and scale_factor/add_offset applied"""
+    values = variable[:]
+    if np.ma.isMaskedArray(values):
+        values = values.astype(np.float64).filled(np.nan)
+    # The only copy: data is read straight from the memory-mapped file
+    return np.array(values, dtype=np.float64)
+
+
+def _read_trace(variables):
+    """(time in seconds, signal, None), or (None, None, error message)"""
+    if 'ordinate_values' not in variables:
+        return None, None, "Not an AIA/ANDI chromatogram: no ordinate_values variable"
+    signal = _values(variables['ordinate_values'])
+
+    retention = variables.get('raw_data_retention')
+    if retention is not None and retention.data.shape == signal.shape:
+        return _values(retention), signal, None
+
+    interval = _scalar(variables, 'actual_sampling_interval', None)
+    if interval is None or interval <= 0:
+        return None, None, "AIA/ANDI file has no valid actual_sampling_interval"
+    delay = _scalar(variables, 'actual_delay_time', 0.0)
+    return delay + interval * np.arange(len(signal), dtype=np.float64), signal, None
+
+
+def read_andi(filepath, minutes=ANDI_TIME_IN_MINUTES):
+    """
+    Read the detector trace of an AIA/ANDI chromatography file
+
+    The file is memory-mapped and only ordinate_values is copied out. Time
+    comes from raw_data_retention when the file stores one value per
+    point, and is otherwise rebuilt as actual_delay_time +
+    i * actual_sampling_interval. ANDI stores times in seconds.
+
+    Args:
+        filepath: Path to the .cdf file
+        minutes: Convert times to minutes
+
+    Returns:
+        Tuple of (time, signal) float64 arrays
+
+    Raises:
+        ValueError: If the file is not ANDI chromatography data
+    """
+    # The mapping can only be closed once nothing refers to the file's
+    # variables, so they are only touched inside _read_trace and errors
+    # are raised after closing
+    with netcdf_file(filepath, 'r', mmap=True, maskandscale=True) as f:
+        time, signal, error = _read_trace(f.variables)
+    if error is not None:
+        raise ValueError(error)
+
+    if minutes:
+        time /= 60.0
+    return time, signal
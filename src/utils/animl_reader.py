@@ -0,0 +1,171 @@
+"""AnIML (Analytical Information Markup Language) XML chromatograms"""
+import base64
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from config.settings import ANIML_TIME_IN_MINUTES
+
+# Little-endian binary layout of EncodedValueSet per Series seriesType
+ENCODED_DTYPES = {
+    'Float32': '<f4',
+    'Float64': '<f8',
+    'Int32': '<i4',
+    'Int64': '<i8',
+}
+# Numeric value elements of IndividualValueSet / StartValue / Increment
+VALUE_TAGS = {'F', 'D', 'I', 'L'}
+VALUE_SETS = {'EncodedValueSet', 'IndividualValueSet', 'AutoIncrementedValueSet'}
+TIME_NAMES = ('time', 'retention')
+SECOND_UNITS = {'s', 'sec', 'second', 'seconds'}
+TIME_UNITS = SECOND_UNITS | {'min', 'minute', 'minutes'}
+
+
+def _local(tag):
+    """Tag without its '{namespace}' prefix"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _numbers(elem):
+    """Values of the F/D/I/L children of elem, in order"""
+    return [float(child.text) for child in elem if _local(child.tag) in VALUE_TAGS]
+
+
+def _decode(elem, series_type, length):
+    """
+    Values of one value set element as a float64 array
+
+    Args:
+        elem: EncodedValueSet, IndividualValueSet or AutoIncrementedValueSet
+        series_type: seriesType of the enclosing Series (a key of ENCODED_DTYPES)
+        length: length of the enclosing SeriesSet (for auto-incremented sets
+                without endIndex)
+    """
+    tag = _local(elem.tag)
+    if tag == 'EncodedValueSet':
+        # frombuffer shares the decoded bytes; astype makes the one float64 copy
+        raw = base64.b64decode(elem.text or '')
+        return np.frombuffer(raw, dtype=ENCODED_DTYPES[series_type]).astype(np.float64)
+    if tag == 'IndividualValueSet':
+        return np.array(_numbers(elem), dtype=np.float64)
+
+    start = increment = 0.0
+    for child in elem:
+        values = _numbers(child)
+        if values and _local(child.tag) == 'StartValue':
+            start = values[0]
+        elif values and _local(child.tag) == 'Increment':
+            increment = values[0]
+    first = int(elem.get('startIndex', 0))
+    # Without endIndex the set runs to the end of the SeriesSet
+    last = int(elem.get('endIndex', length - 1))
+    return start + increment * np.arange(max(0, last - first + 1), dtype=np.float64)
+
+
+def _is_time(series):
+    name = series['name'].lower()
+    return any(key in name for key in TIME_NAMES) or series['unit'] in TIME_UNITS
+
+
+def _pick(series_list):
+    """(time series, signal series, looks like time) of a SeriesSet, or None"""
+    numeric = [s for s in series_list if s['parts']]
+    independent = [s for s in numeric if s['dependency'] == 'independent']
+    time = next((s for s in independent if _is_time(s)), None) or next(iter(independent), None)
+    if time is None:
+        time = next((s for s in numeric if _is_time(s)), None)
+    if time is None:
+        return None
+    signal = next((s for s in numeric if s is not time and s['dependency'] != 'independent'), None)
+    if signal is None:
+        return None
+    return time, signal, _is_time(time)
+
+
+def _values(series):
+    parts = sorted(series['parts'], key=lambda part: part[0])
+    return parts[0][1] if len(parts) == 1 else np.concatenate([values for _, values in parts])
+
+
+def read_animl(filepath, minutes=ANIML_TIME_IN_MINUTES):
+    """
+    Read the chromatogram of an AnIML document
+
+    The document is parsed incrementally with ElementTree.iterparse: each
+    value set is decoded as soon as its element ends and is then cleared,
+    and parsing stops at the first SeriesSet that holds a time series, so
+    only the two series end up in memory however large the document is.
+    Base64 EncodedValueSets go straight into NumPy via np.frombuffer;
+    IndividualValueSet and AutoIncrementedValueSet are also understood.
+
+    The time series is the independent series named like time (or with a
+    time unit), the signal the first dependent numeric series next to it.
+    If no SeriesSet has a recognisable time axis the first one with an
+    independent and a dependent series is used.
+
+    Args:
+        filepath: Path to the .animl file
+        minutes: Convert a time series recorded in seconds to minutes
+
+    Returns:
+        Tuple of (time, signal) float64 arrays
+
+    Raises:
+        ValueError: If no SeriesSet has a time and a signal series
+    """
+    chosen = None
+    series_list = None
+    series = None
+    length = 0
+
+    for event, elem in ET.iterparse(filepath, events=('start', 'end')):
+        tag = _local(elem.tag)
+        if event == 'start':
+            if tag == 'SeriesSet':
+                series_list = []
+                length = int(elem.get('length', 0))
+            elif tag == 'Series' and series_list is not None:
+                series = {
+                    'name': elem.get('name', ''),
+                    'dependency': elem.get('dependency', '').lower(),
+                    'type': elem.get('seriesType', ''),
+                    'unit': None,
+                    'parts': [],
+                }
+            continue
+
+        if series is not None:
+            if tag in VALUE_SETS:
+                # String, Boolean, DateTime and embedded image series are skipped
+                if series['type'] in ENCODED_DTYPES:
+                    series['parts'].append((int(elem.get('startIndex', 0)),
+                                            _decode(elem, series['type'], length)))
+                elem.clear()
+            elif tag == 'Unit':
+                series['unit'] = (elem.get('label') or '').strip().lower()
+            elif tag == 'Series':
+                series_list.append(series)
+                series = None
+                elem.clear()
+        elif tag == 'SeriesSet' and series_list is not None:
+            picked = _pick(series_list)
+            series_list = None
+            elem.clear()
+            if picked is not None and (picked[2] or chosen is None):
+                chosen = picked
+                if picked[2]:
+                    break
+        elif tag in ('ExperimentStep', 'Sample'):
+            # Completed steps and sample descriptions are not needed again
+            elem.clear()
+
+    if chosen is None:
+        raise ValueError("Not an AnIML chromatogram: no SeriesSet with time and signal series")
+    time_series, signal_series, _ = chosen
+    time, signal = _values(time_series), _values(signal_series)
+    if len(time) != len(signal):
+        raise ValueError(f"AnIML series '{time_series['name']}' has {len(time)} values "
+                         f"but '{signal_series['name']}' has {len(signal)}")
+    if minutes and time_series['unit'] in SECOND_UNITS:
+        time = time / 60.0
+    return time, signal
@@ -2,13 +2,34 @@
 import os
 import pandas as pd
 import numpy as np
+from config.settings import MIN_DATA_POINTS
 
 class DataValidator:
     """Validates data quality and integrity"""
     
+    DROP_REASONS = ('missing', 'non_numeric', 'infinite', 'duplicate_time')
+    
     @staticmethod
     def validate_dataframe(df, time_col, signal_col):
         """Validate that DataFrame has required columns and valid data"""
+        DataValidator.clean_dataframe(df, time_col, signal_col)
+        return True
+    
+    @staticmethod
+    def clean_dataframe(df, time_col, signal_col):
+        """
+        Extract clean time and signal arrays from a raw DataFrame
+        
+        The DataFrame itself is not modified.
+        
+        Args:
+            df: DataFrame
+            time_col: Time column label
+            signal_col: Signal column label
+        
+        Returns:
+            Tuple of (time, signal, report), see clean_arrays
+        """
         if df is None or df.empty:
             raise ValueError("DataFrame is empty")
         
@@ -18,26 +39,145 @@ class DataValidator:
         if signal_col not in df.columns:
             raise ValueError(f"Signal column '{signal_col}' not found")
         
-        # Check for numeric data
-        if not pd.api.types.is_numeric_dtype(df[time_col]):
-            try:
-                df[time_col] = pd.to_numeric(df[time_col], errors='coerce')
-            except:
-                raise ValueError(f"Time column '{time_col}' must contain numeric data")
+        return DataValidator.clean_arrays(df[time_col], df[signal_col])
+    
+    @staticmethod
+    def clean_arrays(time, signal):
+        """
+        Turn raw time/signal columns into arrays ready for integration
+        
+        One vectorized pass: coerce to float64, drop rows with missing,
+        non-numeric or infinite values, sort by time only if np.diff shows
+        it is needed, and drop repeated time stamps (first one wins).
         
-        if not pd.api.types.is_numeric_dtype(df[signal_col]):
-            try:
-                df[signal_col] = pd.to_numeric(df[signal_col], errors='coerce')
-            except:
-                raise ValueError(f"Signal column '{signal_col}' must contain numeric data")
+        Args:
+            time: Time values (array, list or Series)
+            signal: Signal values (array, list or Series)
         
-        # Remove NaN values
-        df = df.dropna(subset=[time_col, signal_col])
+        Returns:
+            Tuple of (time, signal, report) where time and signal are contiguous,
+            sorted, de-duplicated float64 arrays and report holds the number of
+            rows dropped per reason (DROP_REASONS), the number of decreasing time
+            steps ('non_monotonic') and a 'resorted' flag
+        """
+        report = DataValidator.new_clean_report()
+        time_arr, signal_arr = DataValidator._drop_invalid(time, signal, report)
         
-        if df.empty:
+        if len(time_arr) == 0:
             raise ValueError("No valid data points after removing NaN values")
         
-        return True
+        steps = np.diff(time_arr)
+        decreasing = int((steps < 0).sum())
+        if decreasing:
+            report['non_monotonic'] = decreasing
+            order = np.argsort(time_arr, kind='stable')
+            time_arr = time_arr[order]
+            signal_arr = signal_arr[order]
+            steps = np.diff(time_arr)
+            report['resorted'] = True
+        
+        duplicates = steps == 0
+        if duplicates.any():
+            unique = np.concatenate(([True], ~duplicates))
+            time_arr = time_arr[unique]
+            signal_arr = signal_arr[unique]
+            report['duplicate_time'] = int(duplicates.sum())
+        
+        if len(time_arr) < MIN_DATA_POINTS:
+            raise ValueError(f"At least {MIN_DATA_POINTS} valid data points are required")
+        
+        return np.ascontiguousarray(time_arr), np.ascontiguousarray(signal_arr), report
+    
+    @staticmethod
+    def clean_chunk(time, signal, report, last_time=None):
+        """
+        clean_arrays for one chunk of a file read in pieces
+        
+        Rows are dropped for the same reasons and counted into report, but
+        a chunk cannot be re-sorted against rows that were already consumed,
+        so time has to ascend through the whole file. Repeated time stamps
+        are dropped across chunk boundaries too (first one wins).
+        
+        Args:
+            time: Raw time values of the chunk
+            signal: Raw signal values of the chunk
+            report: Running report from new_clean_report() (updated in place)
+            last_time: Last time stamp kept from the previous chunk
+        
+        Returns:
+            Tuple of (time, signal) float64 arrays, possibly empty
+        
+        Raises:
+            ValueError: If time decreases
+        """
+        time_arr, signal_arr = DataValidator._drop_invalid(time, signal, report)
+        if len(time_arr) == 0:
+            return time_arr, signal_arr
+        
+        steps = np.diff(time_arr, prepend=time_arr[0] if last_time is None else last_time)
+        if (steps < 0).any():
+            idx = int(np.argmax(steps < 0))
+            previous = time_arr[idx - 1] if idx else last_time
+            raise ValueError(f"Time decreases from {previous} to {time_arr[idx]}; "
+                             f"reading in chunks needs time in ascending order")
+        
+        duplicates = steps == 0
+        if last_time is None:
+            duplicates[0] = False
+        if duplicates.any():
+            time_arr = time_arr[~duplicates]
+            signal_arr = signal_arr[~duplicates]
+            report['duplicate_time'] += int(duplicates.sum())
+        
+        return np.ascontiguousarray(time_arr), np.ascontiguousarray(signal_arr)
+    
+    @staticmethod
+    def new_clean_report():
+        """Empty report as returned by clean_arrays"""
+        report = {reason: 0 for reason in DataValidator.DROP_REASONS}
+        report.update({'non_monotonic': 0, 'resorted': False})
+        return report
+    
+    @staticmethod
+    def _drop_invalid(time, signal, report):
+        """Coerce to float64 and drop missing, non-numeric and infinite rows, counting them in report"""
+        time_arr, time_missing = DataValidator._to_float(time)
+        signal_arr, signal_missing = DataValidator._to_float(signal)
+        
+        if len(time_arr) != len(signal_arr):
+            raise ValueError(f"Time and signal lengths differ ({len(time_arr)} vs {len(signal_arr)})")
+        
+        missing = time_missing | signal_missing
+        not_numeric = (np.isnan(time_arr) | np.isnan(signal_arr)) & ~missing
+        infinite = np.isinf(time_arr) | np.isinf(signal_arr)
+        keep = ~(missing | not_numeric | infinite)
+        
+        report['missing'] += int(missing.sum())
+        report['non_numeric'] += int(not_numeric.sum())
+        report['infinite'] += int(infinite.sum())
+        
+        if not keep.all():
+            time_arr = time_arr[keep]
+            signal_arr = signal_arr[keep]
+        return time_arr, signal_arr
+    
+    @staticmethod
+    def _to_float(values):
+        """Coerce values to float64; returns (array, mask of originally missing values)"""
+        series = values if isinstance(values, pd.Series) else pd.Series(np.asarray(values))
+        missing = series.isna().to_numpy()
+        if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            series = pd.to_numeric(series, errors='coerce')
+        return series.to_numpy(dtype=np.float64, na_value=np.nan), missing
+    
+    @staticmethod
+    def format_clean_report(report):
+        """Summarize a clean_arrays report, e.g. 'missing=3, resorted' ('' if clean)"""
+        notes = [f"{reason}={report[reason]}" for reason in DataValidator.DROP_REASONS
+                 if report.get(reason)]
+        if report.get('resorted'):
+            notes.append('resorted')
+        return ', '.join(notes)
     
     @staticmethod
     def validate_peak_range(df, time_col, xi, xf):
@@ -56,23 +196,84 @@ class DataValidator:
     @staticmethod
     def check_data_quality(df, time_col, signal_col):
         """Check data quality and return warnings"""
+        time, signal, report = DataValidator.clean_dataframe(df, time_col, signal_col)
+        return DataValidator.quality_warnings(
+            DataValidator.quality_metrics(time, signal, report)
+        )
+    
+    @staticmethod
+    def quality_metrics(time, signal, clean_report=None, saturation_run=3):
+        """
+        Vectorized data-quality metrics for one trace
+        
+        Args:
+            time: Clean time array (from clean_arrays)
+            signal: Clean signal array
+            clean_report: Report from clean_arrays, for duplicate and
+                          non-monotonic counts in the raw data
+            saturation_run: Minimum number of consecutive samples at the
+                            signal maximum that counts as a saturation plateau
+        
+        Returns:
+            Dictionary of metrics
+        """
+        clean_report = clean_report or {}
+        steps = np.diff(time)
+        dt_median = float(np.median(steps)) if len(steps) else 0.0
+        dt_mean = float(steps.mean()) if len(steps) else 0.0
+        
+        # Plateaus of consecutive samples stuck at the maximum (detector saturation)
+        peak = signal.max()
+        at_max = signal >= peak - 1e-9 * max(abs(peak), 1.0)
+        edges = np.diff(np.concatenate(([0], at_max.astype(np.int8), [0])))
+        run_lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+        plateaus = run_lengths[run_lengths >= saturation_run]
+        
+        # Robust noise estimate: MAD of second differences (removes slow drift and peaks)
+        if len(signal) > 2:
+            second = np.diff(signal, 2)
+            mad = np.median(np.abs(second - np.median(second)))
+            noise = float(1.4826 * mad / np.sqrt(6.0))
+        else:
+            noise = 0.0
+        
+        return {
+            'points': int(len(time)),
+            'dt_median': dt_median,
+            'dt_min': float(steps.min()) if len(steps) else 0.0,
+            'dt_max': float(steps.max()) if len(steps) else 0.0,
+            'dt_cv': float(steps.std() / dt_mean) if dt_mean > 0 else 0.0,
+            'duplicate_time': int(clean_report.get('duplicate_time', 0)),
+            'non_monotonic': int(clean_report.get('non_monotonic', 0)),
+            'negative_fraction': float(np.count_nonzero(signal < 0) / len(signal)),
+            'saturation_plateaus': int(len(plateaus)),
+            'saturated_points': int(plateaus.sum()),
+            'noise_sigma': noise
+        }
+    
+    @staticmethod
+    def quality_warnings(metrics):
+        """Turn quality metrics into human-readable warnings"""
         warnings = []
         
-        # Check for duplicate time values
-        if df[time_col].duplicated().any():
+        if metrics['duplicate_time']:
             warnings.append("Duplicate time values detected")
         
-        # Check for negative signals
-        if (df[signal_col] < 0).any():
+        if metrics['non_monotonic']:
+            warnings.append("Time values are not monotonic")
+        
+        if metrics['negative_fraction'] > 0:
             warnings.append("Negative signal values detected")
         
-        # Check data density
-        time_range = df[time_col].max() - df[time_col].min()
-        num_points = len(df)
-        avg_spacing = time_range / num_points if num_points > 1 else 0
+        if metrics['saturation_plateaus']:
+            warnings.append(f"Possible detector saturation: {metrics['saturated_points']} point(s) at maximum")
+        
+        if metrics['dt_cv'] > 0.05:
+            warnings.append(f"Irregular sampling: interval CV = {metrics['dt_cv']:.2f}")
         
-        if avg_spacing > 0.1:  # Arbitrary threshold
-            warnings.append(f"Low data density: avg spacing = {avg_spacing:.3f}")
+        # Check data density
+        if metrics['dt_median'] > 0.1:  # Arbitrary threshold
+            warnings.append(f"Low data density: median spacing = {metrics['dt_median']:.3f}")
         
         return warnings
 
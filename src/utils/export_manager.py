@@ -28,21 +28,18 @@ class ExportManager:
         else:
             return str(home)
     
-    def export_results(self, results, output_path=None, file_format='xlsx'):
+    def resolve_output_path(self, output_path=None, file_format='xlsx'):
         """
-        Export results to file
+        Pick a writable location for an export
         
         Args:
-            results: List of result dictionaries
-            output_path: Output file path (optional, will use default location if not provided)
-            file_format: File format ('csv' or 'xlsx')
+            output_path: Requested path (optional; bare file names and
+                         unwritable folders fall back to the default folder)
+            file_format: Extension used for the generated name
             
         Returns:
-            Path to saved file
+            Path to write to
         """
-        if not results:
-            raise ValueError("No results to export")
-        
         # Determine the final output path
         if output_path is None:
             # No path provided, use default location
@@ -87,8 +84,34 @@ class ExportManager:
             output_path = os.path.join(home, filename)
             print(f"Warning: Using home directory: {output_path}")
         
+        return output_path
+    
+    def export_results(self, results, output_path=None, file_format='xlsx', columns=None):
+        """
+        Export results to file
+        
+        Args:
+            results: List of result dictionaries
+            output_path: Output file path (optional, will use default location if not provided)
+            file_format: File format ('csv' or 'xlsx')
+            columns: Columns to put first, as the low-memory writers do
+                     (FileProcessor.last_columns); the rest follow in
+                     first-seen order
+            
+        Returns:
+            Path to saved file
+        """
+        if not results:
+            raise ValueError("No results to export")
+        
+        output_path = self.resolve_output_path(output_path, file_format)
+        
         # Create DataFrame and export
         df = pd.DataFrame(results)
+        if columns:
+            leading = list(dict.fromkeys(columns))
+            known = set(leading)
+            df = df.reindex(columns=leading + [c for c in df.columns if c not in known])
         
         try:
             if file_format == 'csv':
@@ -114,6 +137,25 @@ class ExportManager:
             
             return output_path
     
+    @staticmethod
+    def export_timings(timings, export_path):
+        """
+        Write a run's stage timings as a JSON sidecar next to an export
+        
+        Args:
+            timings: RunTimings of the run that produced the export
+            export_path: Path returned by export_results
+            
+        Returns:
+            Path to the sidecar (<export name without extension>.timing.json)
+        """
+        sidecar_path = os.path.splitext(export_path)[0] + '.timing.json'
+        try:
+            return timings.write_json(sidecar_path)
+        except (OSError, PermissionError) as e:
+            print(f"Warning: Could not write timing report: {e}")
+            return None
+    
     def _export_to_excel(self, df, output_path):
         """Export to Excel with formatting"""
         try:
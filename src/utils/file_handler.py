@@ -1,14 +1,20 @@
 """File handling utilities"""
 import os
+import fnmatch
 import pandas as pd
 import numpy as np
 import csv
+from utils.andi_reader import read_andi, TIME_COLUMN, SIGNAL_COLUMN
+from utils.animl_reader import read_animl
+from config.settings import STREAM_CHUNK_ROWS
 
 
 class FileHandler:
     """Handles file reading and format detection"""
     
-    SUPPORTED_EXTENSIONS = ['.csv', '.xlsx', '.xls', '.txt']
+    SUPPORTED_EXTENSIONS = ['.csv', '.xlsx', '.xls', '.txt', '.cdf', '.animl']
+    ARRAY_EXTENSIONS = ['.cdf', '.animl']  # Formats read straight into arrays (no DataFrame parsing)
+    ARRAY_READERS = {'.cdf': read_andi, '.animl': read_animl}
     
     @staticmethod
     def detect_delimiter(filepath, num_lines=5):
@@ -91,6 +97,11 @@ class FileHandler:
                 else:
                     df = pd.read_excel(filepath, header=None, engine='openpyxl' if ext == '.xlsx' else None)
             
+            elif ext in FileHandler.ARRAY_EXTENSIONS:
+                # AIA/ANDI netCDF and AnIML: named variables/series, no header row
+                time, signal = FileHandler.ARRAY_READERS[ext](filepath)
+                df = pd.DataFrame({TIME_COLUMN: time, SIGNAL_COLUMN: signal})
+            
             elif ext == '.txt':
                 # Detect delimiter for text files
                 delimiter = FileHandler.detect_delimiter(filepath)
@@ -111,6 +122,92 @@ class FileHandler:
         except Exception as e:
             raise Exception(f"Error reading file {filepath}: {str(e)}")
     
+    @staticmethod
+    def read_arrays(filepath):
+        """
+        Read time and signal of an array format (ARRAY_EXTENSIONS) without a DataFrame
+        
+        Returns:
+            Tuple of (time, signal) float64 arrays, not yet cleaned
+        """
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"File not found: {filepath}")
+        
+        ext = os.path.splitext(filepath)[1].lower()
+        if ext not in FileHandler.ARRAY_EXTENSIONS:
+            raise ValueError(f"Not an array format: {ext}")
+        
+        try:
+            return FileHandler.ARRAY_READERS[ext](filepath)
+        except Exception as e:
+            raise Exception(f"Error reading file {filepath}: {str(e)}")
+    
+    @staticmethod
+    def read_header(filepath, has_header=True):
+        """Return an empty DataFrame with the file's columns (for detect_columns)"""
+        ext = os.path.splitext(filepath)[1].lower()
+        if ext not in FileHandler.SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported file format: {ext}")
+        header = 0 if has_header else None
+        if ext in FileHandler.ARRAY_EXTENSIONS:
+            return pd.DataFrame(columns=[TIME_COLUMN, SIGNAL_COLUMN])
+        
+        try:
+            if ext in ['.xlsx', '.xls']:
+                return pd.read_excel(filepath, header=header, nrows=0,
+                                     engine='openpyxl' if ext == '.xlsx' else None)
+            delimiter = FileHandler.detect_delimiter(filepath)
+            return pd.read_csv(filepath, sep=delimiter, header=header, nrows=0,
+                               engine=FileHandler.csv_engine(delimiter))
+        except Exception as e:
+            raise Exception(f"Error reading file {filepath}: {str(e)}")
+    
+    @staticmethod
+    def iter_chunks(filepath, has_header=True, chunk_rows=STREAM_CHUNK_ROWS, usecols=None):
+        """
+        Read a data file as a sequence of DataFrames of at most chunk_rows rows
+        
+        CSV/TXT files are parsed incrementally (C parser where the delimiter
+        allows it), so memory depends on chunk_rows rather than the file
+        size. Excel workbooks and .cdf/.animl files are not parsed in pieces
+        and arrive as a single chunk.
+        
+        Args:
+            filepath: Path to file
+            has_header: Whether file has header row
+            chunk_rows: Rows per chunk
+            usecols: Only parse these columns (labels from read_header)
+        
+        Yields:
+            DataFrames with completely empty rows removed
+        """
+        if not os.path.exists(filepath):
+            raise FileNotFoundError(f"File not found: {filepath}")
+        
+        ext = os.path.splitext(filepath)[1].lower()
+        if ext in ['.xlsx', '.xls'] + FileHandler.ARRAY_EXTENSIONS:
+            df = FileHandler.read_file(filepath, has_header)
+            yield df if usecols is None else df[list(dict.fromkeys(usecols))]
+            return
+        if ext not in FileHandler.SUPPORTED_EXTENSIONS:
+            raise ValueError(f"Unsupported file format: {ext}")
+        
+        delimiter = FileHandler.detect_delimiter(filepath)
+        try:
+            reader = pd.read_csv(filepath, sep=delimiter, header=0 if has_header else None,
+                                 usecols=usecols, chunksize=chunk_rows,
+                                 engine=FileHandler.csv_engine(delimiter))
+            with reader:
+                for chunk in reader:
+                    yield chunk.dropna(how='all')
+        except Exception as e:
+            raise Exception(f"Error reading file {filepath}: {str(e)}")
+    
+    @staticmethod
+    def csv_engine(delimiter):
+        """pandas' C parser handles single-character and whitespace delimiters"""
+        return 'c' if len(delimiter) == 1 or delimiter == r'\s+' else 'python'
+    
     @staticmethod
     def detect_columns(df, time_col_idx=1, signal_col_idx=2):
         """
@@ -167,6 +264,30 @@ class FileHandler:
     @staticmethod
     def get_files_from_folder(folder_path, extensions=None):
         """Get all supported files from a folder"""
+        return list(FileHandler.iter_files(folder_path, extensions, recursive=False))
+    
+    @staticmethod
+    def iter_files(folder_path, extensions=None, recursive=True, include=None,
+                   exclude=None, min_mtime=None, max_mtime=None):
+        """
+        Lazily yield supported files below a folder
+        
+        Directories are walked depth-first with os.scandir and the entries of
+        each directory are visited in name order, so the output order is stable
+        between runs without the whole tree being listed up front.
+        
+        Args:
+            folder_path: Root folder
+            extensions: Allowed extensions (defaults to SUPPORTED_EXTENSIONS)
+            recursive: Descend into sub-folders
+            include: Glob or list of globs; a file must match one of them
+            exclude: Glob or list of globs; matching files and folders are skipped
+            min_mtime: Skip files modified before this timestamp (seconds)
+            max_mtime: Skip files modified after this timestamp (seconds)
+        
+        Yields:
+            File paths (sub-folders that cannot be listed are skipped with a warning)
+        """
         if extensions is None:
             extensions = FileHandler.SUPPORTED_EXTENSIONS
         
@@ -176,12 +297,64 @@ class FileHandler:
         if not os.path.isdir(folder_path):
             raise ValueError(f"Not a directory: {folder_path}")
         
-        files = []
-        for file in os.listdir(folder_path):
-            if any(file.lower().endswith(ext) for ext in extensions):
-                files.append(os.path.join(folder_path, file))
+        extensions = {ext.lower() for ext in extensions}
+        include = [include] if isinstance(include, str) else list(include or [])
+        exclude = [exclude] if isinstance(exclude, str) else list(exclude or [])
+        check_mtime = min_mtime is not None or max_mtime is not None
+        
+        def matches(patterns, rel_path, name):
+            return any(
+                fnmatch.fnmatch(rel_path, pattern) or fnmatch.fnmatch(name, pattern)
+                for pattern in patterns
+            )
+        
+        def walk(directory, rel_dir):
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError as e:
+                if not rel_dir:
+                    raise
+                # One unreadable sub-folder should not end the whole scan
+                print(f"Warning: Skipping unreadable folder {directory}: {e}")
+                return
+            
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                
+                if exclude and matches(exclude, rel_path, entry.name):
+                    continue
+                
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive:
+                            yield from walk(entry.path, rel_path)
+                        continue
+                    
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                
+                if os.path.splitext(entry.name)[1].lower() not in extensions:
+                    continue
+                
+                if include and not matches(include, rel_path, entry.name):
+                    continue
+                
+                if check_mtime:
+                    try:
+                        mtime = entry.stat().st_mtime
+                    except OSError:
+                        continue
+                    if min_mtime is not None and mtime < min_mtime:
+                        continue
+                    if max_mtime is not None and mtime > max_mtime:
+                        continue
+                
+                yield entry.path
         
-        return sorted(files)
+        return walk(folder_path, '')
     
     @staticmethod
     def validate_file(filepath):
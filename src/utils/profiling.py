@@ -0,0 +1,224 @@
+"""cProfile and tracemalloc capture for a whole processing run"""
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from config.settings import PROFILE_TOP_ENTRIES, PROFILE_TRACEMALLOC_FRAMES, PROFILE_SNAPSHOT_INTERVAL
+
+
+def peak_rss():
+    """
+    Peak resident set size of this process in bytes
+
+    Worker processes are not included. Returns None when neither the
+    resource module nor psutil is available.
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+        return peak if sys.platform == 'darwin' else peak * 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, 'peak_wset', info.rss)
+
+
+def format_peak_rss():
+    """Peak RSS for the processing log"""
+    peak = peak_rss()
+    return "Peak RSS: unavailable" if peak is None else f"Peak RSS: {peak / 1e6:.1f} MB"
+
+
+class RunProfiler:
+    """
+    Profile everything that happens between start() and stop()
+
+    cProfile only sees the thread that enabled it, so every thread started
+    while the profiler runs (the batch pipeline's readers and compute
+    workers) gets its own profile, merged into one set of stats at the end.
+    Allocations are traced in all threads by tracemalloc; a sampler thread
+    keeps a snapshot from the moment traced memory was highest, which is
+    what matters for out-of-memory reports. Work done in worker processes
+    is not captured.
+
+    Example:
+        profiler = RunProfiler()
+        profiler.start()
+        ... process and export ...
+        profiler.stop()
+        profiler.save('/path/to/hplc_results_20250101_120000')
+    """
+
+    def __init__(self, top=PROFILE_TOP_ENTRIES, frames=PROFILE_TRACEMALLOC_FRAMES,
+                 snapshot_interval=PROFILE_SNAPSHOT_INTERVAL):
+        """
+        Initialize RunProfiler
+
+        Args:
+            top: Number of functions/allocation sites in the text reports
+            frames: Stack frames stored per traced allocation
+            snapshot_interval: Seconds between checks for a new memory high
+        """
+        self.top = top
+        self.frames = frames
+        self.snapshot_interval = snapshot_interval
+        self._profile = None
+        self._thread_profiles = []
+        self._lock = threading.Lock()
+        self._start_snapshot = None
+        self._end_snapshot = None
+        self._peak_snapshot = None
+        self._peak_snapshot_size = 0
+        self._peak_snapshot_time = 0.0
+        self._started_tracing = False
+        self._stop_sampler = threading.Event()
+        self._sampler = None
+        self._started = 0.0
+        self.peak_memory = 0
+
+    def _profile_thread(self, frame, event, arg):
+        # Installed with threading.setprofile: runs on the first event of
+        # each new thread, then hands the thread over to its own profile
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+: one profiler already covers every thread
+            return
+        with self._lock:
+            self._thread_profiles.append(profile)
+
+    def _sample(self):
+        # Snapshots are expensive, so only take one when memory has grown
+        # by more than 10% over the last kept snapshot
+        while not self._stop_sampler.wait(self.snapshot_interval):
+            current = tracemalloc.get_traced_memory()[0]
+            if current > 1.1 * self._peak_snapshot_size:
+                self._peak_snapshot = tracemalloc.take_snapshot()
+                self._peak_snapshot_size = current
+                self._peak_snapshot_time = time.perf_counter() - self._started
+
+    @property
+    def started(self):
+        """Whether start() was called (stop() and the reports need it)"""
+        return self._profile is not None
+
+    def start(self):
+        """Start profiling the calling thread and all threads started from now on"""
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(self.frames)
+        tracemalloc.reset_peak()
+        self._start_snapshot = tracemalloc.take_snapshot()
+        self._peak_snapshot_size = tracemalloc.get_traced_memory()[0]
+        self._started = time.perf_counter()
+
+        # Started before the thread hook so the sampler is not profiled
+        self._stop_sampler.clear()
+        self._sampler = threading.Thread(target=self._sample, name='RunProfiler-sampler', daemon=True)
+        self._sampler.start()
+
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        threading.setprofile(self._profile_thread)
+
+    def stop(self):
+        """Stop profiling and take the final allocation snapshot"""
+        threading.setprofile(None)
+        self._profile.disable()
+        self._stop_sampler.set()
+        self._sampler.join()
+
+        self._end_snapshot = tracemalloc.take_snapshot()
+        self.peak_memory = tracemalloc.get_traced_memory()[1]
+        if self._started_tracing:
+            tracemalloc.stop()
+
+    def stats(self):
+        """Merged pstats.Stats of the calling thread and all worker threads"""
+        stats = pstats.Stats(self._profile)
+        with self._lock:
+            for profile in self._thread_profiles:
+                try:
+                    stats.add(profile)
+                except TypeError:
+                    # Thread started but never made a call
+                    pass
+        return stats
+
+    def format_profile(self, sort='cumulative'):
+        """Text report of the top functions"""
+        stream = io.StringIO()
+        stats = self.stats()
+        stats.stream = stream
+        stats.sort_stats(sort).print_stats(self.top)
+        return stream.getvalue()
+
+    def format_allocations(self):
+        """Text report of the top allocation sites"""
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__),
+                   tracemalloc.Filter(False, '<frozen importlib._bootstrap>')]
+        start = self._start_snapshot.filter_traces(filters)
+        end = self._end_snapshot.filter_traces(filters)
+
+        lines = [f"Peak traced memory: {self.peak_memory / 1e6:.1f} MB", ""]
+        peak = end
+        if self._peak_snapshot is not None:
+            peak = self._peak_snapshot.filter_traces(filters)
+            lines.append(f"Top {self.top} allocation sites at the memory high "
+                         f"({self._peak_snapshot_size / 1e6:.1f} MB, {self._peak_snapshot_time:.1f}s into the run):")
+            for stat in peak.statistics('lineno')[:self.top]:
+                lines.append(f"  {stat}")
+            lines.append("")
+
+        lines.append(f"Top {self.top} allocation sites still held at the end of the run:")
+        for stat in end.statistics('lineno')[:self.top]:
+            lines.append(f"  {stat}")
+
+        lines += ["", f"Top {self.top} changes since the start of the run:"]
+        for stat in end.compare_to(start, 'lineno')[:self.top]:
+            lines.append(f"  {stat}")
+
+        lines += ["", "Largest allocation site at the memory high, with its stack:"]
+        largest = peak.statistics('traceback')[:1]
+        for stat in largest:
+            lines.append(f"  {stat.count} blocks, {stat.size / 1e6:.1f} MB")
+            lines.extend(f"    {line}" for line in stat.traceback.format())
+        return "\n".join(lines)
+
+    def save(self, base_path):
+        """
+        Write the profile next to the results
+
+        Args:
+            base_path: Output path without extension (e.g. the export file's)
+
+        Returns:
+            List of written paths: <base>.prof (load with pstats or
+            snakeviz), <base>.profile.txt and <base>.memory.txt
+        """
+        prof_path = base_path + '.prof'
+        self.stats().dump_stats(prof_path)
+
+        text_path = base_path + '.profile.txt'
+        with open(text_path, 'w') as f:
+            f.write(self.format_profile('cumulative'))
+            f.write(self.format_profile('tottime'))
+
+        memory_path = base_path + '.memory.txt'
+        with open(memory_path, 'w') as f:
+            f.write(self.format_allocations())
+
+        return [prof_path, text_path, memory_path]
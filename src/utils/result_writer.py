@@ -0,0 +1,166 @@
+"""Write result dictionaries to disk in chunks instead of keeping them in memory"""
+import csv
+import math
+from abc import ABC, abstractmethod
+import os
+import shutil
+import sqlite3
+
+from config.settings import LOW_MEMORY_CHUNK_ROWS
+
+STREAM_FORMATS = {'.csv': 'csv', '.sqlite': 'sqlite', '.db': 'sqlite'}
+
+
+def _plain(value):
+    """NumPy scalars -> Python values (sqlite3 rejects np.int64)"""
+    return value.item() if hasattr(value, 'item') else value
+
+
+class _ResultWriter(ABC):
+    """
+    Buffers up to chunk_size results, then writes them out
+
+    Result dictionaries do not all have the same keys (failed files only
+    carry filename and error), so the column list starts from the given
+    columns (see AUCCalculator.result_columns) and grows as new keys
+    appear, in first-seen order.
+    """
+
+    def __init__(self, path, chunk_size=LOW_MEMORY_CHUNK_ROWS, columns=None):
+        self.path = path
+        self.chunk_size = max(1, int(chunk_size))
+        self.columns = list(dict.fromkeys(columns or []))
+        self._known = set(self.columns)
+        self._buffer = []
+        self.rows_written = 0
+        self.chunks_written = 0
+
+    def write(self, result):
+        """Add one result (flushed once the chunk is full)"""
+        self._buffer.append(result)
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered results"""
+        if not self._buffer:
+            return
+        new_columns = []
+        for result in self._buffer:
+            for key in result:
+                if key not in self._known:
+                    self._known.add(key)
+                    new_columns.append(key)
+        self.columns.extend(new_columns)
+        self._write_chunk(self._buffer, new_columns)
+        self.rows_written += len(self._buffer)
+        self.chunks_written += 1
+        self._buffer = []
+
+    @abstractmethod
+    def _write_chunk(self, results, new_columns):
+        """Write one chunk; new_columns were appended to self.columns for it"""
+
+    def close(self):
+        """Flush and finish the file; returns its path"""
+        self.flush()
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class CSVResultWriter(_ResultWriter):
+    """
+    Streams results to CSV
+
+    Rows go to '<path>.part' as they come; the header is only final once
+    every column has been seen, so close() writes it followed by the rows.
+    Columns are only ever appended, so earlier rows simply end early and
+    read back as empty (NaN) cells.
+    """
+
+    def __init__(self, path, chunk_size=LOW_MEMORY_CHUNK_ROWS, columns=None):
+        super().__init__(path, chunk_size, columns)
+        self._part_path = path + '.part'
+        self._part = open(self._part_path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._part)
+
+    @staticmethod
+    def _cell(value):
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return ''
+        return value
+
+    def _write_chunk(self, results, new_columns):
+        self._writer.writerows([self._cell(result.get(column)) for column in self.columns]
+                               for result in results)
+
+    def close(self):
+        self.flush()
+        if self._part.closed:
+            return self.path
+        self._part.close()
+        with open(self.path, 'w', newline='', encoding='utf-8') as out:
+            csv.writer(out).writerow(self.columns)
+            with open(self._part_path, 'r', newline='', encoding='utf-8') as part:
+                shutil.copyfileobj(part, out, 1 << 20)
+        os.remove(self._part_path)
+        return self.path
+
+
+class SQLiteResultWriter(_ResultWriter):
+    """Streams results into the 'results' table of an SQLite database (one transaction per chunk)"""
+
+    TABLE = 'results'
+
+    def __init__(self, path, chunk_size=LOW_MEMORY_CHUNK_ROWS, columns=None):
+        super().__init__(path, chunk_size, columns)
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(f'DROP TABLE IF EXISTS {self.TABLE}')
+        self._created = False
+
+    @staticmethod
+    def _quote(name):
+        return '"' + str(name).replace('"', '""') + '"'
+
+    def _write_chunk(self, results, new_columns):
+        with self._connection:
+            if not self._created:
+                columns = ', '.join(self._quote(c) for c in self.columns)
+                self._connection.execute(f'CREATE TABLE {self.TABLE} ({columns})')
+                self._created = True
+            else:
+                for column in new_columns:
+                    self._connection.execute(f'ALTER TABLE {self.TABLE} ADD COLUMN {self._quote(column)}')
+            placeholders = ', '.join('?' * len(self.columns))
+            names = ', '.join(self._quote(c) for c in self.columns)
+            self._connection.executemany(
+                f'INSERT INTO {self.TABLE} ({names}) VALUES ({placeholders})',
+                [[_plain(result.get(column)) for column in self.columns] for result in results]
+            )
+
+    def close(self):
+        self.flush()
+        self._connection.close()
+        return self.path
+
+
+def open_result_writer(path, chunk_size=LOW_MEMORY_CHUNK_ROWS, columns=None):
+    """
+    Writer for a path ending in .csv, .sqlite or .db, with columns first
+
+    Raises:
+        ValueError: For other extensions (Excel files cannot be appended to
+                    without holding the workbook in memory)
+    """
+    file_format = STREAM_FORMATS.get(os.path.splitext(path)[1].lower())
+    if file_format == 'csv':
+        return CSVResultWriter(path, chunk_size, columns)
+    if file_format == 'sqlite':
+        return SQLiteResultWriter(path, chunk_size, columns)
+    raise ValueError(f"Low-memory mode writes .csv or .sqlite/.db files, not {os.path.basename(path)}")
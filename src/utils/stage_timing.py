@@ -0,0 +1,324 @@
+"""Per-stage wall/CPU timing of batch runs"""
+import heapq
+import itertools
+import json
+import threading
+import time
+from array import array
+
+import numpy as np
+
+_local = threading.local()
+
+
+class _NullStage:
+    """Context manager that does nothing (timing disabled or no active file)"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ('record', 'name', 'wall', 'cpu')
+
+    def __init__(self, record, name):
+        self.record = record
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.record.add(self.name, time.perf_counter() - self.wall, time.thread_time() - self.cpu)
+        return False
+
+
+def stage(name):
+    """
+    Time a block against the file being processed in this thread
+
+    Example:
+        with stage('baseline'):
+            corrected = ...
+
+    Costs one thread-local lookup when no file is active (timing disabled,
+    or code called outside a batch run).
+    """
+    record = getattr(_local, 'record', None)
+    if record is None:
+        return _NULL_STAGE
+    return _Stage(record, name)
+
+
+class _Activation:
+    __slots__ = ('record', 'previous')
+
+    def __init__(self, record):
+        self.record = record
+
+    def __enter__(self):
+        self.previous = getattr(_local, 'record', None)
+        _local.record = self.record
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.record = self.previous
+        return False
+
+
+class _SharedActivation(_Activation):
+    """Activates a scratch record whose stage times are split among several files on exit"""
+    __slots__ = ('records',)
+
+    def __init__(self, records):
+        super().__init__(FileTimings(None))
+        self.records = records
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.record = self.previous
+        share = 1.0 / len(self.records)
+        for name, (wall, cpu, calls) in self.record.stages.items():
+            for record in self.records:
+                record.add(name, wall * share, cpu * share, calls)
+        return False
+
+
+class FileTimings:
+    """Wall and CPU seconds per stage for one file"""
+    __slots__ = ('filepath', 'stages', 'bytes_read', '_lock')
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.stages = {}
+        self.bytes_read = 0
+        self._lock = threading.Lock()
+
+    def add(self, name, wall, cpu, calls=1):
+        with self._lock:
+            entry = self.stages.get(name)
+            if entry is None:
+                self.stages[name] = [wall, cpu, calls]
+            else:
+                entry[0] += wall
+                entry[1] += cpu
+                entry[2] += calls
+
+    @property
+    def wall_time(self):
+        # Nested stages (e.g. noise inside compute) are not double counted
+        # because instrumented stages never nest
+        return sum(entry[0] for entry in self.stages.values())
+
+    def to_dict(self):
+        return {
+            'file': self.filepath,
+            'bytes_read': self.bytes_read,
+            'wall_time': self.wall_time,
+            'stages': {name: {'wall': wall, 'cpu': cpu, 'calls': calls}
+                       for name, (wall, cpu, calls) in self.stages.items()}
+        }
+
+
+class RunTimings:
+    """
+    Collects FileTimings for every file of a batch run
+
+    Stages run on different threads (reader threads parse, compute workers
+    correct and integrate), so each stage activates the file's record on its
+    own thread; code underneath only calls stage(name).
+
+    With retain_files=False, finish_file() folds each finished record into
+    per-stage arrays of doubles and a short list of the slowest files, so a
+    run over hundreds of thousands of files does not keep a record object
+    per file; the summary is the same, only per_file is left out of the
+    JSON report.
+    """
+
+    def __init__(self, enabled=True, retain_files=True, slowest=10):
+        """
+        Initialize RunTimings
+
+        Args:
+            enabled: Record timings; when False every call is a no-op
+            retain_files: Keep every FileTimings record (for per_file JSON)
+            slowest: Slowest files remembered when records are folded
+        """
+        self.enabled = enabled
+        self.retain_files = retain_files
+        self.slowest = slowest
+        self.files = []
+        self.run_stages = {}
+        self.started = time.perf_counter()
+        self.wall_time = None
+        self._lock = threading.Lock()
+        self._live = {}
+        self._folded = {}
+        self._folded_slowest = []
+        self._folded_files = 0
+        self._folded_bytes = 0
+        self._sequence = itertools.count()
+
+    def file(self, filepath):
+        """Start a record for one file (None when disabled)"""
+        if not self.enabled:
+            return None
+        record = FileTimings(filepath)
+        with self._lock:
+            if self.retain_files:
+                self.files.append(record)
+            else:
+                self._live.setdefault(filepath, []).append(record)
+        return record
+
+    def finish_file(self, filepath):
+        """Fold the oldest open record of filepath (no-op when records are retained)"""
+        if not self.enabled or self.retain_files:
+            return
+        with self._lock:
+            records = self._live.get(filepath)
+            if not records:
+                return
+            record = records.pop(0)
+            if not records:
+                del self._live[filepath]
+            for name, (wall, cpu, _) in record.stages.items():
+                walls, cpus = self._folded.setdefault(name, (array('d'), array('d')))
+                walls.append(wall)
+                cpus.append(cpu)
+            self._folded_files += 1
+            self._folded_bytes += record.bytes_read
+            entry = (record.wall_time, next(self._sequence), self._slow_entry(record))
+            if len(self._folded_slowest) < self.slowest:
+                heapq.heappush(self._folded_slowest, entry)
+            else:
+                heapq.heappushpop(self._folded_slowest, entry)
+
+    @staticmethod
+    def _slow_entry(record):
+        return {'file': record.filepath, 'wall_time': record.wall_time,
+                'stages': {name: entry[0] for name, entry in record.stages.items()}}
+
+    @staticmethod
+    def activate(record):
+        """Make record the target of stage() in this thread for a block"""
+        if record is None:
+            return _NULL_STAGE
+        return _Activation(record)
+
+    @staticmethod
+    def activate_shared(records):
+        """
+        Like activate, for work done for several files in one call
+
+        Stage times are split evenly among the files' records (None entries
+        are skipped).
+        """
+        records = [record for record in records if record is not None]
+        if not records:
+            return _NULL_STAGE
+        return _SharedActivation(records)
+
+    def run_stage(self, name):
+        """Time a run-level stage such as export"""
+        if not self.enabled:
+            return _NULL_STAGE
+        record = self.run_stages.setdefault(name, FileTimings(name))
+        return _Stage(record, name)
+
+    def finish(self):
+        """Stop the run clock"""
+        self.wall_time = time.perf_counter() - self.started
+
+    def summary(self, slowest=10):
+        """
+        Summarise the run
+
+        Returns:
+            Dictionary with per-stage totals and percentiles (seconds per
+            file), the slowest files, bytes read and the run wall time
+        """
+        with self._lock:
+            files = list(self.files)
+            for records in self._live.values():
+                files.extend(records)
+            folded = {name: (np.array(walls), np.array(cpus))
+                      for name, (walls, cpus) in self._folded.items()}
+            folded_slowest = [entry for _, _, entry in self._folded_slowest]
+
+        stage_names = list(folded)
+        for record in files:
+            for name in record.stages:
+                if name not in stage_names:
+                    stage_names.append(name)
+
+        stages = {}
+        for name in stage_names:
+            folded_walls, folded_cpus = folded.get(name, (np.empty(0), np.empty(0)))
+            walls = np.concatenate([folded_walls, [r.stages[name][0] for r in files if name in r.stages]])
+            cpus = np.concatenate([folded_cpus, [r.stages[name][1] for r in files if name in r.stages]])
+            p50, p90, p99 = np.percentile(walls, [50, 90, 99])
+            stages[name] = {
+                'files': int(len(walls)),
+                'total_wall': float(walls.sum()),
+                'total_cpu': float(cpus.sum()),
+                'p50': float(p50),
+                'p90': float(p90),
+                'p99': float(p99),
+                'max': float(walls.max())
+            }
+
+        ranked = folded_slowest + [self._slow_entry(r) for r in files]
+        ranked.sort(key=lambda entry: entry['wall_time'], reverse=True)
+        return {
+            'wall_time': self.wall_time,
+            'files': len(files) + self._folded_files,
+            'bytes_read': int(sum(r.bytes_read for r in files) + self._folded_bytes),
+            'stages': stages,
+            'run_stages': {name: {'wall': record.stages[name][0], 'cpu': record.stages[name][1]}
+                           for name, record in self.run_stages.items() if name in record.stages},
+            'slowest_files': ranked[:slowest]
+        }
+
+    @staticmethod
+    def format_summary(summary):
+        """Return a text report for the processing log"""
+        if not summary or not summary['files']:
+            return "No stage timings recorded"
+
+        lines = [f"Stage timings: {summary['files']} file(s), "
+                 f"{summary['bytes_read'] / 1e6:.1f} MB read"]
+        if summary['wall_time'] is not None:
+            lines[0] += f", {summary['wall_time']:.2f}s wall"
+        lines.append(f"  {'stage':<16}{'total':>9}{'cpu':>9}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+        for name, info in summary['stages'].items():
+            lines.append(
+                f"  {name:<16}{info['total_wall']:>8.2f}s{info['total_cpu']:>8.2f}s"
+                f"{info['p50'] * 1000:>8.1f}ms{info['p90'] * 1000:>8.1f}ms"
+                f"{info['p99'] * 1000:>8.1f}ms{info['max'] * 1000:>8.1f}ms"
+            )
+        for name, info in summary['run_stages'].items():
+            lines.append(f"  {name:<16}{info['wall']:>8.2f}s{info['cpu']:>8.2f}s")
+        if summary['slowest_files']:
+            lines.append("  Slowest files:")
+            for entry in summary['slowest_files']:
+                lines.append(f"    {entry['wall_time'] * 1000:8.1f}ms  {entry['file']}")
+        return "\n".join(lines)
+
+    def write_json(self, path, slowest=10):
+        """Write the summary plus every retained per-file record as JSON"""
+        report = self.summary(slowest)
+        if self.retain_files:
+            with self._lock:
+                report['per_file'] = [record.to_dict() for record in self.files]
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return path
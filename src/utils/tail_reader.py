@@ -0,0 +1,133 @@
+"""Incremental reading of a data file that is still being written"""
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.file_handler import FileHandler
+from utils.data_validator import DataValidator
+
+
+class TailReader:
+    """
+    Follow a CSV/TXT file an instrument is appending to
+
+    Each poll() reads only the bytes added since the previous one, up to
+    the last complete line (a partly written row is picked up by the next
+    poll), and cleans them with DataValidator.clean_chunk. The delimiter,
+    header and columns are fixed from the first complete lines.
+
+    Example:
+        reader = TailReader('/data/run_0042.csv')
+        while acquiring:
+            time, signal = reader.poll()
+            ...
+    """
+
+    def __init__(self, filepath, has_header=True, time_col_idx=1, signal_col_idx=2, keep=True):
+        """
+        Initialize TailReader
+
+        Args:
+            filepath: File to follow (.csv or .txt)
+            has_header: Whether the file has a header row
+            time_col_idx: Time column index (1-based)
+            signal_col_idx: Signal column index (1-based)
+            keep: Accumulate every clean row in time/signal; with False
+                  only the rows returned by poll() are held
+        """
+        ext = os.path.splitext(filepath)[1].lower()
+        if ext not in ('.csv', '.txt'):
+            raise ValueError(f"Only CSV/TXT files can be followed while written, not {ext}")
+        self.filepath = filepath
+        self.has_header = has_header
+        self.time_col_idx = time_col_idx
+        self.signal_col_idx = signal_col_idx
+        self.keep = keep
+        self.offset = 0
+        self.last_time = None
+        self.report = DataValidator.new_clean_report()
+        self._delimiter = None
+        self._columns = None
+        self._time = np.empty(0)
+        self._signal = np.empty(0)
+        self._size = 0
+
+    @property
+    def time(self):
+        """All clean time values read so far (keep=True)"""
+        return self._time[:self._size]
+
+    @property
+    def signal(self):
+        """All clean signal values read so far (keep=True)"""
+        return self._signal[:self._size]
+
+    def poll(self):
+        """
+        Read the rows appended since the last poll
+
+        Returns:
+            Tuple of (time, signal) float64 arrays of the new clean rows
+            (empty when nothing complete was added)
+
+        Raises:
+            ValueError: If the file shrank (it was replaced or truncated;
+                        start a new reader) or time decreases
+        """
+        size = os.path.getsize(self.filepath)
+        if size < self.offset:
+            raise ValueError(f"{os.path.basename(self.filepath)} shrank from {self.offset} to {size} bytes")
+        if size == self.offset:
+            return np.empty(0), np.empty(0)
+
+        with open(self.filepath, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        end = data.rfind(b'\n')
+        if end < 0:
+            return np.empty(0), np.empty(0)
+        data = data[:end + 1]
+        self.offset += end + 1
+
+        if self._columns is None:
+            data = self._start(data)
+        if not data.strip():
+            return np.empty(0), np.empty(0)
+
+        time_pos, signal_pos = self._columns
+        df = pd.read_csv(io.BytesIO(data), sep=self._delimiter, header=None,
+                         usecols=sorted({time_pos, signal_pos}),
+                         engine=FileHandler.csv_engine(self._delimiter)).dropna(how='all')
+        time, signal = DataValidator.clean_chunk(df[time_pos], df[signal_pos], self.report, self.last_time)
+        if len(time):
+            self.last_time = time[-1]
+            if self.keep:
+                self._append(time, signal)
+        return time, signal
+
+    def _start(self, data):
+        """Fix delimiter and column positions from the first lines; returns the data rows"""
+        self._delimiter = FileHandler.detect_delimiter(self.filepath)
+        first_line, _, rest = data.partition(b'\n')
+        header = pd.read_csv(io.BytesIO(first_line + b'\n'), sep=self._delimiter,
+                             header=0 if self.has_header else None, nrows=0,
+                             engine=FileHandler.csv_engine(self._delimiter))
+        time_col, signal_col = FileHandler.detect_columns(header, self.time_col_idx, self.signal_col_idx)
+        columns = list(header.columns)
+        self._columns = (columns.index(time_col), columns.index(signal_col))
+        return rest if self.has_header else data
+
+    def _append(self, time, signal):
+        # Capacity doubles, so following a long run costs amortized O(1) per row
+        needed = self._size + len(time)
+        if needed > len(self._time):
+            capacity = max(needed, 2 * len(self._time), 1024)
+            for name in ('_time', '_signal'):
+                grown = np.empty(capacity)
+                grown[:self._size] = getattr(self, name)[:self._size]
+                setattr(self, name, grown)
+        self._time[self._size:needed] = time
+        self._signal[self._size:needed] = signal
+        self._size = needed
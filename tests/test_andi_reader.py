@@ -0,0 +1,94 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+import warnings
+
+import numpy as np
+from scipy.io import netcdf_file
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.file_processor import FileProcessor
+from utils.andi_reader import read_andi
+from utils.file_handler import FileHandler
+
+
+def write_andi(path, signal, interval=0.5, delay=6.0, retention=None, fill_value=None):
+    """Minimal AIA/ANDI chromatogram (times in seconds)"""
+    with netcdf_file(path, 'w') as f:
+        f.createDimension('point_number', len(signal))
+        values = f.createVariable('ordinate_values', 'f', ('point_number',))
+        values[:] = np.asarray(signal, dtype=np.float32)
+        if fill_value is not None:
+            values._FillValue = np.float32(fill_value)
+        for name, value in (('actual_sampling_interval', interval), ('actual_delay_time', delay)):
+            scalar = f.createVariable(name, 'f', ())
+            scalar[...] = value
+        if retention is not None:
+            times = f.createVariable('raw_data_retention', 'f', ('point_number',))
+            times[:] = np.asarray(retention, dtype=np.float32)
+
+
+class TestAndiReader(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'run.cdf')
+        self.t = np.arange(1200) * 0.5 + 6.0
+        self.signal = np.exp(-((self.t - 300) ** 2) / 200)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_time_from_sampling_interval_and_delay(self):
+        write_andi(self.path, self.signal)
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            time, signal = read_andi(self.path)
+        np.testing.assert_allclose(time, self.t / 60)
+        np.testing.assert_allclose(signal, self.signal, rtol=1e-6, atol=1e-7)
+        self.assertEqual(signal.dtype, np.float64)
+        seconds, _ = read_andi(self.path, minutes=False)
+        self.assertEqual((seconds[0], seconds[1]), (6.0, 6.5))
+
+    def test_explicit_retention_and_fill_values(self):
+        signal = self.signal.copy()
+        signal[10] = -9999
+        retention = self.t ** 1.01
+        write_andi(self.path, signal, retention=retention, fill_value=-9999)
+        time, values = read_andi(self.path)
+        np.testing.assert_allclose(time, retention.astype(np.float32) / 60)
+        self.assertTrue(np.isnan(values[10]))
+
+    def test_not_andi(self):
+        with netcdf_file(self.path, 'w') as f:
+            f.createDimension('n', 3)
+            f.createVariable('other', 'f', ('n',))[:] = [1, 2, 3]
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            with self.assertRaises(ValueError):
+                read_andi(self.path)
+
+    def test_read_file_and_pipeline(self):
+        write_andi(self.path, self.signal)
+        with open(os.path.join(self.folder.name, 'run.csv'), 'w') as f:
+            f.write('time,signal\n')
+            f.writelines(f'{a / 60},{b}\n' for a, b in zip(self.t, self.signal))
+
+        df = FileHandler.read_file(self.path)
+        self.assertEqual(FileHandler.detect_columns(df), ('Time (min)', 'Signal'))
+
+        files = list(FileHandler.iter_files(self.folder.name))
+        self.assertEqual([os.path.basename(f) for f in files], ['run.cdf', 'run.csv'])
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = FileProcessor().process_files(files, [(4.0, 6.0)], ['Main'])
+        self.assertNotIn('error', results[0])
+        self.assertAlmostEqual(results[0]['Main'], results[1]['Main'], places=6)
+        self.assertEqual(results[0]['QC_points'], 1200)
+
+
+if __name__ == '__main__':
+    unittest.main()
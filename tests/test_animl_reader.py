@@ -0,0 +1,147 @@
+import base64
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.file_processor import FileProcessor
+from utils.animl_reader import read_animl
+from utils.file_handler import FileHandler
+
+NAMESPACE = 'urn:org:astm:animl:schema:core:draft:0.90'
+
+
+def encoded(values, dtype='<f4'):
+    return f'<EncodedValueSet>{base64.b64encode(np.asarray(values, dtype=dtype).tobytes()).decode()}</EncodedValueSet>'
+
+
+def series(name, dependency, series_type, value_set, unit):
+    return (f'<Series name="{name}" seriesID="{name}" dependency="{dependency}" seriesType="{series_type}">'
+            f'{value_set}<Unit label="{unit}"><SIUnit>{unit}</SIUnit></Unit></Series>')
+
+
+def write_animl(path, series_sets):
+    """AnIML document with one ExperimentStep per (name, length, series) SeriesSet"""
+    steps = ''.join(
+        f'<ExperimentStep name="{name}"><Result><SeriesSet name="{name}" length="{length}">'
+        f'{"".join(members)}</SeriesSet></Result></ExperimentStep>'
+        for name, length, members in series_sets
+    )
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f'<?xml version="1.0" encoding="UTF-8"?><AnIML xmlns="{NAMESPACE}" version="0.90">'
+                f'<SampleSet><Sample name="S1" sampleID="S1"/></SampleSet>'
+                f'<ExperimentStepSet>{steps}</ExperimentStepSet></AnIML>')
+
+
+class TestAnimlReader(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'run.animl')
+        self.t = np.arange(1200) * 0.5 + 6.0
+        self.signal = np.exp(-((self.t - 300) ** 2) / 200)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def auto_time(self, start=6.0, increment=0.5):
+        return ('<AutoIncrementedValueSet><StartValue><F>%s</F></StartValue>'
+                '<Increment><F>%s</F></Increment></AutoIncrementedValueSet>' % (start, increment))
+
+    def test_encoded_signal_and_auto_incremented_time(self):
+        write_animl(self.path, [('Chromatogram', len(self.t), [
+            series('Time', 'independent', 'Float64', self.auto_time(), 's'),
+            series('Absorbance', 'dependent', 'Float32', encoded(self.signal), 'mAU'),
+        ])])
+        time, signal = read_animl(self.path)
+        np.testing.assert_allclose(time, self.t / 60)
+        np.testing.assert_allclose(signal, self.signal, rtol=1e-6, atol=1e-7)
+        self.assertEqual(signal.dtype, np.float64)
+        seconds, _ = read_animl(self.path, minutes=False)
+        self.assertEqual((seconds[0], seconds[1]), (6.0, 6.5))
+
+    def test_individual_values_split_value_sets_and_int_encoding(self):
+        minutes = self.t / 60
+        time_values = ''.join(f'<D>{float(v)!r}</D>' for v in minutes)
+        counts = np.round(self.signal * 1000).astype(np.int32)
+        half = len(counts) // 2
+        # Value sets may come in pieces, located by startIndex
+        signal_sets = (encoded(counts[half:], '<i4').replace('<EncodedValueSet>',
+                                                             f'<EncodedValueSet startIndex="{half}">')
+                       + encoded(counts[:half], '<i4'))
+        write_animl(self.path, [('Chromatogram', len(self.t), [
+            series('Retention Time', 'independent', 'Float64',
+                   f'<IndividualValueSet>{time_values}</IndividualValueSet>', 'min'),
+            series('Comment', 'dependent', 'String',
+                   '<IndividualValueSet><S>a</S></IndividualValueSet>', ''),
+            series('Counts', 'dependent', 'Int32', signal_sets, 'counts'),
+        ])])
+        time, signal = read_animl(self.path)
+        np.testing.assert_allclose(time, minutes)
+        np.testing.assert_array_equal(signal, counts)
+
+    def test_split_auto_incremented_set_without_end_index(self):
+        half = len(self.t) // 2
+        time_sets = (self.auto_time().replace('<AutoIncrementedValueSet>',
+                                              '<AutoIncrementedValueSet startIndex="0" endIndex="%d">' % (half - 1))
+                     + self.auto_time(start=self.t[half]).replace('<AutoIncrementedValueSet>',
+                                                                  '<AutoIncrementedValueSet startIndex="%d">' % half))
+        write_animl(self.path, [('Chromatogram', len(self.t), [
+            series('Time', 'independent', 'Float64', time_sets, 's'),
+            series('Absorbance', 'dependent', 'Float64', encoded(self.signal, '<f8'), 'mAU'),
+        ])])
+        time, _ = read_animl(self.path, minutes=False)
+        np.testing.assert_allclose(time, self.t)
+
+    def test_skips_series_sets_without_time_axis(self):
+        wavelengths = np.arange(200, 400, 2.0)
+        write_animl(self.path, [
+            ('Spectrum', len(wavelengths), [
+                series('Wavelength', 'independent', 'Float32', encoded(wavelengths), 'nm'),
+                series('Absorbance', 'dependent', 'Float32', encoded(np.ones_like(wavelengths)), 'mAU'),
+            ]),
+            ('Chromatogram', len(self.t), [
+                series('Time', 'independent', 'Float64', self.auto_time(), 's'),
+                series('Absorbance', 'dependent', 'Float64', encoded(self.signal, '<f8'), 'mAU'),
+            ]),
+        ])
+        time, signal = read_animl(self.path)
+        self.assertEqual(len(time), len(self.t))
+        np.testing.assert_array_equal(signal, self.signal)
+
+    def test_not_a_chromatogram(self):
+        write_animl(self.path, [('Notes', 1, [
+            series('Comment', 'dependent', 'String', '<IndividualValueSet><S>a</S></IndividualValueSet>', ''),
+        ])])
+        with self.assertRaises(ValueError):
+            read_animl(self.path)
+
+    def test_read_file_and_pipeline(self):
+        write_animl(self.path, [('Chromatogram', len(self.t), [
+            series('Time', 'independent', 'Float64', self.auto_time(), 's'),
+            series('Absorbance', 'dependent', 'Float64', encoded(self.signal, '<f8'), 'mAU'),
+        ])])
+        with open(os.path.join(self.folder.name, 'run.csv'), 'w') as f:
+            f.write('time,signal\n')
+            f.writelines(f'{a / 60},{b}\n' for a, b in zip(self.t, self.signal))
+
+        df = FileHandler.read_file(self.path)
+        self.assertEqual(FileHandler.detect_columns(df), ('Time (min)', 'Signal'))
+
+        files = list(FileHandler.iter_files(self.folder.name))
+        self.assertEqual([os.path.basename(f) for f in files], ['run.animl', 'run.csv'])
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = FileProcessor().process_files(files, [(4.0, 6.0)], ['Main'])
+        self.assertNotIn('error', results[0])
+        self.assertAlmostEqual(results[0]['Main'], results[1]['Main'], places=6)
+        self.assertEqual(results[0]['QC_points'], 1200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import spsolve
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.auc_calculator import trapezoid
+from core import baseline_correction
+from core.baseline_correction import BaselineCorrector
+from config.settings import BASELINE_METHODS
+
+
+def reference_als(signal, lam, p, niter):
+    """The original sparse-LU implementation"""
+    L = len(signal)
+    D = sparse.diags([1.0, -2.0, 1.0], [0, -1, -2], shape=(L, L - 2))
+    D = lam * D.dot(D.transpose())
+    w = np.ones(L)
+    for _ in range(niter):
+        z = spsolve(sparse.csc_matrix(sparse.diags(w) + D), w * signal)
+        w = p * (signal > z) + (1 - p) * (signal < z)
+    return signal - z
+
+
+class ChromatogramTestCase(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.time = np.linspace(0, 30, 3000)
+        self.baseline = 0.5 + 0.04 * self.time + 0.3 * np.sin(self.time / 8)
+        self.peaks = (2.0 * np.exp(-((self.time - 8) / 0.3) ** 2)
+                      + 1.0 * np.exp(-((self.time - 15) / 0.4) ** 2)
+                      + 3.0 * np.exp(-((self.time - 22) / 0.3) ** 2))
+        self.signal = self.baseline + self.peaks + rng.normal(0, 0.01, self.time.size)
+
+
+class TestIterativeBaselines(ChromatogramTestCase):
+
+    METHODS = BASELINE_METHODS[3:6]
+
+    def test_als_matches_reference(self):
+        expected = reference_als(self.signal, 1e5, 0.01, 10)
+        result = BaselineCorrector.als_baseline(self.signal, 1e5, 0.01, 10)
+        np.testing.assert_allclose(result, expected, atol=1e-8)
+
+    def test_reweighted_methods_recover_peaks(self):
+        for method in self.METHODS:
+            corrected = BaselineCorrector.apply_correction(self.time, self.signal, method)
+            error = np.abs(corrected - self.peaks)
+            self.assertLess(np.median(error), 0.05, method)
+            self.assertLess(abs(trapezoid(corrected, self.time) / trapezoid(self.peaks, self.time) - 1),
+                            0.1, method)
+
+    def test_flat_signal(self):
+        flat = np.full(200, 2.0)
+        for method in self.METHODS:
+            corrected = BaselineCorrector.apply_correction(self.time[:200], flat, method)
+            np.testing.assert_allclose(corrected, 0.0, atol=1e-6)
+
+
+class TestClippingBaselines(ChromatogramTestCase):
+
+    METHODS = ('Morphological (Top-hat)', 'Rolling Ball', 'SNIP')
+
+    def test_recover_peaks(self):
+        for method in self.METHODS:
+            corrected = BaselineCorrector.apply_correction(self.time, self.signal, method,
+                                                           half_window=60, max_half_window=30)
+            self.assertLess(np.median(np.abs(corrected - self.peaks)), 0.05, method)
+            self.assertLess(abs(trapezoid(corrected, self.time) / trapezoid(self.peaks, self.time) - 1),
+                            0.15, method)
+
+    def test_batch_equals_rows(self):
+        stack = np.vstack([self.signal, 2 * self.signal + 1, self.signal[::-1]])
+        for method in self.METHODS:
+            batch = BaselineCorrector.apply_correction(self.time, stack, method)
+            self.assertEqual(batch.shape, stack.shape)
+            for row, corrected in zip(stack, batch):
+                np.testing.assert_allclose(BaselineCorrector.apply_correction(self.time, row, method),
+                                           corrected, atol=1e-12)
+
+    def test_flat_signal(self):
+        flat = np.full(200, 2.0)
+        for method in self.METHODS:
+            np.testing.assert_allclose(BaselineCorrector.apply_correction(None, flat, method), 0.0, atol=1e-12)
+        np.testing.assert_allclose(BaselineCorrector.snip_baseline(flat, lls=True), 0.0, atol=1e-9)
+
+    def test_tophat_baseline_stays_below_signal(self):
+        corrected = BaselineCorrector.tophat_baseline(self.signal, 30)
+        self.assertGreaterEqual(corrected.min(), 0.0)
+
+
+class TestPolynomialProjector(ChromatogramTestCase):
+
+    def test_matches_polyfit(self):
+        for degree in (1, 2, 4):
+            expected = self.signal - np.polyval(np.polyfit(self.time, self.signal, degree), self.time)
+            np.testing.assert_allclose(BaselineCorrector.polynomial_baseline(self.time, self.signal, degree),
+                                       expected, atol=1e-9)
+
+    def test_projector_is_cached_per_grid(self):
+        first = BaselineCorrector.polynomial_projector(self.time, 3)
+        self.assertIs(BaselineCorrector.polynomial_projector(self.time.copy(), 3), first)
+        self.assertIsNot(BaselineCorrector.polynomial_projector(self.time[:-1], 3), first)
+        self.assertFalse(first.flags.writeable)
+
+    def test_projector_cache_is_bounded_by_bytes(self):
+        limit = 3 * len(self.time) * 4 * 8
+        with mock.patch.object(baseline_correction, 'POLYNOMIAL_PROJECTOR_CACHE_BYTES', limit):
+            for shift in range(6):
+                BaselineCorrector.polynomial_projector(self.time + shift, 3)
+            self.assertLessEqual(baseline_correction._projector_bytes, limit)
+            self.assertEqual(sum(Q.nbytes for Q in baseline_correction._projector_cache.values()),
+                             baseline_correction._projector_bytes)
+
+    def test_stacked_traces(self):
+        stack = np.vstack([self.signal, 3 * self.signal - 1, self.signal[::-1]])
+        for method in ('Linear', 'Polynomial'):
+            batch = BaselineCorrector.apply_correction(self.time, stack, method)
+            for row, corrected in zip(stack, batch):
+                np.testing.assert_allclose(BaselineCorrector.apply_correction(self.time, row, method),
+                                           corrected, atol=1e-12)
+
+
+class TestMultiResolution(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.time = np.linspace(0, 30, 60000)
+        self.baseline = 0.5 + 0.04 * self.time + 0.3 * np.sin(self.time / 8)
+        self.peaks = 2.0 * np.exp(-((self.time - 8) / 0.3) ** 2) + 3.0 * np.exp(-((self.time - 22) / 0.2) ** 2)
+        self.signal = self.baseline + self.peaks + rng.normal(0, 0.01, self.time.size)
+
+    def test_close_to_full_resolution(self):
+        for method, (default_lam, order) in BaselineCorrector.PLS_METHODS.items():
+            lam = default_lam * (self.time.size / 3000) ** (2 * order)
+            full = BaselineCorrector.apply_correction(self.time, self.signal, method, lam=lam)
+            reduced = BaselineCorrector.apply_correction(self.time, self.signal, method, lam=lam, multires=20)
+            # airPLS weights scale with the summed residual, so the reduced fit differs more
+            tolerance = 0.1 if method.startswith('airPLS') else 0.02
+            self.assertLess(np.abs(full - reduced).max(), tolerance * self.peaks.max(), method)
+
+    def test_small_traces_fall_back_to_full_resolution(self):
+        short = self.signal[::200]
+        np.testing.assert_array_equal(
+            BaselineCorrector.apply_correction(None, short, 'Als (Asymmetric Least Squares)', multires=True),
+            BaselineCorrector.als_baseline(short))
+
+    def test_min_aware_bins(self):
+        centres, reduced = BaselineCorrector._min_aware_bins(self.signal, 50)
+        self.assertEqual(len(reduced), 1200)
+        np.testing.assert_allclose(centres[:2], [24.5, 74.5])
+        away_from_peaks = self.peaks[25::50] < 1e-3
+        np.testing.assert_allclose(reduced[away_from_peaks], self.baseline[25::50][away_from_peaks], atol=0.01)
+
+        # Features narrower than a bin do not leak into the reduced trace
+        spiky = self.signal.copy()
+        spiky[30010:30020] += 5.0
+        _, reduced = BaselineCorrector._min_aware_bins(spiky, 50)
+        self.assertAlmostEqual(reduced[600], self.baseline[30025], delta=0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import batch
+
+
+class TestBatchCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        t = np.linspace(0, 10, 201)
+        for idx in range(3):
+            with open(os.path.join(self.folder.name, f'run{idx}.csv'), 'w') as f:
+                f.write('time,signal\n')
+                f.writelines(f'{a},{b}\n' for a, b in zip(t, (idx + 1) * np.exp(-((t - 5) ** 2) / 0.5)))
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def run_batch(self, *argv):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return batch.main(list(argv))
+
+    def test_parse_peak(self):
+        self.assertEqual(batch.parse_peak('Peak: A:3:7.5'), ('Peak: A', 3.0, 7.5))
+        for text in ('Main:7:3', 'Main:3', ':1:2'):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                batch.parse_peak(text)
+
+    def test_folder_to_csv_with_timings(self):
+        output = os.path.join(self.folder.name, 'out', 'results.csv')
+        status = self.run_batch(self.folder.name, '--peak', 'Main:3:7', '--peak', 'Tail:7:9',
+                                '--exclude-from-total', 'Tail', '--output', output)
+        self.assertEqual(status, 0)
+
+        df = pd.read_csv(output)
+        self.assertEqual(list(df['filename']), ['run0.csv', 'run1.csv', 'run2.csv'])
+        np.testing.assert_allclose(df['Main'], df['Main'][0] * np.arange(1, 4), rtol=1e-9)
+        with open(os.path.join(self.folder.name, 'out', 'results.timing.json')) as f:
+            self.assertEqual(json.load(f)['files'], 3)
+
+    def test_failed_files_and_profile(self):
+        with open(os.path.join(self.folder.name, 'broken.csv'), 'w') as f:
+            f.write('time,signal\n')
+        output = os.path.join(self.folder.name, 'results.csv')
+        status = self.run_batch(self.folder.name, '--peak', 'Main:3:7', '--output', output, '--profile')
+        self.assertEqual(status, 1)
+        for suffix in ('.prof', '.profile.txt', '.memory.txt'):
+            self.assertTrue(os.path.exists(os.path.join(self.folder.name, 'results' + suffix)), suffix)
+
+    def test_low_memory_to_sqlite(self):
+        output = os.path.join(self.folder.name, 'results.sqlite')
+        status = self.run_batch(self.folder.name, '--peak', 'Main:3:7', '--low-memory', '--chunk-size', '2',
+                                '--output', output)
+        self.assertEqual(status, 0)
+        with sqlite3.connect(output) as connection:
+            df = pd.read_sql('SELECT * FROM results', connection)
+        self.assertEqual(list(df['filename']), ['run0.csv', 'run1.csv', 'run2.csv'])
+        with open(os.path.join(self.folder.name, 'results.timing.json')) as f:
+            report = json.load(f)
+        self.assertEqual(report['files'], 3)
+        self.assertNotIn('per_file', report)
+
+    def test_low_memory_rejects_excel(self):
+        output = os.path.join(self.folder.name, 'results.xlsx')
+        self.assertEqual(self.run_batch(self.folder.name, '--peak', 'Main:3:7', '--low-memory',
+                                        '--output', output), 2)
+        self.assertFalse(os.path.exists(output))
+
+    def test_stream(self):
+        output = os.path.join(self.folder.name, 'results.csv')
+        status = self.run_batch(self.folder.name, '--peak', 'Main:3:7', '--stream', '--stream-chunk-rows', '50',
+                                '--output', output)
+        self.assertEqual(status, 0)
+        df = pd.read_csv(output)
+        np.testing.assert_allclose(df['Main'], df['Main'][0] * np.arange(1, 4), rtol=1e-9)
+        self.assertNotIn('QC_warnings', df.columns)
+
+    def test_missing_input(self):
+        self.assertEqual(self.run_batch(os.path.join(self.folder.name, 'nope'), '--peak', 'Main:3:7'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
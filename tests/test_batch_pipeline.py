@@ -0,0 +1,160 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.batch_pipeline import BatchPipeline
+from core.file_processor import FileProcessor
+
+
+class TestBatchPipeline(unittest.TestCase):
+
+    def test_results_are_written_in_input_order(self):
+        def read(item):
+            time.sleep(0.001 * (item % 3))
+            return item * 2
+
+        written = []
+        pipeline = BatchPipeline(read, lambda item, payload: payload + 1,
+                                 reader_threads=3, compute_workers=2, read_queue_depth=2)
+        count = pipeline.run(iter(range(20)), lambda idx, item, result, error: written.append((idx, result)))
+
+        self.assertEqual(count, 20)
+        self.assertEqual(written, [(i, i * 2 + 1) for i in range(20)])
+        self.assertEqual(pipeline.stats['read']['items'], 20)
+        self.assertEqual(pipeline.stats['compute']['items'], 20)
+        self.assertIn('utilisation', BatchPipeline.format_stats(pipeline.stats))
+
+    def test_stage_errors_reach_the_writer(self):
+        def read(item):
+            if item == 1:
+                raise IOError("unreadable")
+            return item
+
+        def compute(item, payload):
+            if item == 2:
+                raise ValueError("bad data")
+            return payload
+
+        written = {}
+        BatchPipeline(read, compute).run([0, 1, 2, 3], lambda idx, item, result, error: written.update({item: (result, error)}))
+
+        self.assertEqual(written[0], (0, None))
+        self.assertIsInstance(written[1][1], IOError)
+        self.assertIsInstance(written[2][1], ValueError)
+        self.assertEqual(written[3], (3, None))
+
+    def test_feeder_error_is_raised(self):
+        def items():
+            yield 1
+            raise OSError("share went away")
+
+        with self.assertRaises(OSError):
+            BatchPipeline(lambda item: item, lambda item, payload: payload).run(items(), lambda *args: None)
+
+    def test_waiting_items_are_computed_together(self):
+        batches = []
+
+        def compute(item, payload):
+            time.sleep(0.05)
+            return payload
+
+        def compute_batch(tasks):
+            batches.append(len(tasks))
+            return [(payload, None) for _, payload in tasks]
+
+        written = []
+        pipeline = BatchPipeline(lambda item: item * 2, compute, compute_workers=1, read_queue_depth=8,
+                                 compute_batch_func=compute_batch, compute_batch_size=4)
+        pipeline.run(iter(range(12)), lambda idx, item, result, error: written.append((idx, result)))
+
+        self.assertEqual(written, [(i, i * 2) for i in range(12)])
+        self.assertTrue(batches)
+        self.assertLessEqual(max(batches), 4)
+        self.assertEqual(pipeline.stats['compute']['items'], 12)
+
+    def test_batch_error_reaches_every_item(self):
+        def compute_batch(tasks):
+            raise ValueError("bad stack")
+
+        def compute(item, payload):
+            time.sleep(0.02)
+            return payload
+
+        written = {}
+        BatchPipeline(lambda item: item, compute, compute_workers=1, compute_batch_func=compute_batch).run(
+            range(6), lambda idx, item, result, error: written.update({item: (result, error)})
+        )
+
+        self.assertEqual(len(written), 6)
+        for result, error in written.values():
+            self.assertTrue(result is not None or isinstance(error, ValueError))
+
+    def test_same_grid_files_are_stacked(self):
+        t = np.linspace(0, 10, 401)
+        other = np.linspace(0, 10, 301)
+        arrays = [(t, (idx + 1) * np.exp(-((t - 5) ** 2) / 0.5) + 0.01 * t, None) for idx in range(3)]
+        arrays.insert(1, (other, np.exp(-((other - 5) ** 2) / 0.5), None))
+        paths = [f'run{idx}.csv' for idx in range(4)]
+        processor = FileProcessor(baseline_method='Linear', noise_method='Moving Average')
+
+        self.assertEqual(processor._group_by_grid([time for time, _, _ in arrays]), [[0, 2, 3], [1]])
+        batch = processor.compute_results_batch(paths, arrays, [(3, 7)], ['Main'])
+        single = [processor.compute_results(path, time, signal, [(3, 7)], ['Main'])
+                  for path, (time, signal, _) in zip(paths, arrays)]
+
+        self.assertEqual([error for _, error in batch], [None] * 4)
+        for (result, _), expected in zip(batch, single):
+            self.assertEqual(result.keys(), expected.keys())
+            self.assertEqual(result['filename'], expected['filename'])
+            self.assertAlmostEqual(result['Main'], expected['Main'], delta=1e-9 * expected['Main'])
+
+    def test_process_folder(self):
+        with tempfile.TemporaryDirectory() as folder:
+            t = np.linspace(0, 10, 201)
+            for idx in range(5):
+                signal = (idx + 1) * np.exp(-((t - 5) ** 2) / 0.5)
+                with open(os.path.join(folder, f'run{idx}.csv'), 'w') as f:
+                    f.write('time,signal\n')
+                    f.writelines(f'{a},{b}\n' for a, b in zip(t, signal))
+            with open(os.path.join(folder, 'broken.csv'), 'w') as f:
+                f.write('time,signal\n')
+
+            processor = FileProcessor(pipeline_options={'reader_threads': 2, 'compute_workers': 2})
+            results = processor.process_folder(folder, [(3, 7)], ['Main'])
+
+        self.assertEqual([r['filename'] for r in results],
+                         ['broken.csv'] + [f'run{idx}.csv' for idx in range(5)])
+        self.assertIn('error', results[0])
+        areas = [r['Main'] for r in results[1:]]
+        np.testing.assert_allclose(areas, [(idx + 1) * areas[0] for idx in range(5)], rtol=1e-9)
+        self.assertEqual(processor.last_pipeline_stats['compute']['items'], 5)
+
+    def test_same_name_in_subfolders_stays_apart(self):
+        with tempfile.TemporaryDirectory() as folder:
+            t = np.linspace(0, 10, 201)
+            for seq in ('seq1', 'seq2'):
+                os.makedirs(os.path.join(folder, seq))
+                with open(os.path.join(folder, seq, 'inj1.csv'), 'w') as f:
+                    f.write('time,signal\n')
+                    f.writelines(f'{a},{b}\n' for a, b in zip(t, np.exp(-((t - 5) ** 2) / 0.5)))
+            with open(os.path.join(folder, 'seq1', 'broken.csv'), 'w') as f:
+                f.write('time,signal\n')
+
+            processor = FileProcessor()
+            results = processor.process_folder(folder, [(3, 7)], ['Main'])
+            listed = processor.process_files(sorted(processor.iter_folder(folder)), [(3, 7)], ['Main'])
+
+        names = ['seq1/broken.csv', 'seq1/inj1.csv', 'seq2/inj1.csv']
+        self.assertEqual([r['filename'] for r in results], names)
+        self.assertEqual([r['filename'] for r in listed], names)
+        self.assertIsNone(processor.name_root)
+
+
+if __name__ == '__main__':
+    unittest.main()
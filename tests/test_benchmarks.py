@@ -0,0 +1,175 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, ROOT)
+
+from benchmarks import history, runner, suite, synthetic
+from core.auc_calculator import trapezoid
+from core.file_processor import FileProcessor
+
+
+class TestSyntheticChromatograms(unittest.TestCase):
+
+    def test_windows_hold_the_true_areas(self):
+        trace = synthetic.generate(100_000, noise=0.0)
+        for window in trace['windows']:
+            mask = (trace['time'] >= window['start']) & (trace['time'] <= window['end'])
+            area = trapezoid(trace['peaks'][mask], trace['time'][mask])
+            self.assertAlmostEqual(area, window['area'], delta=1e-3 * window['area'], msg=window['name'])
+        self.assertIn('Fused', [w['name'] for w in trace['windows']])
+
+    def test_emg_tail_is_finite(self):
+        time = np.linspace(-5, 200, 20001)
+        peak = synthetic.emg_peak(time, 0.0, 0.01, 2.0, 1.0)
+        self.assertTrue(np.isfinite(peak).all())
+        self.assertAlmostEqual(trapezoid(peak, time), 1.0, places=4)
+
+    def test_spikes_and_irregular_sampling(self):
+        clean = synthetic.generate(5000, noise=0.0)
+        trace = synthetic.generate(5000, noise=0.0, spikes=7, irregular=0.4)
+        self.assertTrue(np.all(np.diff(trace['time']) > 0))
+        self.assertFalse(np.array_equal(trace['time'], clean['time']))
+        spikes = np.abs(trace['signal'] - trace['baseline'] - trace['peaks']) > 1e-9
+        self.assertEqual(spikes.sum(), 7)
+
+    def test_written_files_read_back(self):
+        trace = synthetic.generate(500)
+        processor = FileProcessor()
+        with tempfile.TemporaryDirectory() as folder:
+            for file_format in synthetic.writable_formats():
+                path = synthetic.write_trace(os.path.join(folder, f'run.{file_format}'),
+                                             trace['time'], trace['signal'])
+                time, signal, _ = processor.read_arrays(path)
+                np.testing.assert_allclose(time, trace['time'], rtol=1e-8, err_msg=file_format)
+                np.testing.assert_allclose(signal, trace['signal'], rtol=1e-7, atol=1e-12, err_msg=file_format)
+
+    def test_binary_formats_keep_irregular_time(self):
+        trace = synthetic.generate(500, irregular=0.3)
+        processor = FileProcessor()
+        with tempfile.TemporaryDirectory() as folder:
+            for file_format in ('cdf', 'animl'):
+                path = synthetic.write_trace(os.path.join(folder, f'run.{file_format}'),
+                                             trace['time'], trace['signal'])
+                time, signal, _ = processor.read_arrays(path)
+                np.testing.assert_allclose(time, trace['time'], rtol=1e-12, err_msg=file_format)
+                np.testing.assert_array_equal(signal, trace['signal'], err_msg=file_format)
+
+    def test_excel_row_limit(self):
+        with self.assertRaises(ValueError):
+            synthetic.write_trace('too_long.xlsx', np.zeros(2_000_000), np.zeros(2_000_000))
+
+
+class TestBenchmarkRunner(unittest.TestCase):
+
+    def test_keys_are_unique(self):
+        keys = [benchmark.key for benchmark in suite.build('full')]
+        self.assertEqual(len(keys), len(set(keys)))
+        self.assertIn('baseline/rolling-ball[points=10000000]', keys)
+
+    def test_runner_writes_json(self):
+        with tempfile.TemporaryDirectory() as folder:
+            output = os.path.join(folder, 'results.json')
+            status = runner.main(['--profile', 'quick', '--group', 'baseline', '--filter', 'points=1000]',
+                                  '--repeat', '2', '--output', output])
+            with open(output) as f:
+                report = json.load(f)
+
+        self.assertEqual(status, 0)
+        self.assertEqual(report['schema'], runner.SCHEMA_VERSION)
+        self.assertIn('numpy', report['machine'])
+        self.assertEqual(len(report['results']), len(suite.build('quick', ['baseline'])) // 2)
+        entry = report['results'][0]
+        self.assertEqual(entry['runs'], 2)
+        self.assertLessEqual(entry['min'], entry['median'])
+
+    def test_errors_are_recorded(self):
+        def setup(workdir):
+            raise RuntimeError("broken")
+
+        entry = runner.run_benchmark(suite.Benchmark('noise', 'broken', {}, setup), '.')
+        self.assertEqual(entry['error'], 'RuntimeError: broken')
+
+
+class TestBenchmarkHistory(unittest.TestCase):
+
+    MACHINE = {'node': 'lab-pc', 'platform': 'Linux', 'machine': 'x86_64', 'processor': '', 'cpu_count': 4}
+
+    def report(self, commit, scale, rng):
+        times = list(0.010 * scale * np.exp(rng.normal(0, 0.05, 5)))
+        return {'commit': commit, 'machine': self.MACHINE, 'profile': 'quick',
+                'results': [{'key': 'baseline/als[points=1000]', 'times': times},
+                            {'key': 'read/csv[points=1000]', 'times': [t / scale for t in times]},
+                            {'key': 'read/xls[points=1000]', 'error': 'ValueError: no xlwt'}]}
+
+    def test_record_and_compare_commits(self):
+        rng = np.random.default_rng(1)
+        with tempfile.TemporaryDirectory() as folder:
+            db = os.path.join(folder, 'history.sqlite')
+            for _ in range(3):
+                history.record(self.report('aaaa1111', 1.0, rng), db)
+                history.record(self.report('bbbb2222', 1.5, rng), db)
+            fingerprint = history.machine_fingerprint(self.MACHINE)
+
+            name, base = history.load_times('aaaa', db, fingerprint)
+            self.assertEqual(name, 'aaaa (3 run(s))')
+            self.assertEqual(len(base['baseline/als[points=1000]']), 3)
+            self.assertNotIn('read/xls[points=1000]', base)
+            with self.assertRaises(ValueError):
+                history.load_times('aaaa', db, 'another-machine')
+            self.assertEqual(history.latest_run(db), 'run:6')
+
+            _, target = history.load_times('bbbb', db, fingerprint)
+            rows = {row['key']: row for row in history.compare(base, target)}
+
+        als = rows['baseline/als[points=1000]']
+        self.assertEqual(als['verdict'], 'regression')
+        self.assertEqual(als['unit'], 'runs')
+        self.assertLess(als['low'], 1.5)
+        self.assertGreater(als['high'], 1.5)
+        self.assertIn(rows['read/csv[points=1000]']['verdict'], ('unchanged', 'inconclusive'))
+
+    def test_dirty_runs_are_not_pooled_with_clean_runs(self):
+        with tempfile.TemporaryDirectory() as folder:
+            db = os.path.join(folder, 'history.sqlite')
+            for seconds, dirty in ((1.0, False), (1.0, False), (2.0, True), (2.0, True)):
+                history.record({'commit': 'abc', 'dirty': dirty, 'machine': self.MACHINE,
+                                'results': [{'key': 'noise/sg', 'times': [seconds]}]}, db)
+
+            name, clean = history.load_times('abc', db)
+            self.assertEqual(name, 'abc (2 run(s))')
+            self.assertEqual(clean['noise/sg'], [[1.0], [1.0]])
+            _, dirty = history.load_times('abc+dirty', db)
+            self.assertEqual(dirty['noise/sg'], [[2.0], [2.0]])
+            _, latest = history.load_times(history.latest_run(db), db)
+            self.assertEqual(latest['noise/sg'], [[2.0]])
+
+    def test_ratio_interval(self):
+        ratio, low, high = history.ratio_interval(np.log([1.0, 1.1, 0.9]), np.log([2.0, 2.2, 1.8]))
+        self.assertAlmostEqual(ratio, 2.0)
+        self.assertLess(low, 2.0)
+        self.assertGreater(high, 2.0)
+        self.assertTrue(np.isnan(history.ratio_interval(np.log([1.0]), np.log([2.0, 2.1]))[1]))
+
+    def test_compare_exit_status(self):
+        rng = np.random.default_rng(2)
+        with tempfile.TemporaryDirectory() as folder:
+            paths = []
+            for commit, scale in (('aaaa', 1.0), ('bbbb', 2.0)):
+                paths.append(os.path.join(folder, f'{commit}.json'))
+                with open(paths[-1], 'w') as f:
+                    json.dump(self.report(commit, scale, rng), f)
+            db = os.path.join(folder, 'history.sqlite')
+            self.assertEqual(history.compare_main([paths[0], paths[1], '--db', db, '--filter', 'als']), 1)
+            self.assertEqual(history.compare_main([paths[0], paths[0], '--db', db]), 0)
+            self.assertEqual(history.compare_main(['cccc', paths[0], '--db', db]), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.auc_calculator import AUCCalculator
+from core.baseline_correction import apply_baseline_correction
+from core.correction_cache import CorrectionCache
+from core.noise_correction import apply_noise_correction
+
+ALS = 'Als (Asymmetric Least Squares)'
+
+
+class TestCorrectionCache(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(6)
+        self.time = np.linspace(0, 20, 2000)
+        self.signal = np.exp(-((self.time - 8) / 0.4) ** 2) + 0.02 * self.time + rng.normal(0, 0.01, 2000)
+
+    def test_toggling_methods_hits(self):
+        cache = CorrectionCache()
+        for method in ('None', ALS, 'Polynomial', ALS, 'Polynomial'):
+            result = cache.correct(self.time, self.signal, 'Savitzky-Golay', method)
+        expected = apply_baseline_correction(self.time, apply_noise_correction(self.signal, 'Savitzky-Golay'),
+                                             'Polynomial')
+        np.testing.assert_allclose(result, expected)
+        self.assertFalse(result.flags.writeable)
+        stats = cache.get_stats()
+        # One smoothing and two baselines computed; every repeated lookup hits
+        self.assertEqual((stats['misses'], stats['hits']), (3, 6))
+        self.assertIn('Correction cache: 6 hit(s)', cache.format_stats())
+
+    def test_parameters_and_inputs_are_part_of_the_key(self):
+        cache = CorrectionCache()
+        a = cache.baseline(self.time, self.signal, 'Polynomial', {'degree': 1})
+        b = cache.baseline(self.time, self.signal, 'Polynomial', {'degree': 3})
+        c = cache.baseline(self.time, self.signal + 1.0, 'Polynomial', {'degree': 1})
+        self.assertEqual(cache.misses, 3)
+        self.assertFalse(np.allclose(a, b))
+        np.testing.assert_allclose(a, c, atol=1e-9)
+
+    def test_evicts_by_bytes(self):
+        cache = CorrectionCache(max_bytes=3 * self.signal.nbytes)
+        for degree in range(5):
+            cache.baseline(self.time, self.signal, 'Polynomial', {'degree': degree})
+        stats = cache.get_stats()
+        self.assertEqual(stats['entries'], 3)
+        self.assertEqual(stats['evictions'], 2)
+        self.assertLessEqual(stats['bytes'], stats['max_bytes'])
+        # Oldest entries went first
+        cache.baseline(self.time, self.signal, 'Polynomial', {'degree': 4})
+        cache.baseline(self.time, self.signal, 'Polynomial', {'degree': 0})
+        self.assertEqual(cache.hits, 1)
+
+    def test_inputs_are_not_frozen(self):
+        cache = CorrectionCache()
+        cache.baseline(self.time, self.signal, 'Unknown method')
+        self.assertTrue(self.signal.flags.writeable)
+
+    def test_auc_calculator_uses_cache(self):
+        cache = CorrectionCache()
+        cached = AUCCalculator(ALS, 'Gaussian', correction_cache=cache)
+        plain = AUCCalculator(ALS, 'Gaussian')
+        ranges, names = [(6, 10), (12, 14)], ['A', 'B']
+        first = cached.calculate_multiple_peaks(self.time, self.signal, ranges, names)
+        again = cached.calculate_multiple_peaks(self.time, self.signal, ranges, names)
+        self.assertEqual(first, plain.calculate_multiple_peaks(self.time, self.signal, ranges, names))
+        self.assertEqual(first, again)
+        self.assertEqual((cache.misses, cache.hits), (3, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
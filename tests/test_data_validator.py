@@ -0,0 +1,85 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from utils.data_validator import DataValidator
+from core.auc_calculator import AUCCalculator
+
+
+class TestCleanArrays(unittest.TestCase):
+
+    def test_drops_and_reports_each_reason(self):
+        df = pd.DataFrame({
+            'time': ['0.2', '0.0', 'n/a', None, '0.1', '0.1', 'inf'],
+            'signal': [3.0, 1.0, 9.0, 9.0, 2.0, 7.0, 9.0]
+        })
+        time, signal, report = DataValidator.clean_dataframe(df, 'time', 'signal')
+
+        np.testing.assert_array_equal(time, [0.0, 0.1, 0.2])
+        np.testing.assert_array_equal(signal, [1.0, 2.0, 3.0])
+        self.assertEqual(report, {'missing': 1, 'non_numeric': 1, 'infinite': 1,
+                                  'duplicate_time': 1, 'non_monotonic': 1, 'resorted': True})
+        self.assertEqual(df['time'].iloc[0], '0.2')  # input left untouched
+        self.assertEqual(DataValidator.format_clean_report(report),
+                         'missing=1, non_numeric=1, infinite=1, duplicate_time=1, resorted')
+
+    def test_clean_input_is_not_resorted(self):
+        time, signal, report = DataValidator.clean_arrays(np.arange(5), np.ones(5, dtype=np.float32))
+        self.assertEqual(time.dtype, np.float64)
+        self.assertEqual(signal.dtype, np.float64)
+        self.assertTrue(time.flags['C_CONTIGUOUS'])
+        self.assertFalse(report['resorted'])
+        self.assertEqual(DataValidator.format_clean_report(report), '')
+
+    def test_too_few_points(self):
+        with self.assertRaises(ValueError):
+            DataValidator.clean_arrays([1.0, np.nan], [1.0, 2.0])
+
+    def test_presorted_integration_matches_mask(self):
+        rng = np.random.default_rng(0)
+        time = np.sort(rng.uniform(0, 10, 500))
+        signal = rng.uniform(0, 1, 500)
+        calculator = AUCCalculator()
+        for xi, xf in [(1, 2), (0, 10), (4.5, 4.6)]:
+            self.assertAlmostEqual(calculator.calculate_auc(time, signal, xi, xf),
+                                   calculator.calculate_auc(time, signal, xi, xf, presorted=True))
+
+
+
+class TestQualityMetrics(unittest.TestCase):
+
+    def test_metrics(self):
+        rng = np.random.default_rng(1)
+        time = np.arange(2000) * 0.01
+        signal = 0.5 + 0.05 * rng.standard_normal(2000) + 5 * np.exp(-((time - 10) ** 2))
+        signal[990:1000] = 8.0  # clipped detector
+        signal[:100] = -0.2
+
+        metrics = DataValidator.quality_metrics(time, signal, {'duplicate_time': 2, 'non_monotonic': 1})
+
+        self.assertAlmostEqual(metrics['dt_median'], 0.01)
+        self.assertLess(metrics['dt_cv'], 1e-6)
+        self.assertEqual(metrics['saturation_plateaus'], 1)
+        self.assertEqual(metrics['saturated_points'], 10)
+        self.assertAlmostEqual(metrics['negative_fraction'], 0.05)
+        self.assertAlmostEqual(metrics['noise_sigma'], 0.05, delta=0.01)
+
+        warnings = DataValidator.quality_warnings(metrics)
+        self.assertIn("Duplicate time values detected", warnings)
+        self.assertIn("Time values are not monotonic", warnings)
+        self.assertTrue(any('saturation' in w for w in warnings))
+
+    def test_check_data_quality_on_dataframe(self):
+        df = pd.DataFrame({'t': [0.0, 0.5, 0.5, 1.0], 's': [0.0, -1.0, 2.0, 1.0]})
+        warnings = DataValidator.check_data_quality(df, 't', 's')
+        self.assertIn("Duplicate time values detected", warnings)
+        self.assertIn("Negative signal values detected", warnings)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from utils.file_handler import FileHandler
+
+
+class TestFolderDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        for rel in ['b.csv', 'a.txt', 'notes.md',
+                    'project/seq1/inj2.csv', 'project/seq1/inj1.csv',
+                    'project/seq2/inj1.xlsx', 'project/blank/blank.csv']:
+            path = os.path.join(self.root, *rel.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write('time,signal\n0,0\n')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _rel(self, files):
+        return [os.path.relpath(f, self.root).replace(os.sep, '/') for f in files]
+
+    def test_recursive_stable_order(self):
+        files = self._rel(FileHandler.iter_files(self.root))
+        self.assertEqual(files, [
+            'a.txt', 'b.csv',
+            'project/blank/blank.csv',
+            'project/seq1/inj1.csv', 'project/seq1/inj2.csv',
+            'project/seq2/inj1.xlsx',
+        ])
+
+    def test_non_recursive_matches_folder_listing(self):
+        self.assertEqual(self._rel(FileHandler.get_files_from_folder(self.root)), ['a.txt', 'b.csv'])
+
+    def test_include_and_exclude_globs(self):
+        files = self._rel(FileHandler.iter_files(
+            self.root, include='project/*/inj*.csv', exclude='project/seq1/inj2*'
+        ))
+        self.assertEqual(files, ['project/seq1/inj1.csv'])
+
+        files = self._rel(FileHandler.iter_files(self.root, exclude=['project/blank', '*.txt']))
+        self.assertNotIn('project/blank/blank.csv', files)
+        self.assertNotIn('a.txt', files)
+
+    def test_mtime_filters(self):
+        old = time.time() - 3600
+        os.utime(os.path.join(self.root, 'b.csv'), (old, old))
+
+        recent = self._rel(FileHandler.iter_files(self.root, recursive=False, min_mtime=old + 60))
+        self.assertEqual(recent, ['a.txt'])
+
+        stale = self._rel(FileHandler.iter_files(self.root, recursive=False, max_mtime=old + 60))
+        self.assertEqual(stale, ['b.csv'])
+
+    def test_unreadable_subfolder_is_skipped(self):
+        scandir = os.scandir
+        blocked = os.path.join(self.root, 'project', 'seq1')
+
+        def guarded(path):
+            if os.path.normpath(path) == blocked:
+                raise PermissionError(13, 'Permission denied', path)
+            return scandir(path)
+
+        with mock.patch('os.scandir', guarded), contextlib.redirect_stdout(io.StringIO()) as out:
+            files = self._rel(FileHandler.iter_files(self.root))
+        self.assertEqual(files, ['a.txt', 'b.csv', 'project/blank/blank.csv', 'project/seq2/inj1.xlsx'])
+        self.assertIn('seq1', out.getvalue())
+
+    def test_missing_folder_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            FileHandler.iter_files(os.path.join(self.root, 'missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
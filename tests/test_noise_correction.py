@@ -0,0 +1,191 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+import numpy as np
+from scipy.ndimage import uniform_filter1d, median_filter
+from scipy.signal import savgol_filter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core import noise_correction
+from core.noise_correction import NoiseCorrector, _savgol_operators
+from core.auc_calculator import AUCCalculator
+from core.file_processor import FileProcessor
+
+
+class TestMovingAverage(unittest.TestCase):
+
+    def setUp(self):
+        self.signals = np.random.default_rng(0).normal(size=(3, 500)) + 50
+
+    def test_matches_uniform_filter(self):
+        for mode in ('reflect', 'nearest', 'mirror', 'constant'):
+            for window in (1, 4, 21, 499):
+                expected = uniform_filter1d(self.signals, window + (window % 2 == 0), axis=-1, mode=mode)
+                result = NoiseCorrector.moving_average(self.signals, window, mode)
+                np.testing.assert_allclose(result, expected, atol=1e-9, err_msg=f"{mode}/{window}")
+
+    def test_constant_signal_is_preserved_at_edges(self):
+        flat = np.full(100, 3.0)
+        np.testing.assert_allclose(NoiseCorrector.moving_average(flat, 11), flat)
+        self.assertLess(NoiseCorrector.moving_average(flat, 11, mode='constant')[0], 3.0)
+
+    def test_batch_equals_rows(self):
+        batch = NoiseCorrector.apply_correction(self.signals, 'Moving Average', window_size=7)
+        for row, expected in zip(batch, self.signals):
+            np.testing.assert_allclose(row, NoiseCorrector.moving_average(expected, 7))
+
+
+class TestSavitzkyGolay(unittest.TestCase):
+
+    def setUp(self):
+        self.signals = np.random.default_rng(1).normal(size=(4, 400)).cumsum(axis=1)
+
+    def test_matches_scipy_including_derivatives(self):
+        for window, order in ((11, 3), (5, 2), (21, 4)):
+            for deriv in (0, 1, 2):
+                expected = savgol_filter(self.signals, window, order, deriv=deriv, delta=0.05, axis=-1)
+                result = NoiseCorrector.savitzky_golay(self.signals, window, order, deriv, delta=0.05)
+                np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-9)
+
+    def test_kernels_are_cached(self):
+        _savgol_operators.cache_clear()
+        smoothed, first, second = NoiseCorrector.savgol_derivatives(self.signals, 11, 3)
+        NoiseCorrector.savgol_derivatives(self.signals[0], 11, 3)
+        info = _savgol_operators.cache_info()
+        self.assertEqual((info.misses, info.hits), (3, 3))
+        np.testing.assert_allclose(first, NoiseCorrector.first_derivative(self.signals))
+        np.testing.assert_allclose(second, NoiseCorrector.second_derivative(self.signals))
+
+    def test_short_traces(self):
+        np.testing.assert_allclose(NoiseCorrector.savitzky_golay(np.arange(5.0), 11, 3), np.arange(5.0), atol=1e-12)
+        np.testing.assert_array_equal(NoiseCorrector.savitzky_golay([1.0, 2.0]), [1.0, 2.0])
+
+    def test_even_window_equal_to_trace_length(self):
+        trace = self.signals[0, :10]
+        np.testing.assert_allclose(NoiseCorrector.savitzky_golay(trace, 10, 3), savgol_filter(trace, 9, 3),
+                                   rtol=1e-9, atol=1e-9)
+        for length in (4, 12):
+            trace = self.signals[0, :length]
+            self.assertEqual(NoiseCorrector.savitzky_golay(trace, length, length).shape, (length,))
+
+
+class TestGaussianSmooth(unittest.TestCase):
+
+    def setUp(self):
+        self.signals = np.random.default_rng(2).normal(size=(3, 5000)).cumsum(axis=1)
+
+    def test_fft_matches_direct(self):
+        for sigma in (3.0, 40.0):
+            for mode in ('reflect', 'nearest', 'mirror', 'constant'):
+                expected = NoiseCorrector.gaussian_smooth(self.signals, sigma, 'direct', mode)
+                result = NoiseCorrector.gaussian_smooth(self.signals, sigma, 'fft', mode)
+                np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-9)
+
+    def test_recursive_approximates_direct(self):
+        for sigma in (3.0, 40.0, 400.0):
+            expected = NoiseCorrector.gaussian_smooth(self.signals, sigma, 'direct')
+            result = NoiseCorrector.gaussian_smooth(self.signals, sigma, 'recursive')
+            self.assertEqual(result.shape, expected.shape)
+            self.assertLess(np.abs(result - expected).max() / np.abs(expected).max(), 1e-2)
+            np.testing.assert_allclose(NoiseCorrector.gaussian_smooth(self.signals[1], sigma, 'recursive'),
+                                       result[1], rtol=1e-12, atol=1e-12)
+
+    def test_recursive_preserves_area_and_width(self):
+        impulse = np.zeros(20001)
+        impulse[10000] = 1.0
+        offsets = np.arange(impulse.size) - 10000
+        for sigma in (5.0, 50.0, 500.0):
+            response = NoiseCorrector.gaussian_smooth(impulse, sigma, 'recursive')
+            self.assertAlmostEqual(response.sum(), 1.0, places=6)
+            width = np.sqrt((response * offsets ** 2).sum())
+            self.assertLess(abs(width / sigma - 1), 0.15)
+
+    def test_auto_selection(self):
+        self.assertEqual(NoiseCorrector.choose_gaussian_method(2.0, 1000000), 'direct')
+        self.assertEqual(NoiseCorrector.choose_gaussian_method(50.0, 5000), 'fft')
+        self.assertEqual(NoiseCorrector.choose_gaussian_method(50.0, 1000000), 'recursive')
+        with self.assertRaises(ValueError):
+            NoiseCorrector.gaussian_smooth(self.signals, 2.0, 'spline')
+
+
+class TestLinearTimeFilters(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        t = np.linspace(0, 1, 1000)
+        self.clean = np.exp(-((t - 0.5) / 0.05) ** 2) + 0.2 * t
+        self.signals = self.clean + rng.normal(0, 0.05, size=(3, t.size))
+
+    def test_median_removes_spikes(self):
+        spiky = self.clean.copy()
+        spiky[[100, 400, 700]] += 5.0
+        result = NoiseCorrector.apply_correction(spiky, 'Median', window_size=5)
+        self.assertLess(np.abs(result - self.clean).max(), 0.05)
+        np.testing.assert_array_equal(NoiseCorrector.median_smooth(self.signals, 4)[2],
+                                      median_filter(self.signals[2], 5, mode='reflect'))
+
+    def test_whittaker_batch_equals_rows(self):
+        batch = NoiseCorrector.apply_correction(self.signals, 'Whittaker', lam=1e3)
+        for row, smoothed in zip(self.signals, batch):
+            np.testing.assert_allclose(NoiseCorrector.whittaker_smooth(row, 1e3), smoothed, rtol=1e-10)
+        self.assertLess(np.std(batch - self.clean), np.std(self.signals - self.clean) / 2)
+
+    def test_whittaker_preserves_linear_drift(self):
+        drift = np.linspace(1.0, 3.0, 500)
+        np.testing.assert_allclose(NoiseCorrector.whittaker_smooth(drift, 1e6), drift, atol=1e-6)
+
+    def test_haar_wavelet_denoise(self):
+        original, noise_correction.pywt = noise_correction.pywt, None
+        try:
+            batch = NoiseCorrector.apply_correction(self.signals, 'Wavelet')
+            odd = NoiseCorrector.wavelet_denoise(self.signals[0, :999])
+            # Equal pairs leave no finest-scale noise, so nothing is shrunk
+            steps = np.repeat(self.signals[1, :500], 2)[:999]
+            rebuilt = NoiseCorrector.wavelet_denoise(steps)
+        finally:
+            noise_correction.pywt = original
+        self.assertEqual(batch.shape, self.signals.shape)
+        self.assertEqual(odd.shape, (999,))
+        np.testing.assert_allclose(rebuilt, steps, atol=1e-9)
+        self.assertLess(np.std(batch - self.clean), 0.75 * np.std(self.signals - self.clean))
+
+
+class TestBatchIntegration(unittest.TestCase):
+
+    def test_calculate_batch_matches_single_traces(self):
+        time = np.linspace(0, 20, 2001)
+        rng = np.random.default_rng(3)
+        signals = np.exp(-((time - 10) ** 2)) * np.arange(1, 5)[:, None] + 0.01 * rng.normal(size=(4, 2001))
+        calculator = AUCCalculator(noise_method='Moving Average', baseline_method='Linear')
+
+        batch = calculator.calculate_batch(time, signals, [(8, 12), (0, 20)], ['A', 'B'])
+        single = [calculator.calculate_multiple_peaks(time, row, [(8, 12), (0, 20)], ['A', 'B'])
+                  for row in signals]
+        self.assertEqual(batch, single)
+
+    def test_failed_window_gives_float_areas(self):
+        time = np.linspace(0, 20, 201)
+        signals = np.exp(-((time - 10) ** 2)) * np.arange(1, 3)[:, None]
+        batch = AUCCalculator().calculate_batch(time, signals, [(8, 12), (30, 40)], ['A', 'B'])
+        for result in batch:
+            self.assertIsInstance(result['B'], float)
+            self.assertIn('B_error', result)
+
+    def test_file_processor_smooths_a_stack_in_one_call(self):
+        time = np.linspace(0, 20, 2001)
+        arrays = [(time, np.exp(-((time - 10) ** 2)) * scale, None) for scale in (1, 2, 3)]
+        processor = FileProcessor(noise_method='Moving Average', baseline_method='Linear')
+
+        with mock.patch.object(NoiseCorrector, 'moving_average', wraps=NoiseCorrector.moving_average) as smooth:
+            outputs = processor.compute_results_batch(['a.csv', 'b.csv', 'c.csv'], arrays, [(8, 12)], ['A'])
+
+        self.assertEqual(smooth.call_count, 1)
+        self.assertEqual(smooth.call_args[0][0].shape, (3, 2001))
+        self.assertEqual([error for _, error in outputs], [None] * 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.pls_solver import difference_penalty, solve_penalized
+
+
+class TestPenalizedSolver(unittest.TestCase):
+
+    def test_difference_penalty_bands(self):
+        for order in (1, 2, 3):
+            D = np.diff(np.eye(12), n=order, axis=0)
+            dense = D.T @ D
+            bands = difference_penalty(12, order)
+            for k in range(order + 1):
+                np.testing.assert_allclose(bands[order - k, k:], np.diagonal(dense, k))
+        self.assertIs(difference_penalty(12, 2), difference_penalty(12, 2))
+        self.assertFalse(difference_penalty(12, 2).flags.writeable)
+
+    def test_matches_dense_solve(self):
+        rng = np.random.default_rng(0)
+        y = rng.normal(size=(2, 50))
+        w = rng.uniform(0.1, 1.0, size=50)
+        D = np.diff(np.eye(50), n=2, axis=0)
+        A = np.diag(w) + 10.0 * D.T @ D
+        expected = np.linalg.solve(A, (w * y).T).T
+        np.testing.assert_allclose(solve_penalized(y, w, 10.0), expected, rtol=1e-9)
+        np.testing.assert_allclose(solve_penalized(y[1], w, 10.0), expected[1], rtol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main()
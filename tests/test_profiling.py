@@ -0,0 +1,47 @@
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from utils.profiling import RunProfiler
+
+
+def _busy_worker(holder):
+    holder.append(np.ones(2_000_000))
+    holder.pop()
+
+
+class TestRunProfiler(unittest.TestCase):
+
+    def test_threads_and_allocations_are_captured(self):
+        profiler = RunProfiler(snapshot_interval=0.01)
+        self.assertFalse(profiler.started)
+        profiler.start()
+        self.assertTrue(profiler.started)
+        holder = []
+        thread = threading.Thread(target=_busy_worker, args=(holder,))
+        thread.start()
+        thread.join()
+        profiler.stop()
+
+        functions = {name for _, _, name in profiler.stats().stats}
+        self.assertIn('_busy_worker', functions)
+        self.assertGreaterEqual(profiler.peak_memory, 16_000_000)
+
+        with tempfile.TemporaryDirectory() as folder:
+            paths = profiler.save(os.path.join(folder, 'results'))
+            self.assertEqual([os.path.basename(p) for p in paths],
+                             ['results.prof', 'results.profile.txt', 'results.memory.txt'])
+            self.assertGreater(pstats.Stats(paths[0]).total_calls, 0)
+            with open(paths[2]) as f:
+                self.assertIn('Peak traced memory', f.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.result_cache import ResultCache
+from core.file_processor import FileProcessor
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_lru_eviction_and_counters(self):
+        cache = ResultCache(max_entries=2)
+        cache.put('a', {'x': 1})
+        cache.put('b', {'x': 2})
+        self.assertEqual(cache.get('a'), {'x': 1})
+        cache.put('c', {'x': 3})
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), {'x': 3})
+        self.assertEqual(cache.get_stats()['hits'], 2)
+        self.assertEqual(cache.get_stats()['misses'], 1)
+
+    def test_fingerprint_is_canonical(self):
+        self.assertEqual(ResultCache.fingerprint(a=[(1, 2)], b={'y': 1, 'x': 2}),
+                         ResultCache.fingerprint(b={'x': 2, 'y': 1}, a=[[1, 2]]))
+        self.assertNotEqual(ResultCache.fingerprint(a=1), ResultCache.fingerprint(a=2))
+
+    def test_reruns_and_copies_hit_the_cache(self):
+        with tempfile.TemporaryDirectory() as folder:
+            t = np.linspace(0, 10, 301)
+            path = os.path.join(folder, 'a', 'run.csv')
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write('time,signal\n')
+                f.writelines(f'{a},{b}\n' for a, b in zip(t, np.exp(-((t - 5) ** 2))))
+            copy = os.path.join(folder, 'b', 'copy.csv')
+            os.makedirs(os.path.dirname(copy))
+            shutil.copy(path, copy)
+
+            cache = ResultCache()
+            processor = FileProcessor(result_cache=cache)
+            first = processor.process_folder(folder, [(3, 7)], ['Main'])
+            second = processor.process_folder(folder, [(3, 7)], ['Main'])
+            self.assertEqual(cache.get_stats()['hits'], 2)
+            self.assertEqual(first, second)
+            self.assertEqual([r['filename'] for r in second], ['a/run.csv', 'b/copy.csv'])
+
+            moved = os.path.join(folder, 'moved.csv')
+            shutil.copy(path, moved)
+            self.assertEqual(processor.process_single_file(moved, [(3, 7)], ['Main'])['filename'], 'moved.csv')
+            self.assertEqual(cache.get_stats()['hits'], 3)
+
+            FileProcessor(result_cache=cache).process_single_file(path, [(4, 6)], ['Main'])
+            self.assertEqual(cache.get_stats()['misses'], 3)
+
+    def test_files_are_only_hashed_when_sizes_collide(self):
+        with tempfile.TemporaryDirectory() as folder:
+            paths = []
+            for name, points in (('a.csv', 301), ('b.csv', 401)):
+                t = np.linspace(0, 10, points)
+                paths.append(os.path.join(folder, name))
+                with open(paths[-1], 'w') as f:
+                    f.write('time,signal\n')
+                    f.writelines(f'{a:.4f},{b:.6f}\n' for a, b in zip(t, np.exp(-((t - 5) ** 2))))
+            self.assertNotEqual(os.path.getsize(paths[0]), os.path.getsize(paths[1]))
+
+            hashed = []
+            cache = ResultCache()
+            cache.hash_file = lambda path, *args: hashed.append(os.path.basename(path)) or ResultCache.hash_file(path)
+            processor = FileProcessor(result_cache=cache)
+            processor.process_files(paths, [(3, 7)], ['Main'])
+            processor.process_files(paths, [(3, 7)], ['Main'])
+            self.assertEqual(hashed, [])
+            self.assertEqual(cache.get_stats()['hits'], 2)
+
+            copy = os.path.join(folder, 'copy.csv')
+            shutil.copy(paths[0], copy)
+            self.assertEqual(processor.process_single_file(copy, [(3, 7)], ['Main'])['filename'], 'copy.csv')
+            self.assertEqual(sorted(hashed), ['a.csv', 'copy.csv'])
+            self.assertEqual(cache.get_stats()['hits'], 3)
+            processor.process_files(paths + [copy], [(3, 7)], ['Main'])
+            self.assertEqual(len(hashed), 2)
+            self.assertEqual(cache.get_stats()['hits'], 6)
+
+    def test_bookkeeping_is_pruned_with_evicted_entries(self):
+        with tempfile.TemporaryDirectory() as folder:
+            paths = []
+            for idx in range(6):
+                t = np.linspace(0, 10, 201 + 100 * (idx // 2))
+                paths.append(os.path.join(folder, f'run{idx}.csv'))
+                with open(paths[-1], 'w') as f:
+                    f.write('time,signal\n')
+                    # Pairs of files share a size, so half of them get hashed
+                    f.writelines(f'{a:.4f},{(idx + 1) * np.exp(-((a - 5) ** 2)):.6f}\n' for a in t)
+
+            cache = ResultCache(max_entries=2)
+            # One thread per stage, so the last two files are the ones left in the cache
+            processor = FileProcessor(result_cache=cache,
+                                      pipeline_options={'reader_threads': 1, 'compute_workers': 1})
+            processor.process_files(paths, [(3, 7)], ['Main'])
+            self.assertEqual(len(cache), 2)
+            self.assertLessEqual(len(cache._file_hashes), 2)
+            self.assertLessEqual(len(cache._file_entries), 2)
+            self.assertLessEqual(len(cache._sizes), 2)
+            self.assertLessEqual(sum(len(stats) for stats in cache._unhashed.values()), 2)
+            self.assertLessEqual(len(cache._hash_sizes), 4)
+
+            # What is left still serves hits
+            processor.process_files(paths[-2:], [(3, 7)], ['Main'])
+            self.assertEqual(cache.get_stats()['hits'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
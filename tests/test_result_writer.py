@@ -0,0 +1,128 @@
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.auc_calculator import AUCCalculator
+from core.file_processor import FileProcessor
+from utils.export_manager import ExportManager
+from utils.result_writer import CSVResultWriter, SQLiteResultWriter, _ResultWriter, open_result_writer
+
+ROWS = [
+    {'filename': 'a.csv', 'error': 'no data'},
+    {'filename': 'b.csv', 'Main': np.float64(1.5), 'Points': np.int64(3), 'QC_warnings': ''},
+    {'filename': 'c.csv', 'Main': float('nan'), 'Points': 4, 'QC_warnings': 'gaps'},
+]
+
+
+class TestResultWriters(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_csv_columns_grow_between_chunks(self):
+        path = os.path.join(self.folder.name, 'out.csv')
+        with CSVResultWriter(path, chunk_size=1) as writer:
+            for row in ROWS:
+                writer.write(row)
+        self.assertEqual(writer.chunks_written, 3)
+        self.assertFalse(os.path.exists(path + '.part'))
+
+        df = pd.read_csv(path)
+        self.assertEqual(list(df.columns), ['filename', 'error', 'Main', 'Points', 'QC_warnings'])
+        self.assertEqual(list(df['filename']), ['a.csv', 'b.csv', 'c.csv'])
+        self.assertTrue(np.isnan(df['Main'][0]) and np.isnan(df['Main'][2]))
+        self.assertEqual(df['Main'][1], 1.5)
+        self.assertEqual(list(df['Points'][1:]), [3, 4])
+
+    def test_sqlite_adds_columns(self):
+        path = os.path.join(self.folder.name, 'out.sqlite')
+        with open_result_writer(path, chunk_size=2) as writer:
+            for row in ROWS:
+                writer.write(row)
+        self.assertIsInstance(writer, SQLiteResultWriter)
+
+        with sqlite3.connect(path) as connection:
+            df = pd.read_sql('SELECT * FROM results', connection)
+        self.assertEqual(list(df['filename']), ['a.csv', 'b.csv', 'c.csv'])
+        self.assertEqual(df['Points'].tolist()[1:], [3, 4])
+        self.assertEqual(df['error'][0], 'no data')
+
+    def test_seeded_columns_come_first(self):
+        columns = AUCCalculator.result_columns(['Main'])
+        self.assertEqual(columns, ['Main', 'Total', 'Main_%'])
+        path = os.path.join(self.folder.name, 'out.csv')
+        with CSVResultWriter(path, chunk_size=1, columns=columns) as writer:
+            for row in ROWS:
+                writer.write(row)
+
+        streamed = pd.read_csv(path)
+        self.assertEqual(list(streamed.columns[:3]), columns)
+        self.assertLess(list(streamed.columns).index('Points'), list(streamed.columns).index('QC_warnings'))
+        exported = pd.read_csv(ExportManager().export_results(ROWS, os.path.join(self.folder.name, 'all.csv'),
+                                                              'csv', columns))
+        self.assertEqual(list(exported.columns), list(streamed.columns))
+
+    def test_writer_base_is_abstract(self):
+        with self.assertRaises(TypeError):
+            _ResultWriter(os.path.join(self.folder.name, 'out.csv'))
+
+    def test_unsupported_extension(self):
+        with self.assertRaises(ValueError):
+            open_result_writer(os.path.join(self.folder.name, 'out.xlsx'))
+
+
+class TestProcessToFile(unittest.TestCase):
+
+    def test_streams_every_file(self):
+        with tempfile.TemporaryDirectory() as folder:
+            t = np.linspace(0, 10, 201)
+            for idx in range(5):
+                with open(os.path.join(folder, f'run{idx}.csv'), 'w') as f:
+                    f.write('time,signal\n')
+                    f.writelines(f'{a},{b}\n' for a, b in zip(t, (idx + 1) * np.exp(-((t - 5) ** 2) / 0.5)))
+            with open(os.path.join(folder, 'run5.csv'), 'w') as f:
+                f.write('time,signal\n')
+
+            processor = FileProcessor()
+            output = os.path.join(folder, 'results', 'out.csv')
+            os.makedirs(os.path.dirname(output))
+            with contextlib.redirect_stdout(io.StringIO()):
+                summary = processor.process_to_file(
+                    processor.file_handler.iter_files(folder), [(3, 7)], ['Main'], output, chunk_size=2
+                )
+
+            self.assertEqual((summary['files'], summary['failed'], summary['chunks']), (6, 1, 3))
+            df = pd.read_csv(output)
+            self.assertEqual(len(df), 6)
+            np.testing.assert_allclose(df['Main'][:5], df['Main'][0] * np.arange(1, 6), rtol=1e-9)
+            timing = processor.last_timings.summary()
+            self.assertEqual(timing['files'], 6)
+            self.assertIn('export', timing['run_stages'])
+            if summary['peak_rss'] is not None:
+                self.assertGreater(summary['peak_rss'], 0)
+
+    def test_arrays_do_not_hold_the_dataframe(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'run.csv')
+            with open(path, 'w') as f:
+                f.write('time,signal,other\n')
+                f.writelines(f'{i},{i * 2},{i * 3}\n' for i in range(50))
+            time, signal, _ = FileProcessor().read_arrays(path)
+        self.assertIsNone(time.base)
+        self.assertIsNone(signal.base)
+
+
+if __name__ == '__main__':
+    unittest.main()
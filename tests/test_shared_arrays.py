@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.shared_arrays import SharedArray, SharedArrayPool, attach_arrays
+from core.file_processor import FileProcessor
+
+
+def _double_in_place(desc):
+    with attach_arrays(desc) as (arr,):
+        arr *= 2
+        return float(arr.sum())
+
+
+class TestSharedArrays(unittest.TestCase):
+
+    def test_attach_is_zero_copy(self):
+        with SharedArrayPool() as pool:
+            desc = pool.share(np.arange(10))
+            with attach_arrays(desc) as (view,):
+                self.assertEqual(view.dtype, np.float64)
+                view[0] = 42
+            self.assertEqual(pool.view(desc)[0], 42)
+
+    def test_worker_writes_are_visible(self):
+        with SharedArrayPool() as pool, ProcessPoolExecutor(max_workers=1) as executor:
+            desc = pool.share(np.ones(1000))
+            total = executor.submit(_double_in_place, desc).result()
+            self.assertEqual(total, 2000.0)
+            np.testing.assert_array_equal(pool.view(desc), 2.0)
+
+    def test_pool_unlinks_everything(self):
+        pool = SharedArrayPool()
+        descs = [pool.share(np.zeros(5)), pool.allocate((3, 4))]
+        self.assertEqual(len(pool), 2)
+        pool.release(descs[0])
+        self.assertEqual(len(pool), 1)
+        pool.close()
+        self.assertEqual(len(pool), 0)
+        with self.assertRaises(FileNotFoundError):
+            SharedArray.attach(descs[1])
+
+    def test_process_folder_with_worker_processes(self):
+        with tempfile.TemporaryDirectory() as folder:
+            t = np.linspace(0, 10, 501)
+            for idx in range(4):
+                signal = (idx + 1) * np.exp(-((t - 5) ** 2) / 0.5) + 0.01 * t
+                with open(os.path.join(folder, f'run{idx}.csv'), 'w') as f:
+                    f.write('time,signal\n')
+                    f.writelines(f'{a},{b}\n' for a, b in zip(t, signal))
+
+            kwargs = dict(baseline_method='Linear', noise_method='Moving Average')
+            threaded = FileProcessor(**kwargs).process_folder(folder, [(3, 7)], ['Main'])
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                processed = FileProcessor(executor=executor, **kwargs).process_folder(
+                    folder, [(3, 7)], ['Main']
+                )
+
+        self.assertEqual(processed, threaded)
+
+    def test_stack_in_worker_process(self):
+        t = np.linspace(0, 10, 501)
+        arrays = [(t, (idx + 1) * np.exp(-((t - 5) ** 2) / 0.5) + 0.01 * t, None) for idx in range(3)]
+        paths = [f'run{idx}.csv' for idx in range(3)]
+        processor = FileProcessor(baseline_method='Linear', noise_method='Moving Average')
+
+        in_process = processor.compute_results_batch(paths, arrays, [(3, 7)], ['Main'])
+        pool = SharedArrayPool()
+        try:
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                shared = processor.compute_results_batch(paths, arrays, [(3, 7)], ['Main'],
+                                                         executor=executor, shared_pool=pool)
+            self.assertEqual(len(pool), 0)
+        finally:
+            pool.close()
+
+        self.assertEqual(shared, in_process)
+
+
+if __name__ == '__main__':
+    unittest.main()
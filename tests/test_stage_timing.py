@@ -0,0 +1,130 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.file_processor import FileProcessor
+from utils.export_manager import ExportManager
+from utils.stage_timing import RunTimings, stage
+
+
+class TestRunTimings(unittest.TestCase):
+
+    def test_stage_is_a_no_op_without_an_active_file(self):
+        timings = RunTimings()
+        with stage('noise'):
+            pass
+        self.assertEqual(timings.summary()['files'], 0)
+        self.assertIsNone(RunTimings(enabled=False).file('a.csv'))
+
+    def test_records_are_per_thread(self):
+        timings = RunTimings()
+        first, second = timings.file('a.csv'), timings.file('b.csv')
+
+        def work(record, name):
+            with RunTimings.activate(record):
+                with stage(name):
+                    sum(range(1000))
+
+        threads = [threading.Thread(target=work, args=(first, 'read_file')),
+                   threading.Thread(target=work, args=(second, 'baseline'))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(list(first.stages), ['read_file'])
+        self.assertEqual(list(second.stages), ['baseline'])
+        # Activation is restored after the block
+        with stage('noise'):
+            pass
+        self.assertNotIn('noise', first.stages)
+
+    def test_summary_percentiles_and_slowest_files(self):
+        timings = RunTimings()
+        for idx in range(100):
+            record = timings.file(f'run{idx}.csv')
+            record.add('integrate', (idx + 1) * 1e-3, 0.0)
+            record.bytes_read = 10
+        timings.finish()
+        summary = timings.summary(slowest=3)
+
+        info = summary['stages']['integrate']
+        self.assertEqual(info['files'], 100)
+        self.assertAlmostEqual(info['p50'], 0.0505)
+        self.assertAlmostEqual(info['max'], 0.1)
+        self.assertEqual(summary['bytes_read'], 1000)
+        self.assertEqual([entry['file'] for entry in summary['slowest_files']],
+                         ['run99.csv', 'run98.csv', 'run97.csv'])
+        self.assertIn('integrate', RunTimings.format_summary(summary))
+
+    def test_folded_records_give_the_same_summary(self):
+        retained, folded = RunTimings(), RunTimings(retain_files=False, slowest=3)
+        for timings in (retained, folded):
+            for idx in range(100):
+                record = timings.file(f'run{idx}.csv')
+                record.add('integrate', (idx + 1) * 1e-3, 0.0)
+                record.bytes_read = 10
+                timings.finish_file(f'run{idx}.csv')
+        self.assertEqual(folded.files, [])
+        self.assertEqual(folded._live, {})
+        self.assertEqual(retained.summary(slowest=3), folded.summary(slowest=3))
+
+
+class TestProcessorTimings(unittest.TestCase):
+
+    def test_batch_run_writes_a_sidecar(self):
+        with tempfile.TemporaryDirectory() as folder:
+            t = np.linspace(0, 10, 201)
+            paths = []
+            for idx in range(3):
+                path = os.path.join(folder, f'run{idx}.csv')
+                with open(path, 'w') as f:
+                    f.write('time,signal\n')
+                    f.writelines(f'{a},{b}\n' for a, b in zip(t, np.exp(-((t - 5) ** 2) / 0.5)))
+                paths.append(path)
+
+            processor = FileProcessor(noise_method='Savitzky-Golay', baseline_method='Linear')
+            processor.process_files(paths, [(3, 7), (1, 2)], ['Main', 'Minor'])
+            timings = processor.last_timings
+
+            summary = timings.summary()
+            self.assertEqual(summary['files'], 3)
+            self.assertEqual(summary['bytes_read'], sum(os.path.getsize(p) for p in paths))
+            for name in ('read_file', 'detect_columns', 'validate', 'noise', 'baseline',
+                         'integrate', 'quality_metrics'):
+                self.assertEqual(summary['stages'][name]['files'], 3, name)
+            record = timings.files[0]
+            self.assertEqual(record.stages['integrate'][2], 2)
+
+            results = processor.process_files(paths, [(3, 7)], ['Main'])
+            timings = processor.last_timings
+            export_path = os.path.join(folder, 'results.csv')
+            with timings.run_stage('export'):
+                ExportManager().export_results(results, export_path, 'csv')
+            sidecar = ExportManager.export_timings(timings, export_path)
+            self.assertEqual(sidecar, os.path.join(folder, 'results.timing.json'))
+            with open(sidecar) as f:
+                report = json.load(f)
+            self.assertEqual(len(report['per_file']), 3)
+            self.assertIn('validate', report['stages'])
+            self.assertIn('export', report['run_stages'])
+
+    def test_disabled(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'run.csv')
+            with open(path, 'w') as f:
+                f.write('time,signal\n0,0\n1,1\n2,0\n')
+            processor = FileProcessor(stage_timing=False)
+            processor.process_files([path], [(0, 2)], ['Main'])
+        self.assertIsNone(processor.last_timings)
+
+
+if __name__ == '__main__':
+    unittest.main()
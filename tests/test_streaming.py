@@ -0,0 +1,134 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.auc_calculator import AUCCalculator
+from core.file_processor import FileProcessor
+from core.streaming import StreamingIntegrator
+from utils.data_validator import DataValidator
+from utils.file_handler import FileHandler
+
+PEAKS = [(3.0, 7.0), (10.0, 14.0), (19.99, 30.0), (40.0, 50.0)]
+NAMES = ['A', 'B', 'Edge', 'Outside']
+CUSTOM = (0.0, 20.0, 'Custom')
+
+
+def trace():
+    t = np.linspace(0, 20, 4001)
+    return t, np.exp(-((t - 5) ** 2) / 0.3) + 0.5 * np.exp(-((t - 12) ** 2) / 0.5) + 0.01 * t
+
+
+class TestStreamingIntegrator(unittest.TestCase):
+
+    def assertSameResults(self, expected, actual):
+        self.assertEqual(expected.keys(), actual.keys())
+        for key, value in expected.items():
+            if isinstance(value, str):
+                self.assertEqual(value, actual[key], key)
+            else:
+                self.assertAlmostEqual(value, actual[key], delta=1e-9 * max(1.0, abs(value)), msg=key)
+
+    def test_matches_whole_trace_for_any_chunking(self):
+        time, signal = trace()
+        for baseline in ('None', 'Linear'):
+            calculator = AUCCalculator(baseline_method=baseline)
+            expected = calculator.calculate_multiple_peaks(time, signal, PEAKS, NAMES, None, CUSTOM, presorted=True)
+            for chunk in (1, 2, 37, 4001):
+                integrator = StreamingIntegrator(calculator, PEAKS, CUSTOM)
+                for start in range(0, len(time), chunk):
+                    integrator.feed(time[start:start + chunk], signal[start:start + chunk])
+                self.assertSameResults(expected, integrator.finish(NAMES, None, CUSTOM))
+
+    def test_noise_filters_match_whole_trace(self):
+        time, signal = trace()
+        signal = signal + 0.01 * np.random.default_rng(0).normal(size=len(signal))
+        for noise, params in (('Moving Average', {'window_size': 8}), ('Savitzky-Golay', {}),
+                              ('Median', {'window_size': 6}), ('Gaussian', {'sigma': 3.0})):
+            for baseline in ('None', 'Linear'):
+                calculator = AUCCalculator(baseline_method=baseline, noise_method=noise, noise_params=params)
+                expected = calculator.calculate_multiple_peaks(time, signal, PEAKS, NAMES, None, CUSTOM,
+                                                               presorted=True)
+                for chunk in (1, 37, 4001):
+                    integrator = StreamingIntegrator(calculator, PEAKS, CUSTOM)
+                    for start in range(0, len(time), chunk):
+                        integrator.feed(time[start:start + chunk], signal[start:start + chunk])
+                    self.assertSameResults(expected, integrator.finish(NAMES, None, CUSTOM))
+
+    def test_whole_trace_noise_filters_are_refused(self):
+        for noise, params in (('Whittaker', {}), ('Gaussian', {'gaussian_method': 'recursive'})):
+            with self.assertRaises(ValueError):
+                StreamingIntegrator(AUCCalculator(noise_method=noise, noise_params=params), PEAKS)
+
+    def test_clean_chunk_across_boundaries(self):
+        report = DataValidator.new_clean_report()
+        time, signal = DataValidator.clean_chunk([0, 1, 1, 'x'], [1, 2, 3, 4], report)
+        self.assertEqual(list(time), [0, 1])
+        time, signal = DataValidator.clean_chunk([1, 2, np.inf], [5, 6, 7], report, last_time=1.0)
+        self.assertEqual((list(time), list(signal)), ([2], [6]))
+        self.assertEqual((report['duplicate_time'], report['non_numeric'], report['infinite']), (2, 1, 1))
+        with self.assertRaises(ValueError):
+            DataValidator.clean_chunk([3, 2.5], [0, 0], report, last_time=2.0)
+
+
+class TestProcessStream(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'long.csv')
+        time, signal = trace()
+        signal[100] = np.nan
+        with open(self.path, 'w') as f:
+            f.write('time;signal;pressure\n')
+            f.writelines(f'{a};{b};1\n' for a, b in zip(time, signal))
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_matches_regular_processing(self):
+        expected = FileProcessor(quality_metrics=False).process_single_file(self.path, PEAKS, NAMES, None, CUSTOM)
+        processor = FileProcessor(streaming=True, stream_chunk_rows=250)
+        actual = processor.process_single_file(self.path, PEAKS, NAMES, None, CUSTOM)
+        self.assertEqual(actual['Cleaning_Notes'], 'missing=1')
+        for key, value in expected.items():
+            if isinstance(value, float):
+                self.assertAlmostEqual(value, actual[key], delta=1e-9 * max(1.0, abs(value)), msg=key)
+            else:
+                self.assertEqual(value, actual[key], key)
+
+    def test_noise_filter_matches_regular_processing(self):
+        kwargs = dict(noise_method='Savitzky-Golay', baseline_method='Linear')
+        expected = FileProcessor(quality_metrics=False, **kwargs).process_single_file(self.path, PEAKS, NAMES)
+        actual = FileProcessor(streaming=True, stream_chunk_rows=250, **kwargs).process_single_file(
+            self.path, PEAKS, NAMES
+        )
+        for name in NAMES:
+            self.assertAlmostEqual(expected[name], actual[name], delta=1e-9 * max(1.0, abs(expected[name])))
+
+    def test_batch_run_reads_in_chunks(self):
+        processor = FileProcessor(streaming=True, stream_chunk_rows=500)
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = processor.process_files([self.path], PEAKS, NAMES)
+        self.assertNotIn('error', results[0])
+        read_file = processor.last_timings.files[0].stages['read_file']
+        self.assertEqual(read_file[2], 10)  # 9 chunks plus the end of the file
+
+    def test_iter_chunks_without_header(self):
+        path = os.path.join(self.folder.name, 'plain.txt')
+        with open(path, 'w') as f:
+            f.writelines(f'{i}\t{i * 2}\t0\n' for i in range(10))
+        header = FileHandler.read_header(path, has_header=False)
+        self.assertEqual(FileHandler.detect_columns(header), (0, 1))
+        chunks = list(FileHandler.iter_chunks(path, has_header=False, chunk_rows=4, usecols=[0, 1]))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+        self.assertEqual(list(chunks[-1].columns), [0, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import argparse
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import tail
+from utils.tail_reader import TailReader
+
+
+class TestTailReader(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.folder.name, 'live.csv')
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def append(self, text):
+        with open(self.path, 'a') as f:
+            f.write(text)
+
+    def test_reads_only_complete_appended_rows(self):
+        self.append('pressure,time,signal\n1,0.0,1.0\n1,0.1,2.0\n1,0.2,')
+        reader = TailReader(self.path, time_col_idx=2, signal_col_idx=3)
+        time, signal = reader.poll()
+        self.assertEqual((list(time), list(signal)), ([0.0, 0.1], [1.0, 2.0]))
+
+        self.assertEqual(len(reader.poll()[0]), 0)
+        self.append('3.0\n1,0.2,4.0\n1,x,5.0\n')
+        time, signal = reader.poll()
+        # The duplicate time stamp is dropped, the first one wins
+        self.assertEqual((list(time), list(signal)), ([0.2], [3.0]))
+        self.assertEqual(list(reader.time), [0.0, 0.1, 0.2])
+        self.assertEqual((reader.report['duplicate_time'], reader.report['non_numeric']), (1, 1))
+
+    def test_buffers_grow(self):
+        self.append('')
+        reader = TailReader(self.path, has_header=False)
+        for start in range(0, 3000, 700):
+            self.append(''.join(f'{i}\t{i * 2}\n' for i in range(start, min(start + 700, 3000))))
+            reader.poll()
+        np.testing.assert_array_equal(reader.time, np.arange(3000))
+        np.testing.assert_array_equal(reader.signal, 2 * np.arange(3000))
+
+    def test_shrinking_file(self):
+        self.append('time,signal\n0,1\n1,2\n')
+        reader = TailReader(self.path)
+        reader.poll()
+        with open(self.path, 'w') as f:
+            f.write('time,signal\n')
+        with self.assertRaises(ValueError):
+            reader.poll()
+
+    def test_follow_reports_complete_windows(self):
+        t = np.linspace(0, 10, 501)
+        self.append('time,signal\n' + ''.join(f'{a},{b}\n' for a, b in zip(t[:300], np.ones(300))))
+        args = argparse.Namespace(file=self.path, peak=[('A', 1.0, 3.0), ('B', 8.0, 9.0)], baseline='None',
+                                  noise='None', no_header=False, time_col=1, signal_col=2,
+                                  interval=0.0, idle_timeout=0.0)
+        lines = []
+        results = tail.follow(args, out=lines.append)
+        self.assertTrue(lines[0].startswith('A: 2'))
+        self.assertIn('stopping', lines[-1])
+        self.assertAlmostEqual(results['A'], 2.0)
+        self.assertEqual(results['B'], 0)
+        self.assertIn('B_error', results)
+
+
+if __name__ == '__main__':
+    unittest.main()
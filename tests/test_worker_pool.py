@@ -0,0 +1,35 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from core.worker_pool import WorkerPool
+
+
+class TestWorkerPool(unittest.TestCase):
+
+    def test_pool_is_lazy_and_reused(self):
+        pool = WorkerPool(2)
+        self.assertFalse(pool.is_running())
+        try:
+            executor = pool.get_executor()
+            self.assertTrue(pool.is_running())
+            self.assertIs(pool.get_executor(), executor)
+            self.assertEqual(executor.submit(sum, [1, 2, 3]).result(), 6)
+        finally:
+            pool.shutdown()
+        self.assertFalse(pool.is_running())
+
+    def test_broken_pool_is_replaced(self):
+        pool = WorkerPool(1)
+        try:
+            executor = pool.get_executor()
+            executor.submit(os._exit, 1).exception()
+            self.assertIsNot(pool.get_executor(), executor)
+        finally:
+            pool.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()